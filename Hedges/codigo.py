@@ -1,135 +1,21 @@
+import os
+import sys
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.lines import Line2D
 
+# Permitir importar el paquete compartido desde la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from metaanalisis.cache import CacheResultados, clave_cache, huella_codigo
+from metaanalisis.efecto import Z_95, extract_results as _extract_results
+from metaanalisis.graficos import columna_texto, dibujar_filas_forest
+
 # Función para extraer resultados de cada conjunto de datos
 def extract_results(estudios, categoria):
     """Calcula tamaños del efecto y devuelve resultados para una categoría"""
-    resultados_estudios = []
-    
-    for estudio in estudios:
-        n_control = estudio['n_control']
-        n_intervencion = estudio['n_intervencion']
-        media_control = estudio['media_control']
-        media_intervencion = estudio['media_intervencion']
-        de_control = estudio['de_control']
-        de_intervencion = estudio['de_intervencion']
-        nombre = estudio.get('nombre', f"Estudio")
-        
-        # Calcular diferencia de medias
-        diferencia_medias = media_intervencion - media_control
-        
-        # Calcular desviación estándar agrupada
-        de_agrupada = np.sqrt(((n_control - 1) * de_control**2 + (n_intervencion - 1) * de_intervencion**2) / 
-                             (n_control + n_intervencion - 2))
-        
-        # Calcular d de Cohen
-        d_cohen = diferencia_medias / de_agrupada
-        
-        # Calcular g de Hedges (d de Cohen corregido por sesgo)
-        factor_correccion = 1 - (3 / (4 * (n_control + n_intervencion - 2) - 1))
-        g_hedges = d_cohen * factor_correccion
-        
-        # Calcular error estándar para g de Hedges
-        se_g_hedges = np.sqrt((n_control + n_intervencion) / (n_control * n_intervencion) + 
-                             (g_hedges**2) / (2 * (n_control + n_intervencion - 2)))
-        
-        # Calcular intervalo de confianza del 95%
-        ic_inferior = g_hedges - 1.96 * se_g_hedges
-        ic_superior = g_hedges + 1.96 * se_g_hedges
-        
-        # Calcular peso del estudio
-        peso = 1 / (se_g_hedges**2)
-        
-        # Interpretar tamaño del efecto
-        interpretacion = "Sin efecto"
-        if abs(g_hedges) >= 0.2 and abs(g_hedges) < 0.5:
-            interpretacion = "Pequeño"
-        elif abs(g_hedges) >= 0.5 and abs(g_hedges) < 0.8:
-            interpretacion = "Moderado"
-        elif abs(g_hedges) >= 0.8:
-            interpretacion = "Grande"
-            
-        resultados_estudios.append({
-            'nombre': nombre,
-            'categoria': categoria,
-            'n_control': n_control,
-            'n_intervencion': n_intervencion,
-            'n_total': n_control + n_intervencion,
-            'g_hedges': g_hedges,
-            'se_g_hedges': se_g_hedges,
-            'IC_95_inferior': ic_inferior,
-            'IC_95_superior': ic_superior,
-            'peso': peso,
-            'interpretacion': interpretacion
-        })
-    
-    # Crear DataFrame
-    df_estudios = pd.DataFrame(resultados_estudios)
-    
-    # Calcular efecto combinado (meta-análisis con modelo de efectos fijos)
-    if len(df_estudios) > 0:
-        suma_pesos = df_estudios['peso'].sum()
-        efecto_combinado = sum(df_estudios['g_hedges'] * df_estudios['peso']) / suma_pesos
-        se_combinado = np.sqrt(1 / suma_pesos)
-        
-        # Intervalo de confianza para el efecto combinado
-        ic_combinado_inf = efecto_combinado - 1.96 * se_combinado
-        ic_combinado_sup = efecto_combinado + 1.96 * se_combinado
-        
-        # Interpretación del efecto combinado
-        interpretacion_combinada = "Sin efecto"
-        if abs(efecto_combinado) >= 0.2 and abs(efecto_combinado) < 0.5:
-            interpretacion_combinada = "Pequeño"
-        elif abs(efecto_combinado) >= 0.5 and abs(efecto_combinado) < 0.8:
-            interpretacion_combinada = "Moderado"
-        elif abs(efecto_combinado) >= 0.8:
-            interpretacion_combinada = "Grande"
-        
-        # Estadísticas globales
-        n_total_control = df_estudios['n_control'].sum()
-        n_total_intervencion = df_estudios['n_intervencion'].sum()
-        
-        # Calcular heterogeneidad (I² y Q)
-        Q = sum(df_estudios['peso'] * (df_estudios['g_hedges'] - efecto_combinado)**2)
-        df_stat = len(df_estudios) - 1  # grados de libertad
-        I_cuadrado = max(0, (Q - df_stat) / Q * 100) if Q > 0 else 0
-        
-        resultados = {
-            'categoria': categoria,
-            'efecto_combinado': efecto_combinado,
-            'se_combinado': se_combinado,
-            'IC_95_combinado_inf': ic_combinado_inf,
-            'IC_95_combinado_sup': ic_combinado_sup,
-            'interpretacion_combinada': interpretacion_combinada,
-            'n_total_control': n_total_control,
-            'n_total_intervencion': n_total_intervencion,
-            'n_total': n_total_control + n_total_intervencion,
-            'Q': Q,
-            'df': df_stat,
-            'I_cuadrado': I_cuadrado,
-            'num_estudios': len(df_estudios)
-        }
-    else:
-        resultados = {
-            'categoria': categoria,
-            'efecto_combinado': np.nan,
-            'se_combinado': np.nan,
-            'IC_95_combinado_inf': np.nan,
-            'IC_95_combinado_sup': np.nan,
-            'interpretacion_combinada': "N/A",
-            'n_total_control': 0,
-            'n_total_intervencion': 0,
-            'n_total': 0,
-            'Q': np.nan,
-            'df': 0,
-            'I_cuadrado': np.nan,
-            'num_estudios': 0
-        }
-    
-    return resultados, df_estudios
+    return _extract_results(estudios, categoria)
 
 def visualizar_forest_plot_mejorado(resultados_por_categoria, df_estudios_combinado):
     """Crear un forest plot combinado que muestra todas las categorías 
@@ -165,6 +51,7 @@ def visualizar_forest_plot_mejorado(resultados_por_categoria, df_estudios_combin
     upper_cis = []
     study_names = []  # Nombres de estudios para el eje Y izquierdo
     effect_labels = []  # Etiquetas para los valores a la derecha
+    het_labels = []  # Heterogeneidad bajo cada efecto combinado
     colors = []
     es_combinado = []  # Bandera para indicar si es un efecto combinado
     sample_sizes = []
@@ -183,6 +70,7 @@ def visualizar_forest_plot_mejorado(resultados_por_categoria, df_estudios_combin
         upper_cis.append(0)     # Marcador de posición
         study_names.append(f"{categoria}")  # Encabezado en negrita
         effect_labels.append("")  # Sin etiqueta en el lado derecho para encabezados
+        het_labels.append("")
         colors.append('black')  # Color de encabezado
         es_combinado.append(-1)  # -1 indica encabezado
         sample_sizes.append(0)  # Marcador de posición
@@ -197,6 +85,7 @@ def visualizar_forest_plot_mejorado(resultados_por_categoria, df_estudios_combin
             study_names.append(estudio['nombre'])
             effect_text = f"{estudio['g_hedges']:.2f} [{estudio['IC_95_inferior']:.2f}, {estudio['IC_95_superior']:.2f}]"
             effect_labels.append(effect_text)
+            het_labels.append("")
             colors.append(colores_categoria.get(categoria, 'blue'))
             es_combinado.append(0)  # 0 indica estudio individual
             sample_sizes.append(estudio['n_total'])
@@ -207,9 +96,18 @@ def visualizar_forest_plot_mejorado(resultados_por_categoria, df_estudios_combin
         effect_sizes.append(resultado_categoria['efecto_combinado'])
         lower_cis.append(resultado_categoria['IC_95_combinado_inf'])
         upper_cis.append(resultado_categoria['IC_95_combinado_sup'])
-        study_names.append(f"Combinado ({resultado_categoria['num_estudios']} estudios)")
+        nombre_combinado = f"Combinado ({resultado_categoria['num_estudios']} estudios)"
+        study_names.append(nombre_combinado)
         combined_effect_text = f"{resultado_categoria['efecto_combinado']:.2f} [{resultado_categoria['IC_95_combinado_inf']:.2f}, {resultado_categoria['IC_95_combinado_sup']:.2f}] - {resultado_categoria['interpretacion_combinada']}"
         effect_labels.append(combined_effect_text)
+        # Misma búsqueda que el original: la etiqueta solo aparece si el nombre
+        # de alguna categoría está contenido en "Combinado (...)"
+        het_text = ""
+        for resultado in resultados_por_categoria:
+            if resultado['num_estudios'] > 0 and resultado['categoria'] in nombre_combinado:
+                het_text = f"I²={resultado['I_cuadrado']:.1f}%, Q={resultado['Q']:.2f}"
+                break
+        het_labels.append(het_text)
         colors.append(colores_categoria.get(categoria, 'red'))
         es_combinado.append(1)  # 1 indica efecto combinado
         sample_sizes.append(resultado_categoria['n_total'])
@@ -223,6 +121,7 @@ def visualizar_forest_plot_mejorado(resultados_por_categoria, df_estudios_combin
             upper_cis.append(0)     # Marcador de posición
             study_names.append("")  # Etiqueta vacía para espacio
             effect_labels.append("")  # Etiqueta vacía para espacio
+            het_labels.append("")
             colors.append('none')   # Sin color
             es_combinado.append(-2)  # -2 indica espacio
             sample_sizes.append(0)  # Marcador de posición
@@ -266,42 +165,24 @@ def visualizar_forest_plot_mejorado(resultados_por_categoria, df_estudios_combin
     # Añadir línea vertical en cero (sin efecto)
     ax.axvline(x=0, color='black', linestyle='-', linewidth=0.8, zorder=2)
     
-    # Trazar intervalos de confianza para estudios y efectos combinados
-    for i, (y, effect, lower, upper, es_type) in enumerate(zip(y_positions, effect_sizes, lower_cis, upper_cis, es_combinado)):
-        if es_type >= 0:  # Si es un estudio o efecto combinado
-            linewidth = 2 if es_type == 1 else 1.5
-            linestyle = '--' if es_type == 1 else '-'
-            color = 'red' if es_type == 1 else colors[i]
-            
-            # Trazar línea de intervalo de confianza
-            ax.hlines(y=y, xmin=lower, xmax=upper, colors=color, linestyles=linestyle, linewidth=linewidth, zorder=3)
-            
-            # Trazar punto de tamaño del efecto
-            if es_type == 1:
-                # Para efecto combinado, dibujar un diamante rojo
-                ax.scatter(effect, y, marker='D', s=100, color='red', edgecolor='black', zorder=4)
-            else:
-                # Círculo para estudio individual, tamaño proporcional al tamaño de la muestra
-                size = min(max(sample_sizes[i]/5, 30), 150)  # Escalar tamaño entre 30 y 150
-                ax.scatter(effect, y, s=size, color=color, edgecolor='black', zorder=4)
+    # Trazar intervalos de confianza y puntos de todas las filas en lote
+    dibujar_filas_forest(ax, y_positions, effect_sizes, lower_cis, upper_cis, es_combinado, colors, sample_sizes)
+    
+    # Añadir etiquetas de texto a la izquierda y valores a la derecha (un bloque de texto por estilo)
+    estilos_fila = {
+        -1: {'fontweight': 'bold', 'fontsize': 12},  # Encabezado de categoría
+        0: {'fontsize': 10},                         # Estudio individual
+        1: {'fontweight': 'bold', 'fontsize': 10}    # Efecto combinado
+    }
+    estilos = [estilos_fila.get(es_type, {}) for es_type in es_combinado]
+    columna_texto(ax, -0.25, y_positions, study_names, estilos, coordenadas_x='ejes', ha='left')
+    columna_texto(ax, 1.02, y_positions, effect_labels, estilos, coordenadas_x='ejes', ha='left')
     
-    # Añadir etiquetas de texto a la izquierda y valores a la derecha
-    for i, (y, name, effect_label, es_type) in enumerate(zip(y_positions, study_names, effect_labels, es_combinado)):
-        if es_type == -1:  # Encabezado de categoría
-            ax.text(-0.25, y, name, ha='left', va='center', fontweight='bold', fontsize=12, transform=ax.transAxes)
-        elif es_type == 0:  # Estudio individual
-            ax.text(-0.25, y, name, ha='left', va='center', fontsize=10, transform=ax.transAxes)
-            ax.text(1.02, y, effect_label, ha='left', va='center', fontsize=10, transform=ax.transAxes)
-        elif es_type == 1:  # Efecto combinado
-            ax.text(-0.25, y, name, ha='left', va='center', fontweight='bold', fontsize=10, transform=ax.transAxes)
-            ax.text(1.02, y, effect_label, ha='left', va='center', fontweight='bold', fontsize=10, transform=ax.transAxes)
-            
-            # Añadir info de heterogeneidad si está disponible
-            for resultado in resultados_por_categoria:
-                if resultado['num_estudios'] > 0 and resultado['categoria'] in name:
-                    het_text = f"I²={resultado['I_cuadrado']:.1f}%, Q={resultado['Q']:.2f}"
-                    ax.text(1.02, y-0.3, het_text, ha='left', va='center', fontsize=8, fontstyle='italic', transform=ax.transAxes)
-                    break
+    # Añadir info de heterogeneidad si está disponible (como en el original, con
+    # la posición vertical también en coordenadas de los ejes)
+    for y, het_text in zip(y_positions, het_labels):
+        if het_text:
+            ax.text(1.02, y-0.3, het_text, ha='left', va='center', fontsize=8, fontstyle='italic', transform=ax.transAxes)
     
     # Añadir leyenda para interpretación
     legend_elements = [
@@ -573,43 +454,55 @@ test_total_estudios = [
     }
 ]
 
-# Calcular tamaños del efecto para cada categoría
-resultados_glucosa, df_glucosa = extract_results(glucosa_estudios, "Glucosa en ayunas")
-resultados_free_test, df_free_test = extract_results(free_test_estudios, "Testosterona libre")
-resultados_homa, df_homa = extract_results(homa_estudios, "HOMA-IR")
-resultados_imc, df_imc = extract_results(imc_estudios, "IMC") 
-resultados_insulina, df_insulina = extract_results(insulina_estudios, "Insulina en ayunas")
-resultados_ciclos, df_ciclos = extract_results(ciclos_estudios, "Ciclos menstruales")
-resultados_test_total, df_test_total = extract_results(test_total_estudios, "Testosterona total")
+estudios_por_categoria = {
+    "Glucosa en ayunas": glucosa_estudios,
+    "Testosterona libre": free_test_estudios,
+    "HOMA-IR": homa_estudios,
+    "IMC": imc_estudios,
+    "Insulina en ayunas": insulina_estudios,
+    "Ciclos menstruales": ciclos_estudios,
+    "Testosterona total": test_total_estudios
+}
 
-# Combinar todos los resultados en listas
-resultados_por_categoria = [
-    resultados_glucosa,
-    resultados_free_test,
-    resultados_homa,
-    resultados_imc,
-    resultados_insulina,
-    resultados_ciclos,
-    resultados_test_total
-]
+def calcular_y_graficar():
+    """Calcula los resultados de todas las categorías y guarda el forest plot combinado"""
+    # Calcular tamaños del efecto para cada categoría
+    resultados_por_categoria = []
+    dfs_estudios = []
+    for categoria, estudios in estudios_por_categoria.items():
+        resultado, df_categoria = extract_results(estudios, categoria)
+        resultados_por_categoria.append(resultado)
+        dfs_estudios.append(df_categoria)
+
+    # Combinar todos los dataframes de estudios
+    df_estudios_combinado = pd.concat(dfs_estudios)
 
-# Combinar todos los dataframes de estudios
-df_estudios_combinado = pd.concat([
-    df_glucosa,
-    df_free_test,
-    df_homa,
-    df_imc,
-    df_insulina,
-    df_ciclos,
-    df_test_total
-])
+    # Crear el forest plot combinado
+    fig = visualizar_forest_plot_mejorado(resultados_por_categoria, df_estudios_combinado)
 
-# Crear el forest plot combinado
-fig = visualizar_forest_plot_mejorado(resultados_por_categoria, df_estudios_combinado)
+    # Guardar la figura
+    plt.savefig('forest_plot_inositol.png', dpi=300, bbox_inches='tight')
+    plt.close()
+    return resultados_por_categoria, df_estudios_combinado
 
-# Guardar la figura
-plt.savefig('forest_plot_inositol.png', dpi=300, bbox_inches='tight')
-plt.close()
+# Con METAANALISIS_CACHE=1 (o =<directorio>) se reutilizan resultados y figura
+# si no cambiaron los estudios, las opciones ni el código que los produce
+_variable_cache = os.environ.get('METAANALISIS_CACHE', '').strip()
+if _variable_cache and _variable_cache.lower() not in ('0', 'no', 'false'):
+    directorio_cache = (os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache_metaanalisis')
+                        if _variable_cache.lower() in ('1', 'si', 'sí', 'true') else _variable_cache)
+    cache = CacheResultados(directorio_cache)
+    clave = clave_cache(estudios_por_categoria, script='codigo', modelo='fijo', z=Z_95,
+                        estilo='forest_plot_mejorado', dpi=300,
+                        codigo=huella_codigo(os.path.abspath(__file__), 'metaanalisis.efecto',
+                                             'metaanalisis.graficos'))
+    (resultados_por_categoria, df_estudios_combinado), desde_cache = cache.obtener_o_calcular(
+        clave, calcular_y_graficar, archivos=['forest_plot_inositol.png'])
+    if desde_cache:
+        print("Resultados y forest_plot_inositol.png recuperados de la caché")
+    cache.desalojar()
+else:
+    resultados_por_categoria, df_estudios_combinado = calcular_y_graficar()
 
 # Mostrar un resumen de los resultados en formato tabla
 resultados_resumen = []
@@ -1,136 +1,24 @@
+import os
+import sys
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.lines import Line2D
 
+# Permitir importar el paquete compartido desde la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from metaanalisis.efecto import extract_results as _extract_results
+from metaanalisis.graficos import columna_texto, dibujar_filas_forest
+from metaanalisis import instrumentacion
+from metaanalisis.instrumentacion import contar, cronometrado, etapa
+
 # Function to extract results from each dataset
 def extract_results(estudios, categoria):
     """Calculate effect sizes and return results for a category"""
-    resultados_estudios = []
-    
-    for estudio in estudios:
-        n_control = estudio['n_control']
-        n_intervencion = estudio['n_intervencion']
-        media_control = estudio['media_control']
-        media_intervencion = estudio['media_intervencion']
-        de_control = estudio['de_control']
-        de_intervencion = estudio['de_intervencion']
-        nombre = estudio.get('nombre', f"Estudio")
-        
-        # Calculate mean difference
-        diferencia_medias = media_intervencion - media_control
-        
-        # Calculate pooled standard deviation
-        de_agrupada = np.sqrt(((n_control - 1) * de_control**2 + (n_intervencion - 1) * de_intervencion**2) / 
-                             (n_control + n_intervencion - 2))
-        
-        # Calculate Cohen's d
-        d_cohen = diferencia_medias / de_agrupada
-        
-        # Calculate Hedges' g (bias-corrected Cohen's d)
-        factor_correccion = 1 - (3 / (4 * (n_control + n_intervencion - 2) - 1))
-        g_hedges = d_cohen * factor_correccion
-        
-        # Calculate standard error for Hedges' g
-        se_g_hedges = np.sqrt((n_control + n_intervencion) / (n_control * n_intervencion) + 
-                             (g_hedges**2) / (2 * (n_control + n_intervencion - 2)))
-        
-        # Calculate 95% confidence interval
-        ic_inferior = g_hedges - 1.96 * se_g_hedges
-        ic_superior = g_hedges + 1.96 * se_g_hedges
-        
-        # Calculate study weight
-        peso = 1 / (se_g_hedges**2)
-        
-        # Interpret effect size
-        interpretacion = "Sin efecto"
-        if abs(g_hedges) >= 0.2 and abs(g_hedges) < 0.5:
-            interpretacion = "Pequeño"
-        elif abs(g_hedges) >= 0.5 and abs(g_hedges) < 0.8:
-            interpretacion = "Moderado"
-        elif abs(g_hedges) >= 0.8:
-            interpretacion = "Grande"
-            
-        resultados_estudios.append({
-            'nombre': nombre,
-            'categoria': categoria,
-            'n_control': n_control,
-            'n_intervencion': n_intervencion,
-            'n_total': n_control + n_intervencion,
-            'g_hedges': g_hedges,
-            'se_g_hedges': se_g_hedges,
-            'IC_95_inferior': ic_inferior,
-            'IC_95_superior': ic_superior,
-            'peso': peso,
-            'interpretacion': interpretacion
-        })
-    
-    # Create DataFrame
-    df_estudios = pd.DataFrame(resultados_estudios)
-    
-    # Calculate combined effect (meta-analysis with fixed effects model)
-    if len(df_estudios) > 0:
-        suma_pesos = df_estudios['peso'].sum()
-        efecto_combinado = sum(df_estudios['g_hedges'] * df_estudios['peso']) / suma_pesos
-        se_combinado = np.sqrt(1 / suma_pesos)
-        
-        # Confidence interval for combined effect
-        ic_combinado_inf = efecto_combinado - 1.96 * se_combinado
-        ic_combinado_sup = efecto_combinado + 1.96 * se_combinado
-        
-        # Interpretation of combined effect
-        interpretacion_combinada = "Sin efecto"
-        if abs(efecto_combinado) >= 0.2 and abs(efecto_combinado) < 0.5:
-            interpretacion_combinada = "Pequeño"
-        elif abs(efecto_combinado) >= 0.5 and abs(efecto_combinado) < 0.8:
-            interpretacion_combinada = "Moderado"
-        elif abs(efecto_combinado) >= 0.8:
-            interpretacion_combinada = "Grande"
-        
-        # Global statistics
-        n_total_control = df_estudios['n_control'].sum()
-        n_total_intervencion = df_estudios['n_intervencion'].sum()
-        
-        # Calculate heterogeneity (I² and Q)
-        Q = sum(df_estudios['peso'] * (df_estudios['g_hedges'] - efecto_combinado)**2)
-        df_stat = len(df_estudios) - 1  # degrees of freedom
-        I_cuadrado = max(0, (Q - df_stat) / Q * 100) if Q > 0 else 0
-        
-        resultados = {
-            'categoria': categoria,
-            'efecto_combinado': efecto_combinado,
-            'se_combinado': se_combinado,
-            'IC_95_combinado_inf': ic_combinado_inf,
-            'IC_95_combinado_sup': ic_combinado_sup,
-            'interpretacion_combinada': interpretacion_combinada,
-            'n_total_control': n_total_control,
-            'n_total_intervencion': n_total_intervencion,
-            'n_total': n_total_control + n_total_intervencion,
-            'Q': Q,
-            'df': df_stat,
-            'I_cuadrado': I_cuadrado,
-            'num_estudios': len(df_estudios)
-        }
-    else:
-        resultados = {
-            'categoria': categoria,
-            'efecto_combinado': np.nan,
-            'se_combinado': np.nan,
-            'IC_95_combinado_inf': np.nan,
-            'IC_95_combinado_sup': np.nan,
-            'interpretacion_combinada': "N/A",
-            'n_total_control': 0,
-            'n_total_intervencion': 0,
-            'n_total': 0,
-            'Q': np.nan,
-            'df': 0,
-            'I_cuadrado': np.nan,
-            'num_estudios': 0
-        }
-    
-    return resultados, df_estudios
+    return _extract_results(estudios, categoria)
 
+@cronometrado()
 def visualizar_forest_plot_combinado(resultados_por_categoria, df_estudios_combinado):
     """Create a combined forest plot showing all categories"""
     # Get unique categories
@@ -163,6 +51,8 @@ def visualizar_forest_plot_combinado(resultados_por_categoria, df_estudios_combi
     lower_cis = []
     upper_cis = []
     labels = []
+    effect_labels = []  # Values shown on the right
+    het_labels = []  # Heterogeneity below each combined effect
     colors = []
     es_combinado = []  # Flag to indicate if it's a combined effect
     sample_sizes = []
@@ -180,21 +70,26 @@ def visualizar_forest_plot_combinado(resultados_por_categoria, df_estudios_combi
         lower_cis.append(0)     # Placeholder
         upper_cis.append(0)     # Placeholder
         labels.append(f"**{categoria}**")  # Bold header
+        effect_labels.append("")
+        het_labels.append("")
         colors.append('black')  # Header color
         es_combinado.append(-1)  # -1 indicates header
         sample_sizes.append(0)  # Placeholder
         
         # Add individual studies
-        for _, estudio in estudios_categoria.iterrows():
-            y_pos_actual -= 1
-            y_positions.append(y_pos_actual)
-            effect_sizes.append(estudio['g_hedges'])
-            lower_cis.append(estudio['IC_95_inferior'])
-            upper_cis.append(estudio['IC_95_superior'])
-            labels.append(estudio['nombre'])
-            colors.append(colores_categoria.get(categoria, 'blue'))
-            es_combinado.append(0)  # 0 indicates individual study
-            sample_sizes.append(estudio['n_total'])
+        with etapa('filas_estudios', resultado=categoria):
+            for _, estudio in estudios_categoria.iterrows():
+                y_pos_actual -= 1
+                y_positions.append(y_pos_actual)
+                effect_sizes.append(estudio['g_hedges'])
+                lower_cis.append(estudio['IC_95_inferior'])
+                upper_cis.append(estudio['IC_95_superior'])
+                labels.append(estudio['nombre'])
+                effect_labels.append(f"{estudio['g_hedges']:.2f} [{estudio['IC_95_inferior']:.2f}, {estudio['IC_95_superior']:.2f}]")
+                het_labels.append("")
+                colors.append(colores_categoria.get(categoria, 'blue'))
+                es_combinado.append(0)  # 0 indicates individual study
+                sample_sizes.append(estudio['n_total'])
         
         # Add combined effect for this category
         y_pos_actual -= 1
@@ -203,6 +98,13 @@ def visualizar_forest_plot_combinado(resultados_por_categoria, df_estudios_combi
         lower_cis.append(resultado_categoria['IC_95_combinado_inf'])
         upper_cis.append(resultado_categoria['IC_95_combinado_sup'])
         labels.append(f"Combinado ({resultado_categoria['num_estudios']} estudios, n={resultado_categoria['n_total']})")
+        combined_effect_text = f"{resultado_categoria['efecto_combinado']:.2f} [{resultado_categoria['IC_95_combinado_inf']:.2f}, {resultado_categoria['IC_95_combinado_sup']:.2f}]"
+        if resultado_categoria['num_estudios'] > 0:
+            effect_labels.append(f"{combined_effect_text} - {resultado_categoria['interpretacion_combinada']}")
+            het_labels.append(f"I²={resultado_categoria['I_cuadrado']:.1f}%, Q={resultado_categoria['Q']:.2f}")
+        else:
+            effect_labels.append(combined_effect_text)
+            het_labels.append("")
         colors.append(colores_categoria.get(categoria, 'red'))
         es_combinado.append(1)  # 1 indicates combined effect
         sample_sizes.append(resultado_categoria['n_total'])
@@ -215,6 +117,8 @@ def visualizar_forest_plot_combinado(resultados_por_categoria, df_estudios_combi
             lower_cis.append(0)     # Placeholder
             upper_cis.append(0)     # Placeholder
             labels.append("")       # Empty label for spacing
+            effect_labels.append("")
+            het_labels.append("")
             colors.append('none')   # No color
             es_combinado.append(-2)  # -2 indicates spacing
             sample_sizes.append(0)  # Placeholder
@@ -251,56 +155,24 @@ def visualizar_forest_plot_combinado(resultados_por_categoria, df_estudios_combi
     # Add vertical line at zero (no effect)
     ax.axvline(x=0, color='black', linestyle='-', linewidth=0.8, zorder=2)
     
-    # Plot confidence intervals for studies and combined effects
-    for i, (y, effect, lower, upper, es_type) in enumerate(zip(y_positions, effect_sizes, lower_cis, upper_cis, es_combinado)):
-        if es_type >= 0:  # If it's a study or combined effect
-            linewidth = 2 if es_type == 1 else 1.5
-            linestyle = '--' if es_type == 1 else '-'
-            color = 'red' if es_type == 1 else colors[i]
-            
-            # Plot confidence interval line
-            ax.hlines(y=y, xmin=lower, xmax=upper, colors=color, linestyles=linestyle, linewidth=linewidth, zorder=3)
-            
-            # Plot effect size point
-            if es_type == 1:
-                # For combined effect, draw a red triangle
-                ax.scatter(effect, y, marker='D', s=100, color='red', edgecolor='black', zorder=4)
-            else:
-                # Circle for individual study, size proportional to sample size
-                size = min(max(sample_sizes[i]/5, 30), 150)  # Scale size between 30 and 150
-                ax.scatter(effect, y, s=size, color=color, edgecolor='black', zorder=4)
+    # Plot confidence intervals and points for all rows in one batch
+    with etapa('dibujar'):
+        dibujar_filas_forest(ax, y_positions, effect_sizes, lower_cis, upper_cis, es_combinado, colors, sample_sizes)
+    contar('filas_forest', len(y_positions))
+    
+    # Add text labels (one text block per style)
+    row_styles = {
+        -1: {'fontweight': 'bold', 'fontsize': 12},  # Category header
+        0: {'fontsize': 10},                         # Individual study
+        1: {'fontweight': 'bold', 'fontsize': 10}    # Combined effect
+    }
+    styles = [row_styles.get(es_type, {}) for es_type in es_combinado]
+    columna_texto(ax, -x_max*1.1, y_positions, [label.replace("**", "") for label in labels], styles, ha='left')
+    columna_texto(ax, x_max*0.5, y_positions, effect_labels, styles, ha='left')
     
-    # Add text labels
-    for i, (y, label, es_type) in enumerate(zip(y_positions, labels, es_combinado)):
-        if es_type == -1:  # Category header
-            ax.text(-x_max*1.1, y, label.replace("**", ""), ha='left', va='center', fontweight='bold', fontsize=12)
-        elif es_type >= 0:  # Study or combined effect
-            # Add effect size text
-            if es_type == 1:  # Combined effect
-                fontweight = 'bold'
-                fontsize = 10
-                
-                # Find the corresponding category for this combined effect
-                for resultado in resultados_por_categoria:
-                    if resultado['num_estudios'] > 0 and f"Combinado ({resultado['num_estudios']} estudios" in label:
-                        effect_text = f"{effect_sizes[i]:.2f} [{lower_cis[i]:.2f}, {upper_cis[i]:.2f}] - {resultado['interpretacion_combinada']}"
-                        het_text = f"I²={resultado['I_cuadrado']:.1f}%, Q={resultado['Q']:.2f}"
-                        break
-                else:
-                    effect_text = f"{effect_sizes[i]:.2f} [{lower_cis[i]:.2f}, {upper_cis[i]:.2f}]"
-                    het_text = ""
-                
-                ax.text(-x_max*1.1, y, label, ha='left', va='center', fontweight=fontweight, fontsize=fontsize)
-                ax.text(x_max*0.5, y, effect_text, ha='left', va='center', fontweight=fontweight, fontsize=fontsize)
-                
-                # Add heterogeneity info if available
-                if het_text:
-                    ax.text(x_max*0.5, y-0.3, het_text, ha='left', va='center', fontsize=8, fontstyle='italic')
-            else:  # Individual study
-                fontsize = 10
-                effect_text = f"{effect_sizes[i]:.2f} [{lower_cis[i]:.2f}, {upper_cis[i]:.2f}]"
-                ax.text(-x_max*1.1, y, label, ha='left', va='center')
-                ax.text(x_max*0.5, y, effect_text, ha='left', va='center', fontsize=fontsize)
+    # Add heterogeneity info below each combined effect
+    columna_texto(ax, x_max*0.5, y_positions - 0.3, het_labels, [{}] * len(het_labels),
+                  ha='left', fontsize=8, fontstyle='italic')
     
     # Add legend for interpretation
     legend_elements = [
@@ -330,7 +202,8 @@ def visualizar_forest_plot_combinado(resultados_por_categoria, df_estudios_combi
     plt.text(x_min*0.9, min(y_positions)-0.5, "Favorece control", ha='center', fontsize=10)
     plt.text(x_max*0.9, min(y_positions)-0.5, "Favorece inositol", ha='center', fontsize=10)
     
-    plt.tight_layout()
+    with etapa('tight_layout'):
+        plt.tight_layout()
     return fig
 
 # Define datasets for each category
@@ -590,15 +463,16 @@ todos_resultados = [
 ]
 
 # Combine all dataframes
-df_combinado = pd.concat([
-    df_glucosa, 
-    df_free_test, 
-    df_homa, 
-    df_imc, 
-    df_insulina, 
-    df_ciclos, 
-    df_test_total
-])
+with etapa('pd.concat'):
+    df_combinado = pd.concat([
+        df_glucosa, 
+        df_free_test, 
+        df_homa, 
+        df_imc, 
+        df_insulina, 
+        df_ciclos, 
+        df_test_total
+    ])
 
 # Sort categories by effect size magnitude (absolute value)
 todos_resultados.sort(key=lambda x: abs(x['efecto_combinado']) if not np.isnan(x['efecto_combinado']) else 0, reverse=True)
@@ -626,5 +500,13 @@ print("\nNota: Valores negativos indican reducción favorable en el grupo de ino
 print("      Valores positivos indican aumento favorable en el grupo de inositol.")
 
 # Save the plot
-plt.savefig('forest_plot_inositol_eficacia.png', dpi=300, bbox_inches='tight')
+with etapa('savefig'):
+    plt.savefig('forest_plot_inositol_eficacia.png', dpi=300, bbox_inches='tight')
+
+# Timing report (METAANALISIS_INSTRUMENTAR=1, or =memoria to also track peak memory)
+if instrumentacion.activa():
+    print()
+    print(instrumentacion.tabla_informe())
+    instrumentacion.guardar_informe('perfil_combined_forest_plot.json')
+
 plt.show()
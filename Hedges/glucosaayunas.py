@@ -1,6 +1,10 @@
-import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
+import os
+import sys
+
+# Permitir importar el paquete compartido desde la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from metaanalisis.efecto import calcular_tamano_efecto as _calcular_tamano_efecto
+from metaanalisis.perezoso import pyplot as plt
 
 def calcular_tamano_efecto(estudios):
     """
@@ -20,119 +24,11 @@ def calcular_tamano_efecto(estudios):
     
     Retorna:
     tupla: (resultados, df_estudios)
-    """
-    resultados_estudios = []
-    
-    for estudio in estudios:
-        n_control = estudio['n_control']
-        n_intervencion = estudio['n_intervencion']
-        media_control = estudio['media_control']
-        media_intervencion = estudio['media_intervencion']
-        de_control = estudio['de_control']
-        de_intervencion = estudio['de_intervencion']
-        nombre = estudio.get('nombre', f"Estudio {len(resultados_estudios)+1}")
-        
-        # Calcular diferencia de medias
-        diferencia_medias = media_intervencion - media_control
-        
-        # Calcular desviación estándar agrupada (pooled)
-        # Fórmula para SD agrupada: sqrt(((n1-1)*s1^2 + (n2-1)*s2^2) / (n1+n2-2))
-        de_agrupada = np.sqrt(((n_control - 1) * de_control**2 + (n_intervencion - 1) * de_intervencion**2) / 
-                             (n_control + n_intervencion - 2))
-        
-        # Calcular d de Cohen (usando SD agrupada)
-        d_cohen = diferencia_medias / de_agrupada
-        
-        # Calcular g de Hedges (d de Cohen corregido para muestras pequeñas)
-        # Factor de corrección: J = 1 - 3/(4(n1+n2-2)-1)
-        factor_correccion = 1 - (3 / (4 * (n_control + n_intervencion - 2) - 1))
-        g_hedges = d_cohen * factor_correccion
-        
-        # Calcular error estándar de g de Hedges
-        # SE(g) = sqrt((n1+n2)/(n1*n2) + g^2/(2*(n1+n2-2)))
-        se_g_hedges = np.sqrt((n_control + n_intervencion) / (n_control * n_intervencion) + 
-                             (g_hedges**2) / (2 * (n_control + n_intervencion - 2)))
-        
-        # Calcular el intervalo de confianza al 95% para g de Hedges
-        ic_inferior = g_hedges - 1.96 * se_g_hedges
-        ic_superior = g_hedges + 1.96 * se_g_hedges
-        
-        # Calcular el peso del estudio (inversamente proporcional a la varianza)
-        peso = 1 / (se_g_hedges**2)
-        
-        # Calcular interpretación del tamaño del efecto según Cohen
-        interpretacion = "Sin efecto"
-        if abs(g_hedges) >= 0.2 and abs(g_hedges) < 0.5:
-            interpretacion = "Pequeño"
-        elif abs(g_hedges) >= 0.5 and abs(g_hedges) < 0.8:
-            interpretacion = "Moderado"
-        elif abs(g_hedges) >= 0.8:
-            interpretacion = "Grande"
-            
-        resultados_estudios.append({
-            'nombre': nombre,
-            'n_control': n_control,
-            'n_intervencion': n_intervencion,
-            'n_total': n_control + n_intervencion,
-            'media_control': media_control,
-            'media_intervencion': media_intervencion,
-            'de_control': de_control,
-            'de_intervencion': de_intervencion,
-            'diferencia_medias': diferencia_medias,
-            'de_agrupada': de_agrupada,
-            'd_cohen': d_cohen,
-            'g_hedges': g_hedges,
-            'se_g_hedges': se_g_hedges,
-            'IC_95_inferior': ic_inferior,
-            'IC_95_superior': ic_superior,
-            'peso': peso,
-            'interpretacion': interpretacion
-        })
-    
-    # Crear DataFrame
-    df_estudios = pd.DataFrame(resultados_estudios)
-    
-    # Calcular el tamaño del efecto combinado (meta-análisis) con modelo de efectos fijos
-    suma_pesos = df_estudios['peso'].sum()
-    efecto_combinado = sum(df_estudios['g_hedges'] * df_estudios['peso']) / suma_pesos
-    se_combinado = np.sqrt(1 / suma_pesos)
-    
-    # Intervalo de confianza para el tamaño del efecto combinado
-    ic_combinado_inf = efecto_combinado - 1.96 * se_combinado
-    ic_combinado_sup = efecto_combinado + 1.96 * se_combinado
     
-    # Interpretación del efecto combinado
-    interpretacion_combinada = "Sin efecto"
-    if abs(efecto_combinado) >= 0.2 and abs(efecto_combinado) < 0.5:
-        interpretacion_combinada = "Pequeño"
-    elif abs(efecto_combinado) >= 0.5 and abs(efecto_combinado) < 0.8:
-        interpretacion_combinada = "Moderado"
-    elif abs(efecto_combinado) >= 0.8:
-        interpretacion_combinada = "Grande"
-    
-    # Estadísticas globales
-    n_total_control = df_estudios['n_control'].sum()
-    n_total_intervencion = df_estudios['n_intervencion'].sum()
-    
-    # Calcular heterogeneidad (I² y Q)
-    Q = sum(df_estudios['peso'] * (df_estudios['g_hedges'] - efecto_combinado)**2)
-    df = len(df_estudios) - 1  # grados de libertad
-    I_cuadrado = max(0, (Q - df) / Q * 100) if Q > 0 else 0
-    
-    resultados = {
-        'efecto_combinado': efecto_combinado,
-        'se_combinado': se_combinado,
-        'IC_95_combinado': (ic_combinado_inf, ic_combinado_sup),
-        'interpretacion_combinada': interpretacion_combinada,
-        'n_total_control': n_total_control,
-        'n_total_intervencion': n_total_intervencion,
-        'n_total': n_total_control + n_total_intervencion,
-        'Q': Q,
-        'df': df,
-        'I_cuadrado': I_cuadrado
-    }
-    
-    return resultados, df_estudios
+    Envoltorio del núcleo vectorizado de metaanalisis.efecto; se conserva
+    para que el código existente siga funcionando.
+    """
+    return _calcular_tamano_efecto(estudios)
 
 def visualizar_tamano_efecto(resultados, df_estudios):
     """
@@ -0,0 +1,55 @@
+"""
+Paquete compartido para el meta-análisis de la eficacia del inositol.
+
+Reúne los cálculos vectorizados que antes se repetían en cada script de
+`Hedges/` y de la raíz del repositorio.
+"""
+
+from metaanalisis.efecto import (
+    Z_95,
+    calcular_tamano_efecto,
+    columnas_hedges,
+    combinar_efecto_fijo,
+    extract_results,
+    interpretar_tamano_efecto,
+)
+from metaanalisis.lectura import (
+    ESQUEMAS,
+    descubrir_resultados,
+    detectar_esquema,
+    leer_directorio,
+    leer_resultado,
+)
+from metaanalisis.tabla import TablaEstudios
+from metaanalisis.aleatorios import (
+    METODOS_TAU2,
+    combinar_categorias,
+    combinar_efectos_aleatorios,
+    error_estandar_hartung_knapp,
+    estimar_tau2,
+)
+from metaanalisis.binario import (
+    MEDIDAS_BINARIAS,
+    analizar_binario,
+    combinar_mantel_haenszel,
+    combinar_peto,
+    efectos_binarios,
+    leer_csv_eventos,
+)
+from metaanalisis.acumulador import AcumuladorEfectoFijo, acumular_csv, acumular_tabla
+from metaanalisis.cache import CacheResultados, clave_cache, huella_codigo
+from metaanalisis.almacen import AlmacenEstudios
+from metaanalisis.sensibilidad import dejar_uno_fuera, figura_dejar_uno_fuera
+from metaanalisis.acumulativo import extraer_anio, figura_acumulativa, meta_analisis_acumulativo
+from metaanalisis.bootstrap import bootstrap_hedges
+from metaanalisis.potencia import figura_potencia, simular_potencia, tamano_necesario
+from metaanalisis.sesgo import figura_embudo, prueba_begg, prueba_egger, trim_and_fill
+from metaanalisis.resumen import comparar_resumen, resumen_obj3
+from metaanalisis.metarregresion import (
+    covariables,
+    matriz_permutaciones,
+    metarregresion,
+    parsear_intervencion,
+    prueba_permutacion,
+    prueba_permutacion_directorio,
+)
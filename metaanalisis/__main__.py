@@ -0,0 +1,189 @@
+"""
+Punto de entrada de línea de comandos:
+
+    python -m metaanalisis run [--salida DIR] [--procesos N] [--metodo REML] [--sin-figuras]
+                               [--cache DIR] [--tamano-cache MB]
+    python -m metaanalisis bench [--tamanos N ...] [--categorias N ...]
+                                 [--arranque] [--guardar JSON] [--comparar JSON] [--tolerancia 0.25]
+    python -m metaanalisis figuras [--salida DIR] [--modelos fijo aleatorio] [--idiomas es en]
+                                   [--formatos png pdf svg] [--dpi 300] [--procesos N] [--pendientes N]
+    python -m metaanalisis construir [--salida DIR] [--procesos N] [--forzar]
+    python -m metaanalisis resumen [--salida CSV] [--comparar obj3/meta_analisis_resumen.csv] [--tolerancia 1e-4]
+    python -m metaanalisis servir [--host 127.0.0.1] [--puerto 8000] [--ventana-ms 5] [--procesos N]
+
+Descubre los CSV de resultados de obj2/objetivo2 y obj3/objetivo3, los
+analiza en paralelo y escribe tablas, forest plots y un resumen en el
+directorio de salida. `bench` mide el rendimiento con estudios sintéticos
+(ver metaanalisis.benchmark). `figuras` regenera los forest plots de todas
+las combinaciones en un pool de procesos (ver metaanalisis.figuras). `construir` reconstruye de forma incremental
+los artefactos de obj3 (ver metaanalisis.construccion). `resumen` calcula
+meta_analisis_resumen.csv sin R y lo compara con el de R (ver
+metaanalisis.resumen). `servir` expone la combinación de estudios y
+los forest plots como servicio HTTP (ver metaanalisis.servicio).
+"""
+
+import argparse
+import sys
+
+from metaanalisis.aleatorios import METODOS_TAU2
+from metaanalisis.ejecutor import ejecutar
+from metaanalisis.lectura import DIRECTORIOS_DATOS, descubrir_resultados
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(prog="python -m metaanalisis",
+                                     description="Meta-análisis de la eficacia del inositol")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    run = subparsers.add_parser("run", help="Analiza todos los resultados en paralelo")
+    run.add_argument("--datos", nargs="+", default=list(DIRECTORIOS_DATOS),
+                     help="Directorios con los CSV de resultados")
+    run.add_argument("--raiz", default=".", help="Raíz del repositorio")
+    run.add_argument("--salida", default="resultados", help="Directorio de salida")
+    run.add_argument("--procesos", type=int, default=None, help="Número de procesos de trabajo")
+    run.add_argument("--metodo", choices=METODOS_TAU2, default="REML", help="Estimador de tau²")
+    run.add_argument("--sin-figuras", action="store_true", help="No generar forest plots")
+    run.add_argument("--cache", default=None, metavar="DIR",
+                     help="Directorio de la caché de resultados (desactivada si se omite)")
+    run.add_argument("--tamano-cache", type=float, default=512, metavar="MB",
+                     help="Tamaño máximo de la caché en MB (se desalojan las entradas menos usadas)")
+
+    bench = subparsers.add_parser("bench", help="Benchmarks con conjuntos de estudios sintéticos")
+    bench.add_argument("--tamanos", type=int, nargs="+", default=None, metavar="N",
+                       help="Números de estudios (por defecto 10 1000 100000 1000000)")
+    bench.add_argument("--categorias", type=int, nargs="+", default=None, metavar="N",
+                       help="Números de categorías de resultado (por defecto 1 50 500)")
+    bench.add_argument("--casos", nargs="+", default=None, help="Casos que se ejecutan (por defecto todos)")
+    bench.add_argument("--sin-memoria", action="store_true", help="No medir el pico de memoria")
+    bench.add_argument("--arranque", action="store_true",
+                       help="Mide también el tiempo de arranque de los caminos de cálculo y de gráficos")
+    bench.add_argument("--guardar", default=None, metavar="JSON", help="Guarda las mediciones como línea base")
+    bench.add_argument("--comparar", default=None, metavar="JSON", help="Línea base con la que comparar")
+    bench.add_argument("--tolerancia", type=float, default=0.25,
+                       help="Aumento relativo de tiempo o memoria que cuenta como regresión")
+
+    figuras = subparsers.add_parser("figuras", help="Regenera los forest plots de todos los resultados")
+    figuras.add_argument("--datos", nargs="+", default=list(DIRECTORIOS_DATOS),
+                         help="Directorios con los CSV de resultados")
+    figuras.add_argument("--raiz", default=".", help="Raíz del repositorio")
+    figuras.add_argument("--salida", default="figuras", help="Directorio de salida")
+    figuras.add_argument("--modelos", nargs="+", choices=("fijo", "aleatorio"), default=["fijo", "aleatorio"])
+    figuras.add_argument("--idiomas", nargs="+", choices=("es", "en"), default=["es", "en"])
+    figuras.add_argument("--formatos", nargs="+", choices=("png", "pdf", "svg"), default=["png", "pdf", "svg"])
+    figuras.add_argument("--dpi", type=int, default=300, help="Resolución de los PNG")
+    figuras.add_argument("--metodo", choices=METODOS_TAU2, default="REML", help="Estimador de tau²")
+    figuras.add_argument("--procesos", type=int, default=None, help="Número de procesos de trabajo")
+    figuras.add_argument("--pendientes", type=int, default=None,
+                         help="Máximo de figuras en cola a la vez (por defecto 2 por proceso)")
+
+    construir = subparsers.add_parser("construir",
+                                      help="Reconstruye solo los artefactos de obj3 desactualizados")
+    construir.add_argument("--raiz", default=".", help="Raíz del repositorio")
+    construir.add_argument("--salida", default="construccion", help="Directorio de salida")
+    construir.add_argument("--metodo", choices=METODOS_TAU2, default="REML", help="Estimador de tau²")
+    construir.add_argument("--procesos", type=int, default=None, help="Número de procesos de trabajo")
+    construir.add_argument("--forzar", action="store_true", help="Reconstruye todos los nodos")
+
+    resumen = subparsers.add_parser("resumen", help="Calcula meta_analisis_resumen.csv de obj3 sin R")
+    resumen.add_argument("--raiz", default=".", help="Raíz del repositorio")
+    resumen.add_argument("--metodo", choices=METODOS_TAU2, default="REML", help="Estimador de tau²")
+    resumen.add_argument("--salida", default=None, metavar="CSV", help="Escribe el resumen en este CSV")
+    resumen.add_argument("--comparar", default=None, metavar="CSV",
+                         help="CSV de R con el que comparar (p. ej. obj3/meta_analisis_resumen.csv)")
+    resumen.add_argument("--tolerancia", type=float, default=1e-4,
+                         help="Diferencia relativa y absoluta admitida en las columnas numéricas")
+
+    servir = subparsers.add_parser("servir", help="Servicio HTTP que combina estudios y dibuja forest plots")
+    servir.add_argument("--host", default="127.0.0.1", help="Dirección en la que escuchar")
+    servir.add_argument("--puerto", type=int, default=8000, help="Puerto en el que escuchar")
+    servir.add_argument("--ventana-ms", type=float, default=5.0,
+                        help="Milisegundos que se esperan para agrupar peticiones de /combinar en un lote")
+    servir.add_argument("--procesos", type=int, default=None, help="Procesos para dibujar forest plots")
+    return parser
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+
+    if args.comando == "run":
+        definiciones = descubrir_resultados(args.datos, args.raiz)
+        if not definiciones:
+            print("No se encontraron CSV de resultados", file=sys.stderr)
+            return 1
+        resumen, tiempo_total = ejecutar(definiciones, args.salida, args.procesos, args.metodo,
+                                         figuras=not args.sin_figuras, directorio_cache=args.cache,
+                                         tamano_cache=int(args.tamano_cache * 2**20))
+        suma_tareas = resumen['tiempo_total'].sum()
+        print(f"\n{len(resumen)} resultados en {tiempo_total:.2f} s "
+              f"(suma de tareas: {suma_tareas:.2f} s) -> {args.salida}")
+        return 1 if 'error' in resumen and resumen['error'].notna().any() else 0
+
+    if args.comando == "bench":
+        from metaanalisis import benchmark
+
+        mediciones = benchmark.ejecutar_benchmarks(args.tamanos or benchmark.TAMANOS,
+                                                   args.categorias or benchmark.CATEGORIAS,
+                                                   args.casos, memoria=not args.sin_memoria)
+        if args.arranque:
+            mediciones += benchmark.medir_arranque()
+        if args.guardar:
+            benchmark.guardar_linea_base(mediciones, args.guardar)
+        if args.comparar:
+            comparacion = benchmark.comparar(mediciones, benchmark.cargar_linea_base(args.comparar), args.tolerancia)
+            print()
+            print(comparacion.to_string(index=False))
+            regresiones = comparacion[comparacion['regresion']]
+            if len(regresiones):
+                print(f"\n{len(regresiones)} regresiones (tolerancia {args.tolerancia:.0%})", file=sys.stderr)
+                return 1
+
+    if args.comando == "figuras":
+        from metaanalisis.figuras import renderizar_forest
+
+        informe, tiempo_total = renderizar_forest(args.salida, args.datos, args.raiz, args.modelos, args.idiomas,
+                                                  args.formatos, args.dpi, args.metodo, args.procesos,
+                                                  args.pendientes)
+        errores = informe['error'].notna().sum()
+        print(f"\n{len(informe)} figuras en {tiempo_total:.2f} s ({errores} con error) -> {args.salida}")
+        return 1 if errores else 0
+
+    if args.comando == "construir":
+        from metaanalisis.construccion import construir_obj3
+
+        informe = construir_obj3(args.salida, args.raiz, args.metodo, args.procesos, args.forzar)
+        estados = [nodo['estado'] for nodo in informe.values()]
+        print(f"\n{estados.count('construido')} nodos construidos, {estados.count('al día')} al día, "
+              f"{estados.count('error')} con error, {estados.count('omitido')} omitidos -> {args.salida}")
+        return 1 if 'error' in estados else 0
+
+    if args.comando == "resumen":
+        import csv
+
+        from metaanalisis.resumen import resumen_obj3, comparar_resumen
+
+        tabla = resumen_obj3(args.raiz, args.metodo)
+        if args.salida:
+            tabla.to_csv(args.salida, index=False, quoting=csv.QUOTE_NONNUMERIC)
+        print(tabla[['Outcome', 'Estimador', 'Pvalue', 'I2', 'Significativo', 'Heterogeneidad']].to_string(index=False))
+        if args.comparar:
+            comparacion = comparar_resumen(tabla, args.comparar, args.tolerancia)
+            diferencias = comparacion[~comparacion['coincide']]
+            print(f"\n{comparacion['coincide'].sum()} de {len(comparacion)} celdas coinciden con {args.comparar}")
+            if len(diferencias):
+                print(diferencias.to_string(index=False))
+            inesperadas = diferencias[diferencias['conocida'].isna()]
+            if len(inesperadas):
+                print(f"\n{len(inesperadas)} diferencias no esperadas (tolerancia {args.tolerancia:g})",
+                      file=sys.stderr)
+                return 1
+        return 0
+
+    if args.comando == "servir":
+        from metaanalisis.servicio import servir
+
+        servir(args.host, args.puerto, args.ventana_ms / 1000, args.procesos)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+import numpy as np
+
+from metaanalisis.efecto import Z_95, columnas_hedges, interpretar_tamano_efecto
+from metaanalisis.perezoso import pandas as pd
+from metaanalisis.tabla import TablaEstudios
+
+
+class AcumuladorEfectoFijo:
+    """
+    Acumulador de estadísticos suficientes para el meta-análisis de efectos
+    fijos. Guarda solo Σw, la media ponderada y Σw(y - media)², que
+    equivalen a Σw, Σw·y y Σw·y² pero no pierden precisión al restar, más el
+    número de estudios y los totales de participantes.
+
+    Cada estudio se añade en O(1) y dos acumuladores parciales (por ejemplo
+    de distintos procesos o fragmentos de un CSV) se fusionan con `fusionar`
+    o con `+` sin volver a leer los datos.
+    """
+
+    __slots__ = ('suma_pesos', 'media', 'm2', 'num_estudios', 'n_total_control', 'n_total_intervencion')
+
+    def __init__(self):
+        self.suma_pesos = 0.0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.num_estudios = 0
+        self.n_total_control = 0
+        self.n_total_intervencion = 0
+
+    def __repr__(self):
+        return f"AcumuladorEfectoFijo({self.num_estudios} estudios, Σw={self.suma_pesos:.4g})"
+
+    @property
+    def suma_wy(self):
+        return self.suma_pesos * self.media
+
+    @property
+    def suma_wy2(self):
+        return self.m2 + self.suma_pesos * self.media**2
+
+    def agregar(self, efecto, peso, n_control=0, n_intervencion=0):
+        """Añade un estudio (actualización ponderada de Welford)"""
+        self.suma_pesos += peso
+        delta = efecto - self.media
+        self.media += delta * peso / self.suma_pesos
+        self.m2 += peso * delta * (efecto - self.media)
+        self.num_estudios += 1
+        self.n_total_control += n_control
+        self.n_total_intervencion += n_intervencion
+        return self
+
+    def agregar_lote(self, efectos, pesos, n_control=None, n_intervencion=None):
+        """Añade un bloque de estudios de una vez, con operaciones vectorizadas"""
+        efectos = np.asarray(efectos, dtype=float)
+        pesos = np.asarray(pesos, dtype=float)
+        if len(efectos) == 0:
+            return self
+
+        lote = AcumuladorEfectoFijo()
+        lote.suma_pesos = pesos.sum()
+        lote.media = np.dot(pesos, efectos) / lote.suma_pesos
+        lote.m2 = np.dot(pesos, (efectos - lote.media)**2)
+        lote.num_estudios = len(efectos)
+        lote.n_total_control = int(np.sum(n_control)) if n_control is not None else 0
+        lote.n_total_intervencion = int(np.sum(n_intervencion)) if n_intervencion is not None else 0
+        return self.fusionar(lote)
+
+    def fusionar(self, otro):
+        """Incorpora otro acumulador parcial (fórmula de Chan et al.)"""
+        if otro.num_estudios == 0:
+            return self
+        suma_pesos = self.suma_pesos + otro.suma_pesos
+        delta = otro.media - self.media
+        self.media += delta * otro.suma_pesos / suma_pesos
+        self.m2 += otro.m2 + delta**2 * self.suma_pesos * otro.suma_pesos / suma_pesos
+        self.suma_pesos = suma_pesos
+        self.num_estudios += otro.num_estudios
+        self.n_total_control += otro.n_total_control
+        self.n_total_intervencion += otro.n_total_intervencion
+        return self
+
+    def __add__(self, otro):
+        return AcumuladorEfectoFijo().fusionar(self).fusionar(otro)
+
+    def resultados(self, categoria=None, z=Z_95):
+        """
+        Devuelve el efecto combinado, su error estándar, el IC, Q e I² con las
+        mismas claves que `extract_results`.
+        """
+        if self.num_estudios == 0:
+            efecto_combinado = se_combinado = Q = I_cuadrado = np.nan
+            interpretacion = "N/A"
+            df = 0
+        else:
+            efecto_combinado = self.media
+            se_combinado = np.sqrt(1 / self.suma_pesos)
+            Q = self.m2
+            df = self.num_estudios - 1
+            I_cuadrado = max(0, (Q - df) / Q * 100) if df > 0 and Q > 0 else 0
+            interpretacion = str(interpretar_tamano_efecto(efecto_combinado))
+
+        resultados = {
+            'efecto_combinado': efecto_combinado,
+            'se_combinado': se_combinado,
+            'IC_95_combinado_inf': efecto_combinado - z * se_combinado,
+            'IC_95_combinado_sup': efecto_combinado + z * se_combinado,
+            'interpretacion_combinada': interpretacion,
+            'n_total_control': self.n_total_control,
+            'n_total_intervencion': self.n_total_intervencion,
+            'n_total': self.n_total_control + self.n_total_intervencion,
+            'Q': Q,
+            'df': df,
+            'I_cuadrado': I_cuadrado,
+            'num_estudios': self.num_estudios
+        }
+        if categoria is not None:
+            resultados = {'categoria': categoria, **resultados}
+        return resultados
+
+
+def acumular_tabla(tabla, acumulador=None):
+    """Añade todos los estudios de una TablaEstudios (g de Hedges) a un acumulador"""
+    acumulador = acumulador if acumulador is not None else AcumuladorEfectoFijo()
+    columnas = columnas_hedges(**tabla.columnas())
+    return acumulador.agregar_lote(columnas['g_hedges'], columnas['peso'], tabla.n_control, tabla.n_intervencion)
+
+
+def acumular_csv(ruta, tamano_bloque=100_000):
+    """
+    Combina un CSV de estudios (esquema de obj2/objetivo2 u obj3/objetivo3)
+    leyéndolo por bloques, con memoria constante independientemente del
+    tamaño del archivo.
+
+    Parámetros:
+    ruta: Ruta del CSV
+    tamano_bloque: Número de filas leídas en cada bloque
+
+    Retorna:
+    AcumuladorEfectoFijo con todos los estudios del archivo
+    """
+    acumulador = AcumuladorEfectoFijo()
+    for bloque in pd.read_csv(ruta, chunksize=tamano_bloque):
+        acumular_tabla(TablaEstudios.desde_dataframe(bloque), acumulador)
+    return acumulador
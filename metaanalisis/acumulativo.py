@@ -0,0 +1,137 @@
+import numpy as np
+
+from metaanalisis.aleatorios import combinar_efectos_aleatorios
+from metaanalisis.efecto import Z_95
+from metaanalisis.perezoso import pandas as pd
+
+# Criterios de orden disponibles para el meta-análisis acumulativo
+ORDENES = ('anio', 'precision')
+
+
+def extraer_anio(nombres):
+    """
+    Extrae el año de publicación del nombre del estudio ("Troisi, 2019",
+    "Kachhawa 2021", "Nordio et al., 2019"). Devuelve un array float con NaN
+    cuando el nombre no contiene un año.
+    """
+    anios = pd.Series(nombres, dtype=str).str.findall(r'(?<!\d)((?:19|20)\d{2})(?!\d)').str[-1]
+    return pd.to_numeric(anios, errors='coerce').to_numpy(dtype=float)
+
+
+def ordenar_estudios(df_estudios, orden='anio', columna_peso='peso'):
+    """
+    Ordena los estudios para el análisis acumulativo de forma estable:
+    'anio' (año extraído de 'nombre', los estudios sin año al final),
+    'precision' (de mayor a menor peso) o el nombre de cualquier columna.
+    """
+    df = df_estudios.reset_index(drop=True)
+    if orden == 'anio':
+        clave = extraer_anio(df['nombre'])
+        return df.assign(anio=clave).iloc[np.argsort(clave, kind='stable')].reset_index(drop=True)
+    if orden == 'precision':
+        return df.iloc[np.argsort(-df[columna_peso].to_numpy(dtype=float), kind='stable')].reset_index(drop=True)
+    if orden not in df.columns:
+        raise ValueError(f"Orden desconocido: {orden} (use {', '.join(ORDENES)} o una columna)")
+    return df.sort_values(orden, kind='stable').reset_index(drop=True)
+
+
+def _acumulado_fijo(efectos, pesos, z):
+    """
+    Los k efectos combinados acumulados en una pasada con sumas acumuladas.
+    Los efectos se centran en la media global antes de acumular para que
+    Q = Σw·d² - (Σw·d)²/Σw no pierda precisión.
+    """
+    media = np.dot(pesos, efectos) / pesos.sum()
+    d = efectos - media
+    suma_pesos = np.cumsum(pesos)
+    suma_wd = np.cumsum(pesos * d)
+    suma_wd2 = np.cumsum(pesos * d**2)
+
+    efecto = media + suma_wd / suma_pesos
+    se = np.sqrt(1 / suma_pesos)
+    Q = np.maximum(0.0, suma_wd2 - suma_wd**2 / suma_pesos)
+    df = np.arange(len(efectos))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        I_cuadrado = np.where((df > 0) & (Q > 0), np.maximum(0.0, (Q - df) / Q * 100), 0.0)
+
+    return {
+        'efecto_combinado': efecto,
+        'se_combinado': se,
+        'IC_95_combinado_inf': efecto - z * se,
+        'IC_95_combinado_sup': efecto + z * se,
+        'Q': Q,
+        'df': df,
+        'I_cuadrado': I_cuadrado
+    }
+
+
+def meta_analisis_acumulativo(df_estudios, orden='anio', modelo='fijo', metodo='REML', columna_efecto='g_hedges',
+                              columna_peso='peso', columna_se='se_g_hedges', z=Z_95):
+    """
+    Meta-análisis acumulativo: añade los estudios uno a uno en el orden
+    indicado y devuelve el efecto combinado tras cada incorporación.
+
+    Con efectos fijos los k resultados salen de sumas acumuladas de los
+    pesos en una sola pasada. Con efectos aleatorios los k prefijos se
+    ajustan en una sola llamada al motor vectorizado (matriz triangular
+    rellena con NaN).
+
+    Parámetros:
+    df_estudios: DataFrame por estudio (como el devuelto por `extract_results`)
+    orden: 'anio', 'precision' o el nombre de una columna (ver `ordenar_estudios`)
+    modelo: 'fijo' o 'aleatorio'
+    metodo: Estimador de tau² para el modelo de efectos aleatorios
+    z: Valor crítico para el intervalo de confianza
+
+    Retorna:
+    DataFrame: una fila por paso con 'agregado' (estudio añadido), 'anio',
+               'num_estudios', efecto combinado, IC, Q, df, I² y, con efectos
+               aleatorios, 'tau2'
+    """
+    df = ordenar_estudios(df_estudios, orden, columna_peso)
+    efectos = df[columna_efecto].to_numpy(dtype=float)
+    k = len(efectos)
+
+    if modelo == 'fijo':
+        columnas = _acumulado_fijo(efectos, df[columna_peso].to_numpy(dtype=float), z)
+    elif modelo == 'aleatorio':
+        varianzas = df[columna_se].to_numpy(dtype=float)**2
+        # Fila j = los j + 1 primeros estudios
+        fuera = np.triu(np.ones((k, k), dtype=bool), 1)
+        ajuste = combinar_efectos_aleatorios(np.where(fuera, np.nan, efectos),
+                                             np.where(fuera, np.nan, varianzas), metodo, z)
+        columnas = {clave: ajuste[clave] for clave in
+                    ('efecto_combinado', 'se_combinado', 'IC_95_combinado_inf', 'IC_95_combinado_sup',
+                     'Q', 'df', 'I_cuadrado', 'tau2')}
+    else:
+        raise ValueError(f"Modelo desconocido: {modelo} (use 'fijo' o 'aleatorio')")
+
+    anios = df['anio'].to_numpy() if 'anio' in df else extraer_anio(df['nombre'])
+    return pd.DataFrame({
+        'agregado': df['nombre'].to_numpy(),
+        'anio': anios,
+        'num_estudios': np.arange(1, k + 1),
+        **columnas
+    })
+
+
+def figura_acumulativa(df_acumulado, titulo="Meta-análisis acumulativo", etiqueta_x="g de Hedges"):
+    """
+    Forest plot acumulativo: la fila j muestra el efecto combinado de los
+    j primeros estudios, etiquetada con el estudio añadido en ese paso.
+
+    Retorna:
+    matplotlib.figure.Figure
+    """
+    from metaanalisis.graficos import figura_forest
+
+    return figura_forest(
+        [f"+ {nombre}" for nombre in df_acumulado['agregado']],
+        df_acumulado['efecto_combinado'],
+        df_acumulado['IC_95_combinado_inf'],
+        df_acumulado['IC_95_combinado_sup'],
+        np.zeros(len(df_acumulado)),
+        [],
+        titulo=titulo,
+        etiqueta_x=etiqueta_x
+    )
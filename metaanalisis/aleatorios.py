@@ -0,0 +1,321 @@
+import numpy as np
+
+from metaanalisis.distribuciones import cuantiles_t, valor_p_normal, valor_p_t
+from metaanalisis.efecto import Z_95, interpretar_tamano_efecto
+from metaanalisis.perezoso import pandas as pd
+
+# Estimadores de la varianza entre estudios (tau²) disponibles
+METODOS_TAU2 = ('DL', 'PM', 'REML')
+
+# Intervalos de confianza del efecto combinado: normal, t con k - 1 grados de
+# libertad, o t con el error estándar de Hartung–Knapp–Sidik–Jonkman
+INTERVALOS = ('z', 't', 'hksj')
+
+
+def rellenar_matriz(grupos, relleno=np.nan):
+    """
+    Apila una lista de arrays 1D de distinta longitud en una matriz
+    resultado × estudio, rellenando las posiciones vacías con `relleno`.
+    """
+    grupos = [np.asarray(grupo, dtype=float) for grupo in grupos]
+    k_max = max((len(grupo) for grupo in grupos), default=0)
+    matriz = np.full((len(grupos), k_max), relleno, dtype=float)
+    for fila, grupo in enumerate(grupos):
+        matriz[fila, :len(grupo)] = grupo
+    return matriz
+
+
+def matrices_por_categoria(df_estudios, columna_efecto='g_hedges', columna_se='se_g_hedges',
+                           columna_categoria='categoria'):
+    """
+    Convierte un DataFrame largo (una fila por estudio) en matrices rellenas
+    categoría × estudio de efectos y varianzas.
+
+    Retorna:
+    tupla: (categorias, efectos, varianzas)
+    """
+    codigos, categorias = pd.factorize(df_estudios[columna_categoria], sort=False)
+    posicion = df_estudios.groupby(codigos).cumcount().to_numpy()
+    forma = (len(categorias), posicion.max() + 1 if len(posicion) else 0)
+
+    efectos = np.full(forma, np.nan)
+    varianzas = np.full(forma, np.nan)
+    efectos[codigos, posicion] = df_estudios[columna_efecto].to_numpy(dtype=float)
+    varianzas[codigos, posicion] = df_estudios[columna_se].to_numpy(dtype=float)**2
+    return list(categorias), efectos, varianzas
+
+
+def _preparar(efectos, varianzas):
+    """Normaliza a 2D y sustituye el relleno por valores neutros con su máscara"""
+    y = np.atleast_2d(np.asarray(efectos, dtype=float))
+    v = np.atleast_2d(np.asarray(varianzas, dtype=float))
+    mascara = np.isfinite(y) & np.isfinite(v)
+    return np.where(mascara, y, 0.0), np.where(mascara, v, 1.0), mascara
+
+
+def _media_ponderada(y, w):
+    suma_w = w.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (w * y).sum(axis=1) / suma_w, suma_w
+
+
+def _tau2_dl(y, v, mascara):
+    """Estimador de momentos de DerSimonian–Laird (forma cerrada)"""
+    w = np.where(mascara, 1 / v, 0.0)
+    mu, suma_w = _media_ponderada(y, w)
+    Q = (w * (y - mu[:, None])**2).sum(axis=1)
+    k = mascara.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        C = suma_w - (w**2).sum(axis=1) / suma_w
+        tau2 = np.maximum(0.0, (Q - (k - 1)) / C)
+    return np.where(k > 1, tau2, 0.0)
+
+
+def _paso_pm(y, v, mascara, tau2):
+    """Paso de Newton para la ecuación de Paule–Mandel Q(tau²) = k - 1"""
+    w = np.where(mascara, 1 / (v + tau2[:, None]), 0.0)
+    mu, _ = _media_ponderada(y, w)
+    r2 = (y - mu[:, None])**2
+    F = (w * r2).sum(axis=1) - (mascara.sum(axis=1) - 1)
+    derivada = (w**2 * r2).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(derivada > 0, F / derivada, 0.0)
+
+
+def _paso_reml(y, v, mascara, tau2):
+    """
+    Paso de Newton sobre la verosimilitud restringida (REML). Usa la
+    información observada cuando es positiva y, si no, la esperada (Fisher
+    scoring), que converge más despacio pero siempre asciende.
+    """
+    w = np.where(mascara, 1 / (v + tau2[:, None]), 0.0)
+    mu, suma_w = _media_ponderada(y, w)
+    r = y - mu[:, None]
+    suma_w2 = (w**2).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Con P = W - w w'/Σw: P·y = w·r, y tr(P), tr(PP) e y'PPPy en forma cerrada
+        traza_P = suma_w - suma_w2 / suma_w
+        traza_PP = suma_w2 - 2 * (w**3).sum(axis=1) / suma_w + (suma_w2 / suma_w)**2
+        c = (w**2 * r).sum(axis=1) / suma_w
+        yPPPy = (w**3 * r**2).sum(axis=1) - c * (w**2 * r).sum(axis=1)
+        puntaje = (w**2 * r**2).sum(axis=1) - traza_P
+        info_observada = 2 * yPPPy - traza_PP
+        info = np.where(info_observada > 0, info_observada, traza_PP)
+        return np.where(info > 0, puntaje / info, 0.0)
+
+
+def estimar_tau2(efectos, varianzas, metodo='REML', tau2_inicial=None, tol=1e-10, max_iter=100):
+    """
+    Estima tau² para muchos meta-análisis a la vez.
+
+    Las filas de `efectos` y `varianzas` son resultados (categorías o
+    réplicas simuladas) y las columnas estudios; las posiciones sin estudio se
+    rellenan con NaN. Paule–Mandel y REML se resuelven con iteraciones de
+    Newton sobre toda la matriz a la vez; cada fila deja de
+    actualizarse cuando converge.
+
+    Parámetros:
+    efectos: Matriz (m × k) o vector (k) de efectos por estudio
+    varianzas: Matriz o vector de varianzas intra-estudio con la misma forma
+    metodo: 'DL', 'PM' o 'REML'
+    tau2_inicial: Valor inicial por fila para PM/REML (por defecto DL para
+                  REML y 0 para PM)
+    tol: Tolerancia absoluta sobre el cambio de tau² entre iteraciones
+    max_iter: Número máximo de iteraciones
+
+    Retorna:
+    tupla: (tau2, iteraciones, convergido) como arrays de longitud m
+    """
+    if metodo not in METODOS_TAU2:
+        raise ValueError(f"Método de tau² desconocido: {metodo} (use {', '.join(METODOS_TAU2)})")
+
+    y, v, mascara = _preparar(efectos, varianzas)
+    m = y.shape[0]
+    k = mascara.sum(axis=1)
+
+    tau2_dl = _tau2_dl(y, v, mascara)
+    if metodo == 'DL':
+        return tau2_dl, np.zeros(m, dtype=int), np.ones(m, dtype=bool)
+
+    if tau2_inicial is not None:
+        tau2 = np.broadcast_to(np.asarray(tau2_inicial, dtype=float), (m,)).copy()
+    elif metodo == 'REML':
+        tau2 = tau2_dl.copy()
+    else:
+        tau2 = np.zeros(m)
+
+    paso = _paso_reml if metodo == 'REML' else _paso_pm
+    activos = k > 1
+    tau2[~activos] = 0.0
+    iteraciones = np.zeros(m, dtype=int)
+
+    for _ in range(max_iter):
+        if not activos.any():
+            break
+        nuevo = np.maximum(0.0, tau2[activos] + paso(y[activos], v[activos], mascara[activos], tau2[activos]))
+        cambio = np.abs(nuevo - tau2[activos])
+        tau2[activos] = nuevo
+        iteraciones[activos] += 1
+        indices = np.flatnonzero(activos)
+        activos[indices[cambio < tol]] = False
+
+    return tau2, iteraciones, ~activos
+
+
+def _se_hartung_knapp(y, w, mascara, efecto, suma_w):
+    df = mascara.sum(axis=1) - 1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.sqrt((w * (y - efecto[:, None])**2).sum(axis=1) / (df * suma_w))
+
+
+def error_estandar_hartung_knapp(efectos, varianzas, tau2):
+    """
+    Error estándar del efecto combinado con el ajuste de Hartung–Knapp
+    (Sidik–Jonkman), que se usa con una t de k - 1 grados de libertad como en
+    `metacont(..., hakn = TRUE)` de R:
+
+        se² = Σ w (y - μ)² / ((k - 1) Σ w),  w = 1 / (v + tau²)
+
+    Parámetros:
+    efectos, varianzas: Matrices (m × k) rellenas con NaN, o vectores (k)
+    tau2: Varianza entre estudios de cada análisis (escalar o array de m)
+
+    Retorna:
+    float o array con el error estándar ajustado
+    """
+    es_vector = np.ndim(efectos) == 1
+    y, v, mascara = _preparar(efectos, varianzas)
+    tau2 = np.broadcast_to(np.asarray(tau2, dtype=float).reshape(-1), (len(y),))
+    w = np.where(mascara, 1 / (v + tau2[:, None]), 0.0)
+    mu, suma_w = _media_ponderada(y, w)
+    se = _se_hartung_knapp(y, w, mascara, mu, suma_w)
+    return se[0].item() if es_vector else se
+
+
+def _probabilidad_superior(z):
+    """Probabilidad de la cola superior del IC bilateral asociado al valor crítico `z`"""
+    return 0.975 if z == Z_95 else 1 - valor_p_normal(z) / 2
+
+
+def combinar_efectos_aleatorios(efectos, varianzas, metodo='REML', z=Z_95, tau2_inicial=None, intervalo='z',
+                                prediccion=False):
+    """
+    Combina efectos con el modelo de efectos aleatorios para uno o muchos
+    meta-análisis en una sola llamada.
+
+    Parámetros:
+    efectos: Matriz (m × k) rellena con NaN, o vector (k) para un solo análisis
+    varianzas: Varianzas intra-estudio con la misma forma que `efectos`
+    metodo: Estimador de tau² ('DL', 'PM' o 'REML')
+    z: Valor crítico normal del intervalo de confianza (Z_95 = 95 %); con
+       intervalos t se usa su mismo nivel de confianza
+    tau2_inicial: Valor inicial opcional para los métodos iterativos
+    intervalo: 'z' (normal), 't' (t con k - 1 grados de libertad) o 'hksj'
+               (t con el error estándar de Hartung–Knapp–Sidik–Jonkman, como
+               hakn = TRUE en R)
+    prediccion: Si es True se añade el intervalo de predicción del efecto de
+                un estudio nuevo, μ ± t(k - 2) · sqrt(tau² + se²) con el error
+                estándar sin ajustar (como prediction = TRUE en R)
+
+    Retorna:
+    dict: 'efecto_combinado', 'se_combinado' (el ajustado si intervalo es
+          'hksj'), 'IC_95_combinado_inf', 'IC_95_combinado_sup', 'valor_p',
+          'tau2', 'Q', 'df', 'I_cuadrado', 'num_estudios', 'iteraciones' y
+          'convergido', más 'IP_95_inf' e 'IP_95_sup' si `prediccion`;
+          escalares si la entrada es un vector, arrays si es una matriz
+    """
+    if intervalo not in INTERVALOS:
+        raise ValueError(f"Intervalo desconocido: {intervalo} (use {', '.join(INTERVALOS)})")
+
+    es_vector = np.ndim(efectos) == 1
+    tau2, iteraciones, convergido = estimar_tau2(efectos, varianzas, metodo, tau2_inicial)
+    y, v, mascara = _preparar(efectos, varianzas)
+    k = mascara.sum(axis=1)
+
+    # Q e I² se calculan con los pesos de efectos fijos, como en R (meta)
+    w_fijo = np.where(mascara, 1 / v, 0.0)
+    mu_fijo, _ = _media_ponderada(y, w_fijo)
+    Q = (w_fijo * (y - mu_fijo[:, None])**2).sum(axis=1)
+    df = k - 1
+    # Con un solo estudio Q es ruido de redondeo: I² es 0, no (Q - 0) / Q
+    with np.errstate(invalid='ignore', divide='ignore'):
+        I_cuadrado = np.where((df > 0) & (Q > 0), np.maximum(0.0, (Q - df) / Q * 100), 0.0)
+
+    w = np.where(mascara, 1 / (v + tau2[:, None]), 0.0)
+    efecto, suma_w = _media_ponderada(y, w)
+    with np.errstate(divide='ignore'):
+        se = np.sqrt(1 / suma_w)
+
+    # Los cuantiles t salen de una tabla precalculada por nivel de confianza
+    if intervalo == 'z':
+        se_ic, critico = se, z
+        with np.errstate(invalid='ignore', divide='ignore'):
+            valor_p = valor_p_normal(efecto / se)
+    else:
+        se_ic = se if intervalo == 't' else _se_hartung_knapp(y, w, mascara, efecto, suma_w)
+        critico = cuantiles_t(_probabilidad_superior(z), df)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            valor_p = valor_p_t(efecto / se_ic, df)
+
+    resultados = {
+        'efecto_combinado': efecto,
+        'se_combinado': se_ic,
+        'IC_95_combinado_inf': efecto - critico * se_ic,
+        'IC_95_combinado_sup': efecto + critico * se_ic,
+        'valor_p': np.asarray(valor_p, dtype=float).reshape(-1),
+        'tau2': tau2,
+        'Q': Q,
+        'df': df,
+        'I_cuadrado': np.where(k > 0, I_cuadrado, np.nan),
+        'num_estudios': k,
+        'iteraciones': iteraciones,
+        'convergido': convergido
+    }
+    if prediccion:
+        critico_prediccion = cuantiles_t(_probabilidad_superior(z), k - 2)
+        se_prediccion = np.sqrt(tau2 + se**2)
+        resultados['IP_95_inf'] = efecto - critico_prediccion * se_prediccion
+        resultados['IP_95_sup'] = efecto + critico_prediccion * se_prediccion
+    if es_vector:
+        resultados = {clave: valor[0].item() for clave, valor in resultados.items()}
+    return resultados
+
+
+def combinar_categorias(df_estudios, metodo='REML', columna_efecto='g_hedges', columna_se='se_g_hedges',
+                        intervalo='z'):
+    """
+    Ajusta el modelo de efectos aleatorios para todas las categorías de un
+    DataFrame combinado (como `df_estudios_combinado` de Hedges/codigo.py) en
+    una sola pasada vectorizada. `intervalo` es el de `combinar_efectos_aleatorios`.
+
+    Retorna:
+    list: un diccionario por categoría con las mismas claves que
+          `extract_results` más 'tau2' y 'modelo'
+    """
+    categorias, efectos, varianzas = matrices_por_categoria(df_estudios, columna_efecto, columna_se)
+    ajuste = combinar_efectos_aleatorios(efectos, varianzas, metodo, intervalo=intervalo)
+    totales = df_estudios.groupby('categoria', sort=False)[['n_control', 'n_intervencion']].sum()
+
+    resultados = []
+    for i, categoria in enumerate(categorias):
+        n_total_control = totales.loc[categoria, 'n_control']
+        n_total_intervencion = totales.loc[categoria, 'n_intervencion']
+        resultados.append({
+            'categoria': categoria,
+            'efecto_combinado': ajuste['efecto_combinado'][i],
+            'se_combinado': ajuste['se_combinado'][i],
+            'IC_95_combinado_inf': ajuste['IC_95_combinado_inf'][i],
+            'IC_95_combinado_sup': ajuste['IC_95_combinado_sup'][i],
+            'valor_p': ajuste['valor_p'][i],
+            'interpretacion_combinada': str(interpretar_tamano_efecto(ajuste['efecto_combinado'][i])),
+            'n_total_control': n_total_control,
+            'n_total_intervencion': n_total_intervencion,
+            'n_total': n_total_control + n_total_intervencion,
+            'Q': ajuste['Q'][i],
+            'df': int(ajuste['df'][i]),
+            'I_cuadrado': ajuste['I_cuadrado'][i],
+            'tau2': ajuste['tau2'][i],
+            'num_estudios': int(ajuste['num_estudios'][i]),
+            'modelo': f"Efectos aleatorios ({metodo}{', HKSJ' if intervalo == 'hksj' else ''})"
+        })
+    return resultados
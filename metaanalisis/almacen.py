@@ -0,0 +1,161 @@
+import os
+import tempfile
+
+import numpy as np
+
+from metaanalisis.efecto import CLAVES_ESTUDIO
+from metaanalisis.lectura import DIRECTORIOS_DATOS, leer_directorio
+from metaanalisis.perezoso import es_dataframe, pandas as pd
+from metaanalisis.tabla import TablaEstudios
+
+EXTENSION = '.arrow'
+
+
+def _pyarrow():
+    """Importa pyarrow, que solo hace falta para el almacén columnar"""
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+    except ImportError:
+        raise ImportError("El almacén de estudios requiere pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+
+def _dataframe_estudios(datos):
+    """DataFrame canónico a partir de un DataFrame, una TablaEstudios o una lista de diccionarios"""
+    if es_dataframe(datos):
+        return datos.reset_index(drop=True)
+    if not isinstance(datos, TablaEstudios):
+        datos = TablaEstudios.desde_diccionarios(datos)
+    return pd.DataFrame({'nombre': datos.nombres, **datos.columnas()})
+
+
+class AlmacenEstudios:
+    """
+    Almacén columnar en disco de tablas canónicas de estudios, con una
+    partición Arrow IPC por resultado: `<directorio>/<resultado>.arrow`
+    (p. ej. 'obj2/homa-ir' -> obj2/homa-ir.arrow).
+
+    Se usa el formato de archivo IPC de Arrow y no Parquet porque sus
+    buffers se pueden leer tal cual desde un archivo mapeado en memoria: las
+    columnas numéricas llegan a NumPy sin copiarse ni decodificarse, y
+    combinar un resultado solo lee las páginas de su partición.
+
+    Las particiones se escriben en un archivo temporal y se mueven a su
+    sitio con un solo renombrado, igual que las entradas de CacheResultados.
+    """
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        os.makedirs(directorio, exist_ok=True)
+
+    def __repr__(self):
+        return f"AlmacenEstudios({self.directorio!r}, {len(self)} resultados)"
+
+    def _ruta(self, resultado):
+        return os.path.join(self.directorio, *resultado.split('/')) + EXTENSION
+
+    def resultados(self):
+        """Lista ordenada de los resultados guardados"""
+        resultados = []
+        for actual, _, archivos in os.walk(self.directorio):
+            relativo = os.path.relpath(actual, self.directorio)
+            for archivo in archivos:
+                if archivo.endswith(EXTENSION):
+                    partes = [] if relativo == '.' else relativo.split(os.sep)
+                    resultados.append('/'.join(partes + [archivo[:-len(EXTENSION)]]))
+        return sorted(resultados)
+
+    def __len__(self):
+        return len(self.resultados())
+
+    def __contains__(self, resultado):
+        return os.path.exists(self._ruta(resultado))
+
+    def guardar(self, resultado, datos, moderadores=None):
+        """
+        Guarda (o reemplaza) la partición de un resultado.
+
+        Parámetros:
+        resultado: Clave del resultado ('objetivo/resultado')
+        datos: DataFrame canónico (ver `leer_resultado`), TablaEstudios o
+               lista de diccionarios de estudios
+        moderadores: DataFrame opcional de covariables con una fila por
+                     estudio (ver `covariables`) que se guarda junto a los datos
+        """
+        pa = _pyarrow()
+        df = _dataframe_estudios(datos)
+        if moderadores is not None:
+            df = pd.concat([df, moderadores.reset_index(drop=True)], axis=1)
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+
+        ruta = self._ruta(resultado)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        descriptor, temporal = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(ruta))
+        os.close(descriptor)
+        try:
+            with pa.OSFile(temporal, 'wb') as destino, pa.ipc.new_file(destino, tabla.schema) as escritor:
+                escritor.write_table(tabla)
+            os.replace(temporal, ruta)
+        except BaseException:
+            os.remove(temporal)
+            raise
+
+    def importar(self, directorios=DIRECTORIOS_DATOS, raiz=".", moderadores=True):
+        """
+        Guarda todos los CSV de resultados de `directorios` (ver
+        `leer_directorio`), uno por partición 'objetivo/resultado'. Si
+        `moderadores` es True se añaden las covariables de la intervención.
+
+        Retorna:
+        list: claves de los resultados guardados
+        """
+        from metaanalisis.metarregresion import covariables
+
+        claves = []
+        for definicion in leer_directorio(directorios, raiz):
+            clave = f"{definicion['objetivo']}/{definicion['resultado']}"
+            datos = definicion['datos']
+            self.guardar(clave, datos, covariables(datos) if moderadores else None)
+            claves.append(clave)
+        return claves
+
+    def leer(self, resultado, columnas=None):
+        """
+        Lee la partición de un resultado como pyarrow.Table mapeada en
+        memoria (sin copiar los buffers).
+
+        Parámetros:
+        resultado: Clave del resultado
+        columnas: Columnas que se quieren leer (todas si se omite)
+        """
+        pa = _pyarrow()
+        if resultado not in self:
+            raise KeyError(resultado)
+        with pa.memory_map(self._ruta(resultado), 'r') as fuente:
+            tabla = pa.ipc.open_file(fuente).read_all()
+        return tabla if columnas is None else tabla.select(list(columnas))
+
+    def dataframe(self, resultado, columnas=None):
+        """Partición de un resultado como DataFrame (p. ej. para `analizar_binario`)"""
+        return self.leer(resultado, columnas).to_pandas()
+
+    def tabla(self, resultado, categoria=None):
+        """
+        Partición de un resultado continuo como TablaEstudios, lista para
+        `calcular_tamano_efecto`, `extract_results`, `bootstrap_hedges`...
+        en lugar de las listas `*_estudios`. Las columnas numéricas son vistas
+        de solo lectura sobre el archivo mapeado.
+
+        Parámetros:
+        resultado: Clave del resultado
+        categoria: Etiqueta de la categoría (por defecto, el nombre del resultado)
+        """
+        tabla = self.leer(resultado, ('nombre',) + CLAVES_ESTUDIO)
+        columnas = {}
+        for clave in CLAVES_ESTUDIO:
+            columna = tabla.column(clave)
+            columnas[clave] = (columna.chunk(0).to_numpy() if columna.num_chunks == 1
+                               else np.asarray(columna))
+        categoria = resultado.rsplit('/', 1)[-1] if categoria is None else categoria
+        return TablaEstudios(tabla.column('nombre').to_pylist(), columnas, categorias=(categoria,))
@@ -0,0 +1,363 @@
+"""
+Benchmarks del cálculo del tamaño del efecto, la combinación y los forest
+plots con conjuntos de estudios sintéticos:
+
+    python -m metaanalisis bench [--tamanos 10 1000 100000 1000000] [--categorias 1 50 500]
+                                 [--guardar base.json] [--comparar base.json] [--tolerancia 0.25]
+
+Cada caso se mide con el mejor de varias repeticiones (tiempo y estudios
+por segundo) y, aparte, con tracemalloc para el pico de memoria. Los
+resultados se guardan como línea base JSON y se comparan con una anterior
+para señalar regresiones.
+"""
+
+import ast
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from metaanalisis.aleatorios import combinar_efectos_aleatorios
+from metaanalisis.efecto import calcular_tamano_efecto, columnas_hedges, extract_results
+from metaanalisis.perezoso import pandas as pd
+from metaanalisis.tabla import TablaEstudios
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Se incrementa cuando cambia el significado de los casos; las líneas base
+# de otra versión no se comparan
+VERSION_BENCHMARK = 2
+
+TAMANOS = (10, 1_000, 100_000, 1_000_000)
+CATEGORIAS = (1, 50, 500)
+
+# Tamaño máximo para los casos con bucles por estudio o con un gráfico
+MAXIMO_BUCLE = 100_000
+MAXIMO_GRAFICO = 1_000
+
+# Estudios por meta-análisis en el caso de muchos meta-análisis pequeños
+ESTUDIOS_POR_ANALISIS = 5
+
+# Tiempo mínimo acumulado por caso y máximo de repeticiones
+TIEMPO_MINIMO = 0.2
+MAX_REPETICIONES = 20
+
+# Arranque de un intérprete nuevo: (nombre, código). Los caminos de cálculo
+# no deben cargar pandas ni matplotlib
+ARRANQUES = (
+    ('python', "pass"),
+    ('numpy', "import numpy"),
+    ('metaanalisis', "import metaanalisis"),
+    ('calculo_g', "from metaanalisis import TablaEstudios, columnas_hedges, combinar_efecto_fijo\n"
+                  "t = TablaEstudios.desde_diccionarios([dict(n_control=20, n_intervencion=20, media_control=1.0,"
+                  " media_intervencion=1.5, de_control=1.0, de_intervencion=1.0)] * 5)\n"
+                  "c = columnas_hedges(**t.columnas())\n"
+                  "combinar_efecto_fijo(c['g_hedges'], c['peso'])"),
+    ('calculo_dataframe', "from metaanalisis import calcular_tamano_efecto\n"
+                          "calcular_tamano_efecto([dict(n_control=20, n_intervencion=20, media_control=1.0,"
+                          " media_intervencion=1.5, de_control=1.0, de_intervencion=1.0)] * 5)"),
+    ('pyplot', "from metaanalisis.perezoso import pyplot as plt\nplt.figure()"),
+)
+REPETICIONES_ARRANQUE = 5
+
+
+def generar_estudios(num_estudios, num_categorias=1, semilla=0):
+    """
+    Genera una TablaEstudios sintética con `num_estudios` estudios repartidos
+    por igual entre `num_categorias` categorías ("Resultado 1", ...), con
+    tamaños de grupo entre 10 y 200 y efectos verdaderos moderados.
+    """
+    rng = np.random.default_rng(semilla)
+    n_control = rng.integers(10, 201, num_estudios)
+    n_intervencion = rng.integers(10, 201, num_estudios)
+    de_control = rng.uniform(0.5, 2.0, num_estudios)
+    de_intervencion = de_control * rng.uniform(0.8, 1.25, num_estudios)
+    media_control = rng.normal(10.0, 2.0, num_estudios)
+    media_intervencion = media_control + rng.normal(-0.3, 0.3, num_estudios) * de_control
+    num_categorias = max(1, min(num_categorias, num_estudios))
+    codigos = np.arange(num_estudios) * num_categorias // num_estudios
+    return TablaEstudios(
+        np.char.add("Estudio ", np.arange(1, num_estudios + 1).astype(str)),
+        {
+            'n_control': n_control,
+            'n_intervencion': n_intervencion,
+            'media_control': media_control,
+            'media_intervencion': media_intervencion,
+            'de_control': de_control,
+            'de_intervencion': de_intervencion,
+        },
+        codigos,
+        [f"Resultado {i + 1}" for i in range(num_categorias)],
+    )
+
+
+def cargar_funciones(ruta):
+    """
+    Carga las importaciones y definiciones de funciones de un script sin
+    ejecutar su código de nivel superior (datos, gráficos, savefig...).
+
+    Retorna:
+    dict: espacio de nombres con las funciones del script
+    """
+    with open(ruta, encoding='utf-8') as archivo:
+        arbol = ast.parse(archivo.read(), ruta)
+    arbol.body = [nodo for nodo in arbol.body
+                  if isinstance(nodo, (ast.Import, ast.ImportFrom, ast.FunctionDef, ast.ClassDef))]
+    espacio = {'__name__': f"benchmark_{os.path.basename(ruta)[:-len('.py')]}", '__file__': ruta}
+    exec(compile(arbol, ruta, 'exec'), espacio)
+    return espacio
+
+
+def _medir(funcion, memoria):
+    """Mejor tiempo y mediana de varias repeticiones y, si se pide, el pico de memoria"""
+    # Llamada de calentamiento sin medir: las importaciones diferidas (pandas,
+    # matplotlib) y las cachés se pagan aquí, no en la primera repetición ni
+    # en el pico de memoria
+    funcion()
+    tiempos = []
+    while len(tiempos) < MAX_REPETICIONES and sum(tiempos) < TIEMPO_MINIMO:
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+
+    pico = None
+    if memoria:
+        tracemalloc.start()
+        try:
+            funcion()
+            pico = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return min(tiempos), statistics.median(tiempos), len(tiempos), pico
+
+
+def _por_categoria(tabla):
+    """Lista de (categoria, subtabla) preparada fuera de la medición"""
+    return list(tabla.por_categoria())
+
+
+def _resultados_combinados(subtablas):
+    resultados, dfs = zip(*(extract_results(subtabla, categoria) for categoria, subtabla in subtablas))
+    return list(resultados), pd.concat(dfs)
+
+
+def _caso_grafico(visualizar, subtablas):
+    import matplotlib.pyplot as plt
+
+    resultados, df_combinado = _resultados_combinados(subtablas)
+
+    def ejecutar():
+        figura = visualizar(resultados, df_combinado)
+        figura.canvas.draw()
+        plt.close(figura)
+    return ejecutar
+
+
+def casos():
+    """
+    Casos de benchmark: (nombre, preparar, tamaño máximo, por categoría).
+    `preparar` recibe la tabla sintética y devuelve la función sin
+    argumentos que se mide; los casos por categoría se miden con cada
+    número de categorías.
+    """
+    scripts = {}
+
+    def script(ruta):
+        if ruta not in scripts:
+            scripts[ruta] = cargar_funciones(os.path.join(RAIZ, ruta))
+        return scripts[ruta]
+
+    def diferencia_grupos(tabla):
+        funcion = script('homa.py')['calcular_diferencia_grupos_estadisticas']
+        estudios = tabla.a_diccionarios()
+        return lambda: funcion(estudios)
+
+    def extraer(tabla):
+        subtablas = _por_categoria(tabla)
+        return lambda: _resultados_combinados(subtablas)
+
+    def mejorado(tabla):
+        return _caso_grafico(script('Hedges/codigo.py')['visualizar_forest_plot_mejorado'], _por_categoria(tabla))
+
+    def muchos_analisis(tabla):
+        # Los estudios se reparten en meta-análisis de ESTUDIOS_POR_ANALISIS; los
+        # cuantiles t de los intervalos salen de la tabla precalculada
+        por_estudio = columnas_hedges(**tabla.columnas())
+        m = len(tabla) // ESTUDIOS_POR_ANALISIS * ESTUDIOS_POR_ANALISIS
+        efectos = por_estudio['g_hedges'][:m].reshape(-1, ESTUDIOS_POR_ANALISIS)
+        varianzas = (por_estudio['se_g_hedges'][:m]**2).reshape(-1, ESTUDIOS_POR_ANALISIS)
+        return lambda: combinar_efectos_aleatorios(efectos, varianzas, intervalo='hksj', prediccion=True)
+
+    def combinado(tabla):
+        return _caso_grafico(script('Hedges/combined_forest_plot.py')['visualizar_forest_plot_combinado'],
+                             _por_categoria(tabla))
+
+    return [
+        ('calcular_tamano_efecto', lambda tabla: lambda: calcular_tamano_efecto(tabla), None, False),
+        ('calcular_diferencia_grupos_estadisticas', diferencia_grupos, MAXIMO_BUCLE, False),
+        ('extract_results', extraer, None, True),
+        ('combinar_efectos_aleatorios_hksj', muchos_analisis, None, False),
+        ('visualizar_forest_plot_mejorado', mejorado, MAXIMO_GRAFICO, True),
+        ('visualizar_forest_plot_combinado', combinado, MAXIMO_GRAFICO, True),
+    ]
+
+
+def ejecutar_benchmarks(tamanos=TAMANOS, categorias=CATEGORIAS, seleccion=None, memoria=True, informar=print):
+    """
+    Mide cada caso para cada combinación de número de estudios y de
+    categorías (las categorías solo se combinan con los casos que trabajan
+    por categoría; las combinaciones con más categorías que estudios se omiten).
+
+    Parámetros:
+    tamanos: Números de estudios
+    categorias: Números de categorías de resultado
+    seleccion: Nombres de los casos que se ejecutan (todos si se omite)
+    memoria: Si se mide también el pico de memoria
+    informar: Función que recibe una línea por medición (None para silenciar)
+
+    Retorna:
+    list: un diccionario por medición con 'caso', 'num_estudios',
+          'num_categorias', 'tiempo' (mejor, s), 'tiempo_mediano',
+          'repeticiones', 'estudios_por_segundo' y 'memoria_pico' (bytes)
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+
+    mediciones = []
+    for nombre, preparar, maximo, por_categoria in casos():
+        if seleccion is not None and nombre not in seleccion:
+            continue
+        for num_estudios in tamanos:
+            if maximo is not None and num_estudios > maximo:
+                continue
+            for num_categorias in (categorias if por_categoria else (1,)):
+                if num_categorias > num_estudios:
+                    continue
+                funcion = preparar(generar_estudios(num_estudios, num_categorias))
+                tiempo, mediano, repeticiones, pico = _medir(funcion, memoria)
+                medicion = {
+                    'caso': nombre,
+                    'num_estudios': num_estudios,
+                    'num_categorias': num_categorias,
+                    'tiempo': tiempo,
+                    'tiempo_mediano': mediano,
+                    'repeticiones': repeticiones,
+                    'estudios_por_segundo': num_estudios / tiempo if tiempo > 0 else np.inf,
+                    'memoria_pico': pico
+                }
+                mediciones.append(medicion)
+                if informar is not None:
+                    texto_memoria = f"{pico / 2**20:9.2f} MB" if pico is not None else ""
+                    informar(f"{nombre:<42} {num_estudios:>9} estudios {num_categorias:>4} cat. "
+                             f"{tiempo * 1000:>11.3f} ms {medicion['estudios_por_segundo']:>14.0f} est/s {texto_memoria}")
+    return mediciones
+
+
+def medir_arranque(arranques=ARRANQUES, repeticiones=REPETICIONES_ARRANQUE, informar=print):
+    """
+    Tiempo de arranque de un intérprete nuevo que ejecuta cada fragmento de
+    `arranques` (mejor de `repeticiones`), y si cargó pandas o matplotlib.
+
+    Retorna:
+    list: mediciones con el mismo formato que `ejecutar_benchmarks`
+          (caso 'arranque:<nombre>', sin estudios)
+    """
+    mediciones = []
+    for nombre, codigo in arranques:
+        programa = (f"{codigo}\nimport sys\n"
+                    "print(int('pandas' in sys.modules), int('matplotlib' in sys.modules))")
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            salida = subprocess.run([sys.executable, "-c", programa], cwd=RAIZ, check=True,
+                                    capture_output=True, text=True).stdout
+            tiempos.append(time.perf_counter() - inicio)
+        pandas_cargado, matplotlib_cargado = (bool(int(valor)) for valor in salida.split()[-2:])
+        medicion = {
+            'caso': f"arranque:{nombre}",
+            'num_estudios': 0,
+            'num_categorias': 0,
+            'tiempo': min(tiempos),
+            'tiempo_mediano': statistics.median(tiempos),
+            'repeticiones': repeticiones,
+            'estudios_por_segundo': None,
+            'memoria_pico': None,
+            'carga_pandas': pandas_cargado,
+            'carga_matplotlib': matplotlib_cargado
+        }
+        mediciones.append(medicion)
+        if informar is not None:
+            cargados = [modulo for modulo, cargado in (('pandas', pandas_cargado),
+                                                      ('matplotlib', matplotlib_cargado)) if cargado]
+            informar(f"{medicion['caso']:<42} {medicion['tiempo'] * 1000:>11.1f} ms  "
+                     f"{'carga ' + ', '.join(cargados) if cargados else 'sin pandas ni matplotlib'}")
+    return mediciones
+
+
+def entorno():
+    """Versiones con las que se midió, guardadas junto a la línea base"""
+    import matplotlib
+
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'matplotlib': matplotlib.__version__,
+        'plataforma': platform.platform(),
+        'procesador': platform.processor() or platform.machine()
+    }
+
+
+def guardar_linea_base(mediciones, ruta):
+    """Guarda las mediciones como línea base JSON"""
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump({'version': VERSION_BENCHMARK, 'entorno': entorno(), 'mediciones': mediciones},
+                  archivo, indent=2, ensure_ascii=False)
+
+
+def cargar_linea_base(ruta):
+    with open(ruta, encoding='utf-8') as archivo:
+        linea_base = json.load(archivo)
+    if linea_base.get('version') != VERSION_BENCHMARK:
+        raise ValueError(f"Línea base de otra versión del benchmark: {linea_base.get('version')}")
+    return linea_base
+
+
+def comparar(mediciones, linea_base, tolerancia=0.25):
+    """
+    Compara las mediciones con una línea base (dict de `cargar_linea_base`).
+    Hay regresión si el mejor tiempo o el pico de memoria superan los de la
+    línea base en más de `tolerancia` (fracción).
+
+    Retorna:
+    DataFrame: una fila por medición presente en ambas con las razones
+               actual / base y la columna booleana 'regresion'
+    """
+    claves = ('caso', 'num_estudios', 'num_categorias')
+    base = {tuple(medicion[clave] for clave in claves): medicion for medicion in linea_base['mediciones']}
+    filas = []
+    for medicion in mediciones:
+        anterior = base.get(tuple(medicion[clave] for clave in claves))
+        if anterior is None:
+            continue
+        razon_tiempo = medicion['tiempo'] / anterior['tiempo']
+        if medicion['memoria_pico'] and anterior['memoria_pico']:
+            razon_memoria = medicion['memoria_pico'] / anterior['memoria_pico']
+        else:
+            razon_memoria = np.nan
+        filas.append({
+            **{clave: medicion[clave] for clave in claves},
+            'tiempo_base': anterior['tiempo'],
+            'tiempo': medicion['tiempo'],
+            'razon_tiempo': razon_tiempo,
+            'razon_memoria': razon_memoria,
+            'regresion': bool(razon_tiempo > 1 + tolerancia or razon_memoria > 1 + tolerancia)
+        })
+    return pd.DataFrame(filas, columns=list(claves) + ['tiempo_base', 'tiempo', 'razon_tiempo',
+                                                       'razon_memoria', 'regresion'])
@@ -0,0 +1,261 @@
+import numpy as np
+
+from metaanalisis.efecto import Z_95
+from metaanalisis.lectura import leer_resultado
+from metaanalisis.perezoso import pandas as pd
+
+# Medidas de efecto disponibles para resultados binarios
+MEDIDAS_BINARIAS = ('RR', 'OR', 'RD')
+
+# Equivalencias entre el CSV de eventos de obj3/objetivo3 y el esquema canónico
+COLUMNAS_EVENTOS = {
+    'Study': 'nombre',
+    'Intervention_Events': 'eventos_intervencion',
+    'Intervention_Total': 'n_intervencion',
+    'Control_Events': 'eventos_control',
+    'Control_Total': 'n_control',
+}
+
+
+def _tablas_2x2(eventos_intervencion, n_intervencion, eventos_control, n_control):
+    """
+    Devuelve las celdas (a, b, c, d) como matrices 2D, con la máscara de
+    estudios presentes (las posiciones de relleno son NaN).
+    """
+    a = np.atleast_2d(np.asarray(eventos_intervencion, dtype=float))
+    n1 = np.atleast_2d(np.asarray(n_intervencion, dtype=float))
+    c = np.atleast_2d(np.asarray(eventos_control, dtype=float))
+    n2 = np.atleast_2d(np.asarray(n_control, dtype=float))
+    mascara = np.isfinite(a) & np.isfinite(n1) & np.isfinite(c) & np.isfinite(n2)
+    a, n1, c, n2 = (np.where(mascara, x, 0.0) for x in (a, n1, c, n2))
+    return a, n1 - a, c, n2 - c, mascara
+
+
+def efectos_binarios(eventos_intervencion, n_intervencion, eventos_control, n_control,
+                     medida='RR', correccion=0.5):
+    """
+    Calcula el efecto por estudio (log RR, log OR o RD) y su varianza de
+    forma vectorizada sobre estudios y resultados.
+
+    A los estudios con alguna celda en cero se les suma `correccion` a las
+    cuatro celdas (solo para RR y OR). Los estudios sin eventos o con todos
+    los participantes con evento en ambos grupos no aportan información sobre
+    RR/OR y se devuelven como NaN, igual que `metabin` en R.
+
+    Parámetros:
+    eventos_intervencion, n_intervencion: Eventos y total del grupo intervención
+    eventos_control, n_control: Eventos y total del grupo control
+    medida: 'RR', 'OR' o 'RD'
+    correccion: Corrección de continuidad para celdas en cero
+
+    Retorna:
+    tupla: (efectos, varianzas) con la forma de la entrada
+    """
+    if medida not in MEDIDAS_BINARIAS:
+        raise ValueError(f"Medida desconocida: {medida} (use {', '.join(MEDIDAS_BINARIAS)})")
+
+    es_vector = np.ndim(eventos_intervencion) == 1
+    a, b, c, d, mascara = _tablas_2x2(eventos_intervencion, n_intervencion, eventos_control, n_control)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if medida == 'RD':
+            n1, n2 = a + b, c + d
+            p1, p2 = a / n1, c / n2
+            efectos = p1 - p2
+            varianzas = p1 * (1 - p1) / n1 + p2 * (1 - p2) / n2
+        else:
+            sin_informacion = ((a == 0) & (c == 0)) | ((b == 0) & (d == 0))
+            celda_cero = (a == 0) | (b == 0) | (c == 0) | (d == 0)
+            incremento = np.where(celda_cero, correccion, 0.0)
+            a, b, c, d = a + incremento, b + incremento, c + incremento, d + incremento
+            if medida == 'RR':
+                efectos = np.log((a / (a + b)) / (c / (c + d)))
+                varianzas = 1 / a - 1 / (a + b) + 1 / c - 1 / (c + d)
+            else:
+                efectos = np.log((a * d) / (b * c))
+                varianzas = 1 / a + 1 / b + 1 / c + 1 / d
+            mascara = mascara & ~sin_informacion
+
+    efectos = np.where(mascara, efectos, np.nan)
+    varianzas = np.where(mascara, varianzas, np.nan)
+    if es_vector:
+        return efectos[0], varianzas[0]
+    return efectos, varianzas
+
+
+def combinar_mantel_haenszel(eventos_intervencion, n_intervencion, eventos_control, n_control, medida='RR'):
+    """
+    Estimador combinado de Mantel–Haenszel para RR, OR o RD, vectorizado
+    sobre resultados (filas) y estudios (columnas).
+
+    Se usan los conteos sin corrección de continuidad. Las varianzas son las de
+    Greenland–Robins (RR, RD) y Robins–Breslow–Greenland (OR).
+
+    Retorna:
+    tupla: (efecto, varianza) en escala logarítmica para RR/OR; escalares si
+           la entrada es un vector
+    """
+    if medida not in MEDIDAS_BINARIAS:
+        raise ValueError(f"Medida desconocida: {medida} (use {', '.join(MEDIDAS_BINARIAS)})")
+
+    es_vector = np.ndim(eventos_intervencion) == 1
+    a, b, c, d, mascara = _tablas_2x2(eventos_intervencion, n_intervencion, eventos_control, n_control)
+    n1, n2 = a + b, c + d
+    N = np.where(mascara, n1 + n2, 1.0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if medida == 'RR':
+            R = a * n2 / N
+            S = c * n1 / N
+            efecto = np.log(R.sum(axis=1) / S.sum(axis=1))
+            varianza = ((n1 * n2 * (a + c) - a * c * N) / N**2).sum(axis=1) / (R.sum(axis=1) * S.sum(axis=1))
+        elif medida == 'OR':
+            R = a * d / N
+            S = b * c / N
+            P = (a + d) / N
+            Q = (b + c) / N
+            suma_R, suma_S = R.sum(axis=1), S.sum(axis=1)
+            efecto = np.log(suma_R / suma_S)
+            varianza = ((P * R).sum(axis=1) / (2 * suma_R**2)
+                        + (P * S + Q * R).sum(axis=1) / (2 * suma_R * suma_S)
+                        + (Q * S).sum(axis=1) / (2 * suma_S**2))
+        else:
+            pesos = np.where(mascara, n1 * n2 / N, 0.0)
+            suma_pesos = pesos.sum(axis=1)
+            efecto = ((a * n2 - c * n1) / N).sum(axis=1) / suma_pesos
+            n1_seguro = np.where(mascara, n1, 1.0)
+            n2_seguro = np.where(mascara, n2, 1.0)
+            varianza = ((a * b * n2**3 + c * d * n1**3) / (n1_seguro * n2_seguro * N**2)).sum(axis=1) / suma_pesos**2
+
+    if es_vector:
+        return efecto[0].item(), varianza[0].item()
+    return efecto, varianza
+
+
+def efectos_peto(eventos_intervencion, n_intervencion, eventos_control, n_control):
+    """
+    Log odds ratio de Peto por estudio: (O - E) / V con varianza 1 / V.
+
+    Retorna:
+    tupla: (efectos, varianzas, O_menos_E, V)
+    """
+    es_vector = np.ndim(eventos_intervencion) == 1
+    a, b, c, d, mascara = _tablas_2x2(eventos_intervencion, n_intervencion, eventos_control, n_control)
+    n1, n2 = a + b, c + d
+    N = n1 + n2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        O_menos_E = np.where(mascara, a - n1 * (a + c) / N, 0.0)
+        V = np.where(mascara, n1 * n2 * (a + c) * (b + d) / (N**2 * (N - 1)), 0.0)
+        efectos = np.where(mascara & (V > 0), O_menos_E / V, np.nan)
+        varianzas = np.where(mascara & (V > 0), 1 / V, np.nan)
+    if es_vector:
+        return efectos[0], varianzas[0], O_menos_E[0], V[0]
+    return efectos, varianzas, O_menos_E, V
+
+
+def combinar_peto(eventos_intervencion, n_intervencion, eventos_control, n_control):
+    """
+    Odds ratio combinado de Peto: ΣO-E / ΣV con varianza 1 / ΣV.
+
+    Retorna:
+    tupla: (log OR combinado, varianza)
+    """
+    es_vector = np.ndim(eventos_intervencion) == 1
+    _, _, O_menos_E, V = efectos_peto(np.atleast_2d(eventos_intervencion), np.atleast_2d(n_intervencion),
+                                      np.atleast_2d(eventos_control), np.atleast_2d(n_control))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        efecto = O_menos_E.sum(axis=1) / V.sum(axis=1)
+        varianza = 1 / V.sum(axis=1)
+    if es_vector:
+        return efecto[0].item(), varianza[0].item()
+    return efecto, varianza
+
+
+def leer_csv_eventos(ruta):
+    """
+    Lee un CSV de eventos con el esquema de obj3/objetivo3
+    (Study, Intervention_Events, Intervention_Total, Control_Events,
+    Control_Total, ...) o de obj2/objetivo2 y lo devuelve con los nombres
+    canónicos (ver `leer_resultado`).
+    """
+    df, _, tipo = leer_resultado(ruta)
+    if tipo != 'binario':
+        raise ValueError(f"Faltan columnas de eventos: {', '.join(COLUMNAS_EVENTOS.values())}")
+    return df
+
+
+def analizar_binario(df_eventos, medida='RR', metodo='MH', correccion=0.5, z=Z_95):
+    """
+    Meta-análisis de efectos fijos de un resultado binario.
+
+    Parámetros:
+    df_eventos: DataFrame con 'nombre', 'eventos_intervencion', 'n_intervencion',
+                'eventos_control' y 'n_control' (ver `leer_csv_eventos`)
+    medida: 'RR', 'OR' o 'RD' (con metodo='Peto' siempre es OR)
+    metodo: 'MH' (Mantel–Haenszel), 'Peto' o 'IV' (inverso de la varianza)
+    correccion: Corrección de continuidad para los efectos por estudio
+    z: Valor crítico para el intervalo de confianza
+
+    Retorna:
+    tupla: (resultados, df_estudios); los efectos de RR/OR van en escala
+           logarítmica y se añaden las columnas exponenciadas
+    """
+    if metodo == 'Peto':
+        medida = 'OR'
+    columnas = [df_eventos[columna].to_numpy(dtype=float)
+                for columna in ('eventos_intervencion', 'n_intervencion', 'eventos_control', 'n_control')]
+
+    if metodo == 'Peto':
+        efectos, varianzas, _, _ = efectos_peto(*columnas)
+        efecto, varianza = combinar_peto(*columnas)
+    else:
+        efectos, varianzas = efectos_binarios(*columnas, medida=medida, correccion=correccion)
+        if metodo == 'MH':
+            efecto, varianza = combinar_mantel_haenszel(*columnas, medida=medida)
+        elif metodo == 'IV':
+            validos = np.isfinite(efectos)
+            pesos_iv = 1 / varianzas[validos]
+            efecto = np.dot(pesos_iv, efectos[validos]) / pesos_iv.sum()
+            varianza = 1 / pesos_iv.sum()
+        else:
+            raise ValueError(f"Método desconocido: {metodo} (use 'MH', 'Peto' o 'IV')")
+
+    pesos = 1 / varianzas
+    se = np.sqrt(varianzas)
+    df_estudios = pd.DataFrame({
+        'nombre': df_eventos['nombre'].to_numpy(),
+        'eventos_intervencion': columnas[0],
+        'n_intervencion': columnas[1],
+        'eventos_control': columnas[2],
+        'n_control': columnas[3],
+        'efecto': efectos,
+        'se_efecto': se,
+        'IC_95_inferior': efectos - z * se,
+        'IC_95_superior': efectos + z * se,
+        'peso': pesos
+    })
+
+    # Heterogeneidad con pesos del inverso de la varianza alrededor del efecto combinado
+    validos = np.isfinite(efectos)
+    Q = np.dot(pesos[validos], (efectos[validos] - efecto)**2)
+    grados_libertad = int(validos.sum()) - 1
+    I_cuadrado = max(0, (Q - grados_libertad) / Q * 100) if grados_libertad > 0 and Q > 0 else 0
+
+    se_combinado = np.sqrt(varianza)
+    resultados = {
+        'medida': medida,
+        'metodo': metodo,
+        'efecto_combinado': efecto,
+        'se_combinado': se_combinado,
+        'IC_95_combinado': (efecto - z * se_combinado, efecto + z * se_combinado),
+        'Q': Q,
+        'df': grados_libertad,
+        'I_cuadrado': I_cuadrado,
+        'num_estudios': len(df_estudios)
+    }
+    if medida != 'RD':
+        df_estudios[medida] = np.exp(df_estudios['efecto'])
+        resultados[medida] = np.exp(efecto)
+        resultados[f'IC_95_{medida}'] = tuple(np.exp(resultados['IC_95_combinado']))
+
+    return resultados, df_estudios
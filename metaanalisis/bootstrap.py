@@ -0,0 +1,149 @@
+import numpy as np
+
+from metaanalisis.aleatorios import combinar_efectos_aleatorios
+from metaanalisis.efecto import _columnas_de_estudios, columnas_hedges, combinar_efecto_fijo
+
+# Réplicas generadas con cada flujo aleatorio independiente. Los bloques de
+# ejecución son múltiplos de este tamaño, así que el resultado con una misma
+# semilla no depende del presupuesto de memoria
+REPLICAS_POR_FLUJO = 1024
+
+# Presupuesto de memoria por defecto para cada bloque de réplicas (bytes)
+MEMORIA_MAXIMA = 64 * 2**20
+
+# Arrays float64 de forma (réplicas × estudios) vivos a la vez al recalcular g
+_ARRAYS_POR_ESTUDIO = 24
+
+MODOS_BOOTSTRAP = ('resumen', 'pacientes')
+
+
+def _simular_resumen(rng, datos, b):
+    """
+    Remuestrea las estadísticas resumidas de cada grupo: la media muestral
+    sigue N(μ, σ²/n) y la varianza σ²·χ²(n-1)/(n-1), independientes entre sí
+    para datos normales.
+    """
+    simulados = {}
+    for grupo in ('control', 'intervencion'):
+        n = datos[f'n_{grupo}'].astype(float)
+        media = datos[f'media_{grupo}'].astype(float)
+        de = datos[f'de_{grupo}'].astype(float)
+        simulados[f'media_{grupo}'] = rng.normal(media, de / np.sqrt(n), size=(b, len(n)))
+        simulados[f'de_{grupo}'] = de * np.sqrt(rng.chisquare(n - 1, size=(b, len(n))) / (n - 1))
+    return simulados
+
+
+def _simular_pacientes(rng, datos, b):
+    """
+    Simula los datos de cada paciente (normales con la media y desviación
+    de su grupo) y recalcula las estadísticas resumidas. Todos los grupos
+    van en un solo array (réplicas × pacientes) reducido con `reduceat`.
+    """
+    simulados = {}
+    for grupo in ('control', 'intervencion'):
+        n = datos[f'n_{grupo}'].astype(int)
+        inicios = np.r_[0, np.cumsum(n)[:-1]]
+        media = np.repeat(datos[f'media_{grupo}'].astype(float), n)
+        de = np.repeat(datos[f'de_{grupo}'].astype(float), n)
+        pacientes = rng.normal(media, de, size=(b, n.sum()))
+        medias = np.add.reduceat(pacientes, inicios, axis=1) / n
+        desvios = pacientes - np.repeat(medias, n, axis=1)
+        simulados[f'media_{grupo}'] = medias
+        simulados[f'de_{grupo}'] = np.sqrt(np.add.reduceat(desvios**2, inicios, axis=1) / (n - 1))
+    return simulados
+
+
+def _combinar_replicas(g, se, modelo, metodo):
+    """Efecto combinado de cada réplica (filas) con el modelo indicado"""
+    if modelo == 'aleatorio':
+        return combinar_efectos_aleatorios(g, se**2, metodo)['efecto_combinado']
+    pesos = 1 / se**2
+    return (pesos * g).sum(axis=1) / pesos.sum(axis=1)
+
+
+def bootstrap_hedges(estudios, B=10_000, modelo='fijo', metodo='REML', nivel=0.95, semilla=None,
+                     modo='resumen', memoria_maxima=MEMORIA_MAXIMA, devolver_replicas=False):
+    """
+    Bootstrap paramétrico del g de Hedges combinado.
+
+    Genera B réplicas de todos los estudios a la vez como arrays (B × k),
+    recalcula g, sus pesos y el efecto combinado por difusión (broadcasting)
+    y devuelve el intervalo de percentiles. Las réplicas se procesan en
+    bloques que caben en `memoria_maxima`, y cada bloque de
+    REPLICAS_POR_FLUJO réplicas usa su propio flujo derivado de `semilla`,
+    por lo que el resultado es reproducible y no depende del tamaño de bloque.
+
+    El remuestreo es condicional a los estudios observados (solo variabilidad
+    intra-estudio); con modelo='aleatorio' tau² se vuelve a estimar en cada
+    réplica, pero los efectos verdaderos de los estudios no se redibujan.
+
+    Parámetros:
+    estudios: Lista de diccionarios de estudios o TablaEstudios
+    B: Número de réplicas
+    modelo: 'fijo' o 'aleatorio'
+    metodo: Estimador de tau² para el modelo de efectos aleatorios
+    nivel: Nivel de confianza del intervalo
+    semilla: Semilla (entero o SeedSequence) para reproducir el resultado
+    modo: 'resumen' (remuestrea medias y varianzas) o 'pacientes' (simula
+          cada paciente; más lento, útil para comprobar el primero)
+    memoria_maxima: Bytes aproximados por bloque de réplicas
+    devolver_replicas: Si es True se incluye el array de los B efectos
+
+    Retorna:
+    dict: 'efecto_combinado' (datos originales), 'se_bootstrap',
+          'IC_bootstrap_inf', 'IC_bootstrap_sup', 'sesgo', 'B', 'nivel' y,
+          opcionalmente, 'replicas'
+    """
+    if modo not in MODOS_BOOTSTRAP:
+        raise ValueError(f"Modo desconocido: {modo} (use {', '.join(MODOS_BOOTSTRAP)})")
+    if modelo not in ('fijo', 'aleatorio'):
+        raise ValueError(f"Modelo desconocido: {modelo} (use 'fijo' o 'aleatorio')")
+
+    datos = {clave: np.asarray(valor) for clave, valor in _columnas_de_estudios(estudios).items()}
+    simular = _simular_pacientes if modo == 'pacientes' else _simular_resumen
+
+    originales = columnas_hedges(**datos)
+    if modelo == 'aleatorio':
+        efecto_original = combinar_efectos_aleatorios(originales['g_hedges'], originales['se_g_hedges']**2,
+                                                      metodo)['efecto_combinado']
+    else:
+        efecto_original = combinar_efecto_fijo(originales['g_hedges'], originales['peso'])['efecto_combinado']
+
+    # Réplicas por bloque según la memoria que ocupa una réplica
+    k = len(datos['n_control'])
+    bytes_replica = 8 * _ARRAYS_POR_ESTUDIO * k
+    if modo == 'pacientes':
+        bytes_replica += 8 * 3 * int(datos['n_control'].sum() + datos['n_intervencion'].sum())
+    flujos_por_bloque = max(1, memoria_maxima // (bytes_replica * REPLICAS_POR_FLUJO))
+
+    num_flujos = -(-B // REPLICAS_POR_FLUJO)
+    flujos = np.random.SeedSequence(semilla).spawn(num_flujos)
+    replicas = np.empty(B)
+
+    for primero in range(0, num_flujos, flujos_por_bloque):
+        simulados = {clave: [] for clave in ('media_control', 'de_control', 'media_intervencion', 'de_intervencion')}
+        for indice in range(primero, min(primero + flujos_por_bloque, num_flujos)):
+            b = min(REPLICAS_POR_FLUJO, B - indice * REPLICAS_POR_FLUJO)
+            for clave, valor in simular(np.random.default_rng(flujos[indice]), datos, b).items():
+                simulados[clave].append(valor)
+        simulados = {clave: np.concatenate(valor) for clave, valor in simulados.items()}
+
+        columnas = columnas_hedges(datos['n_control'], datos['n_intervencion'], **simulados)
+        inicio = primero * REPLICAS_POR_FLUJO
+        efectos = _combinar_replicas(columnas['g_hedges'], columnas['se_g_hedges'], modelo, metodo)
+        replicas[inicio:inicio + len(efectos)] = efectos
+
+    alfa = (1 - nivel) / 2
+    inferior, superior = np.quantile(replicas, [alfa, 1 - alfa])
+    resultados = {
+        'efecto_combinado': efecto_original,
+        'se_bootstrap': replicas.std(ddof=1),
+        'IC_bootstrap_inf': inferior,
+        'IC_bootstrap_sup': superior,
+        'sesgo': replicas.mean() - efecto_original,
+        'B': B,
+        'nivel': nivel
+    }
+    if devolver_replicas:
+        resultados['replicas'] = replicas
+    return resultados
@@ -0,0 +1,228 @@
+import hashlib
+import importlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+
+import numpy as np
+
+from metaanalisis.efecto import CLAVES_ESTUDIO
+from metaanalisis.perezoso import es_dataframe
+from metaanalisis.tabla import TablaEstudios
+
+# Se incrementa cuando cambia el cálculo o el formato de las entradas para
+# invalidar todo lo guardado con versiones anteriores
+VERSION_CACHE = 1
+
+# Tamaño máximo por defecto de la caché en disco (bytes)
+TAMANO_MAXIMO = 512 * 2**20
+
+ARCHIVO_RESULTADOS = 'resultados.pkl'
+
+
+def _bytes_estudios(datos):
+    """
+    Representación canónica en bytes de los estudios: los mismos datos dan
+    los mismos bytes aunque lleguen como lista de diccionarios, TablaEstudios
+    o DataFrame con las columnas en otro orden.
+    """
+    if isinstance(datos, TablaEstudios):
+        partes = [json.dumps([list(datos.categorias), datos.nombres.tolist()]).encode()]
+        partes.append(datos.codigos.tobytes())
+        partes.extend(getattr(datos, clave).tobytes() for clave in CLAVES_ESTUDIO)
+        return b"\0".join(partes)
+    if es_dataframe(datos):
+        return datos[sorted(datos.columns)].to_csv(index=False, float_format='%.17g').encode()
+    if isinstance(datos, dict):
+        return b"\0".join(json.dumps(str(clave)).encode() + b"\0" + _bytes_estudios(valor)
+                          for clave, valor in datos.items())
+    if isinstance(datos, (list, tuple)) and all(isinstance(estudio, dict) for estudio in datos):
+        return _bytes_estudios(TablaEstudios.desde_diccionarios(datos))
+    return np.asarray(datos).tobytes()
+
+
+def clave_cache(datos, **opciones):
+    """
+    Clave de contenido (SHA-256) de un análisis: estudios normalizados más
+    las opciones que afectan al resultado (medida, modelo, nivel del IC,
+    estilo del gráfico, dpi...).
+
+    Parámetros:
+    datos: TablaEstudios, DataFrame, lista de diccionarios de estudios o un
+           diccionario categoría -> cualquiera de los anteriores
+    opciones: Parámetros del análisis; deben ser serializables como JSON
+              (los valores no serializables se convierten con str)
+
+    Retorna:
+    str: resumen hexadecimal de 64 caracteres
+    """
+    resumen = hashlib.sha256()
+    resumen.update(f"v{VERSION_CACHE}\0".encode())
+    resumen.update(_bytes_estudios(datos))
+    resumen.update(b"\0")
+    resumen.update(json.dumps(opciones, sort_keys=True, default=str).encode())
+    return resumen.hexdigest()
+
+
+def huella_codigo(*fuentes):
+    """
+    SHA-256 del código fuente que produce un resultado, para incluirlo en
+    `clave_cache(..., codigo=huella_codigo(...))`: cualquier cambio en esos
+    archivos invalida las entradas sin tener que subir VERSION_CACHE.
+
+    Parámetros:
+    fuentes: Rutas de archivos o nombres de módulos ('metaanalisis.graficos')
+
+    Retorna:
+    str: resumen hexadecimal de 64 caracteres
+    """
+    resumen = hashlib.sha256()
+    for fuente in fuentes:
+        ruta = fuente if os.path.exists(fuente) else importlib.import_module(fuente).__file__
+        resumen.update(os.path.basename(ruta).encode() + b"\0")
+        with open(ruta, 'rb') as archivo:
+            resumen.update(archivo.read())
+        resumen.update(b"\0")
+    return resumen.hexdigest()
+
+
+class CacheResultados:
+    """
+    Caché en disco de resultados combinados y figuras, direccionada por
+    contenido con `clave_cache`.
+
+    Cada entrada es un directorio `<clave[:2]>/<clave>/` con los resultados
+    serializados y una copia de cada artefacto. Al leer una entrada se
+    actualiza su fecha de modificación, de modo que el desalojo elimina
+    primero las entradas usadas hace más tiempo (LRU) hasta que el total
+    cabe en `tamano_maximo`.
+
+    Las entradas se escriben en un directorio temporal y se mueven a su
+    sitio con un solo renombrado, así que varios procesos pueden compartir
+    la caché sin ver entradas a medio escribir.
+    """
+
+    def __init__(self, directorio, tamano_maximo=TAMANO_MAXIMO):
+        self.directorio = directorio
+        self.tamano_maximo = tamano_maximo
+        os.makedirs(directorio, exist_ok=True)
+
+    def __repr__(self):
+        return f"CacheResultados({self.directorio!r}, {len(self)} entradas)"
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, clave[:2], clave)
+
+    def _entradas(self):
+        """Lista (ultimo_uso, tamano, ruta) de todas las entradas completas"""
+        entradas = []
+        for prefijo in os.listdir(self.directorio):
+            ruta_prefijo = os.path.join(self.directorio, prefijo)
+            if len(prefijo) != 2 or not os.path.isdir(ruta_prefijo):
+                continue
+            for clave in os.listdir(ruta_prefijo):
+                ruta = os.path.join(ruta_prefijo, clave)
+                marcador = os.path.join(ruta, ARCHIVO_RESULTADOS)
+                try:
+                    ultimo_uso = os.stat(marcador).st_mtime
+                    tamano = sum(entrada.stat().st_size for entrada in os.scandir(ruta))
+                except OSError:
+                    continue
+                entradas.append((ultimo_uso, tamano, ruta))
+        return entradas
+
+    def __len__(self):
+        return len(self._entradas())
+
+    def __contains__(self, clave):
+        return os.path.exists(os.path.join(self._ruta(clave), ARCHIVO_RESULTADOS))
+
+    def tamano(self):
+        """Tamaño total en bytes de las entradas guardadas"""
+        return sum(tamano for _, tamano, _ in self._entradas())
+
+    def obtener(self, clave):
+        """
+        Devuelve (resultados, artefactos) si la clave está en la caché, donde
+        `artefactos` asocia el nombre de cada archivo a su copia en la caché;
+        None si no está.
+        """
+        ruta = self._ruta(clave)
+        marcador = os.path.join(ruta, ARCHIVO_RESULTADOS)
+        try:
+            with open(marcador, 'rb') as archivo:
+                resultados = pickle.load(archivo)
+            os.utime(marcador)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        artefactos = {nombre: os.path.join(ruta, nombre) for nombre in os.listdir(ruta)
+                      if nombre != ARCHIVO_RESULTADOS}
+        return resultados, artefactos
+
+    def guardar(self, clave, resultados, archivos=()):
+        """
+        Guarda los resultados (cualquier objeto serializable con pickle, como
+        diccionarios o DataFrames) y una copia de los `archivos` indicados.
+        """
+        ruta = self._ruta(clave)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        temporal = tempfile.mkdtemp(prefix=f".{clave[:8]}-", dir=os.path.dirname(ruta))
+        try:
+            for origen in archivos:
+                shutil.copy2(origen, os.path.join(temporal, os.path.basename(origen)))
+            with open(os.path.join(temporal, ARCHIVO_RESULTADOS), 'wb') as archivo:
+                pickle.dump(resultados, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporal, ruta)
+        except OSError:
+            # Otro proceso guardó la misma clave a la vez: su entrada es equivalente
+            if clave not in self:
+                raise
+        finally:
+            shutil.rmtree(temporal, ignore_errors=True)
+
+    def obtener_o_calcular(self, clave, calcular, archivos=()):
+        """
+        Devuelve los resultados de la caché y restaura los `archivos` en sus
+        rutas; si no están, llama a `calcular()` (que debe escribir esos
+        archivos) y guarda el resultado.
+
+        Retorna:
+        tupla: (resultados, acierto)
+        """
+        entrada = self.obtener(clave)
+        if entrada is not None:
+            resultados, artefactos = entrada
+            if all(os.path.basename(destino) in artefactos for destino in archivos):
+                for destino in archivos:
+                    shutil.copyfile(artefactos[os.path.basename(destino)], destino)
+                return resultados, True
+
+        resultados = calcular()
+        self.guardar(clave, resultados, archivos)
+        return resultados, False
+
+    def desalojar(self, tamano_maximo=None):
+        """
+        Elimina las entradas menos usadas recientemente hasta que el total no
+        supera `tamano_maximo` (por defecto el de la caché).
+
+        Retorna:
+        int: número de entradas eliminadas
+        """
+        tamano_maximo = self.tamano_maximo if tamano_maximo is None else tamano_maximo
+        entradas = sorted(self._entradas())
+        total = sum(tamano for _, tamano, _ in entradas)
+        eliminadas = 0
+        for _, tamano, ruta in entradas:
+            if total <= tamano_maximo:
+                break
+            shutil.rmtree(ruta, ignore_errors=True)
+            total -= tamano
+            eliminadas += 1
+        return eliminadas
+
+    def limpiar(self):
+        """Elimina todas las entradas"""
+        return self.desalojar(tamano_maximo=0)
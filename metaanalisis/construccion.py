@@ -0,0 +1,442 @@
+"""
+Construcción incremental de los artefactos de obj3 como un grafo de
+dependencias:
+
+    obj3/objetivo3/<resultado>.csv -> combinado/<resultado>.json -> forest_plot_<nombre>.pdf
+                                                                -> meta_analisis_resumen.csv
+                                                                -> resultados_meta_analisis_corregido.html
+
+    python -m metaanalisis construir [--salida construccion] [--procesos N] [--forzar]
+
+Cada nodo tiene una firma (SHA-256) con su función, el código fuente de su
+módulo y de los módulos de cálculo (MODULOS_CALCULO), sus argumentos, el
+contenido de sus archivos fuente y los resultados de los nodos de los que
+depende. Un nodo está al día si su firma coincide con la de la última
+construcción y sus salidas siguen en disco sin modificar; si no, se vuelve a
+ejecutar. Los nodos cuyas dependencias ya terminaron se ejecutan en paralelo
+en un pool de procesos.
+
+Como la firma depende del resultado de las dependencias y no de cuándo se
+ejecutaron, editar una fila de un CSV solo regenera su resultado combinado,
+sus forest plots, el resumen y el informe. Si un nodo se vuelve a ejecutar y
+su resultado no cambia, lo que depende de él sigue al día.
+"""
+
+import csv
+import hashlib
+import html
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from metaanalisis.aleatorios import METODOS_TAU2
+from metaanalisis.cache import huella_codigo
+from metaanalisis.resumen import RESULTADOS_OBJ3, combinar_csv, fila_resumen, heterogeneidad, resultados_obj3
+
+ARCHIVO_ESTADO = '.construccion.json'
+
+# Se incrementa cuando cambia el significado de las firmas para reconstruirlo todo
+VERSION_CONSTRUCCION = 2
+
+# Módulos cuyo código entra en la firma de todos los nodos, además del de la
+# función de cada nodo: corregir un cálculo o un gráfico invalida lo construido
+MODULOS_CALCULO = ('metaanalisis.resumen', 'metaanalisis.aleatorios', 'metaanalisis.binario',
+                   'metaanalisis.distribuciones', 'metaanalisis.graficos')
+
+# Medida de la tabla HTML para cada tipo de resultado
+MEDIDA_INFORME = {'continuo': 'MD', 'binario': 'OR'}
+
+
+def hash_archivo(ruta):
+    """SHA-256 del contenido de un archivo, o None si no existe"""
+    resumen = hashlib.sha256()
+    try:
+        with open(ruta, 'rb') as archivo:
+            for bloque in iter(lambda: archivo.read(2**20), b''):
+                resumen.update(bloque)
+    except FileNotFoundError:
+        return None
+    return resumen.hexdigest()
+
+
+def _json(valor):
+    """Convierte escalares y arrays de numpy al serializar como JSON"""
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, np.ndarray):
+        return valor.tolist()
+    raise TypeError(f"No serializable: {type(valor).__name__}")
+
+
+def _normalizar(resultado):
+    """Resultado tal como queda tras guardarlo y leerlo del estado"""
+    return json.loads(json.dumps(resultado, default=_json))
+
+
+def _escribir_atomico(ruta, texto):
+    """Escribe `texto` en un temporal y lo mueve a `ruta` con un solo renombrado"""
+    directorio = os.path.dirname(ruta) or "."
+    os.makedirs(directorio, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(suffix='.tmp', dir=directorio)
+    try:
+        with os.fdopen(descriptor, 'w', encoding='utf-8', newline='') as archivo:
+            archivo.write(texto)
+        os.replace(temporal, ruta)
+    except BaseException:
+        os.remove(temporal)
+        raise
+
+
+def _ejecutar_nodo(funcion, args, dependencias):
+    inicio = time.perf_counter()
+    resultado = funcion(*args, dependencias)
+    return _normalizar(resultado), time.perf_counter() - inicio
+
+
+class GrafoConstruccion:
+    """
+    Grafo de nodos de construcción con estado persistente en
+    `<directorio>/.construccion.json`.
+
+    Cada nodo es una función de nivel de módulo que se llama como
+    `funcion(*args, dependencias)`, donde `dependencias` es un diccionario
+    nombre -> resultado de los nodos de los que depende. La función escribe
+    sus `salidas` y devuelve un resultado serializable como JSON, que se
+    guarda en el estado para los nodos siguientes.
+    """
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        self.nodos = {}
+        self._huellas = {}
+
+    def __repr__(self):
+        return f"GrafoConstruccion({self.directorio!r}, {len(self.nodos)} nodos)"
+
+    def nodo(self, nombre, funcion, args=(), fuentes=(), dependencias=(), salidas=()):
+        """
+        Añade un nodo.
+
+        Parámetros:
+        nombre: Identificador único del nodo
+        funcion: Función de nivel de módulo (se ejecuta en otro proceso)
+        args: Argumentos serializables de la función (forman parte de la firma)
+        fuentes: Archivos de entrada cuyo contenido forma parte de la firma
+        dependencias: Nombres de los nodos cuyos resultados necesita
+        salidas: Archivos que escribe
+
+        Retorna:
+        str: el nombre, para usarlo como dependencia
+        """
+        if nombre in self.nodos:
+            raise ValueError(f"Nodo repetido: {nombre}")
+        self.nodos[nombre] = {'funcion': funcion, 'args': tuple(args), 'fuentes': tuple(fuentes),
+                              'dependencias': tuple(dependencias), 'salidas': tuple(salidas)}
+        return nombre
+
+    def orden(self):
+        """Nombres de los nodos en orden topológico; error si hay ciclos o dependencias desconocidas"""
+        orden, estado = [], {}
+
+        def visitar(nombre, camino):
+            if estado.get(nombre) == 'hecho':
+                return
+            if estado.get(nombre) == 'visitando':
+                raise ValueError(f"Ciclo de dependencias: {' -> '.join(camino + [nombre])}")
+            if nombre not in self.nodos:
+                raise ValueError(f"Dependencia desconocida: {nombre} (en {camino[-1]})")
+            estado[nombre] = 'visitando'
+            for dependencia in self.nodos[nombre]['dependencias']:
+                visitar(dependencia, camino + [nombre])
+            estado[nombre] = 'hecho'
+            orden.append(nombre)
+
+        for nombre in self.nodos:
+            visitar(nombre, [])
+        return orden
+
+    def _ruta_estado(self):
+        return os.path.join(self.directorio, ARCHIVO_ESTADO)
+
+    def _leer_estado(self):
+        try:
+            with open(self._ruta_estado(), encoding='utf-8') as archivo:
+                estado = json.load(archivo)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        return estado.get('nodos', {}) if estado.get('version') == VERSION_CONSTRUCCION else {}
+
+    def _guardar_estado(self, nodos):
+        _escribir_atomico(self._ruta_estado(),
+                          json.dumps({'version': VERSION_CONSTRUCCION, 'nodos': nodos}, indent=1,
+                                     ensure_ascii=False, default=_json))
+
+    def _huella(self, modulo):
+        """Huella del código de `modulo` y de MODULOS_CALCULO (una vez por construcción)"""
+        if modulo not in self._huellas:
+            self._huellas[modulo] = huella_codigo(modulo, *MODULOS_CALCULO)
+        return self._huellas[modulo]
+
+    def firma(self, nombre, resultados):
+        """Firma de un nodo a partir de sus entradas y de los resultados de sus dependencias"""
+        nodo = self.nodos[nombre]
+        funcion = nodo['funcion']
+        resumen = hashlib.sha256()
+        resumen.update(json.dumps({
+            'version': VERSION_CONSTRUCCION,
+            'nombre': nombre,
+            'funcion': f"{funcion.__module__}.{funcion.__qualname__}",
+            'codigo': self._huella(funcion.__module__),
+            'args': nodo['args'],
+            'fuentes': {ruta: hash_archivo(ruta) for ruta in nodo['fuentes']},
+            'dependencias': {dependencia: resultados[dependencia] for dependencia in nodo['dependencias']},
+            'salidas': nodo['salidas']
+        }, sort_keys=True, default=str, ensure_ascii=False).encode())
+        return resumen.hexdigest()
+
+    def construir(self, procesos=None, forzar=False, informar=print):
+        """
+        Ejecuta los nodos que no están al día, en paralelo en cuanto sus
+        dependencias terminan. Si un nodo falla, los que dependen de él se
+        omiten y el resto sigue adelante.
+
+        Parámetros:
+        procesos: Número de procesos (por defecto os.cpu_count())
+        forzar: Si es True se ejecutan todos los nodos
+        informar: Función que recibe una línea por nodo (None para silenciar)
+
+        Retorna:
+        dict: nombre -> {'estado' ('al día', 'construido', 'error' u
+              'omitido'), 'tiempo', 'resultado' y 'error'}
+        """
+        from metaanalisis.ejecutor import _inicializar_trabajador
+
+        orden = self.orden()
+        anterior = self._leer_estado()
+        estado = {nombre: registro for nombre, registro in anterior.items() if nombre in self.nodos}
+        informe = {}
+        resultados = {}
+        restantes = list(orden)
+        en_curso = {}
+        pool = None
+
+        def terminar(nombre, registro, resultado=None, firma=None, error=None):
+            informe[nombre] = {**registro, 'resultado': resultado, 'error': error}
+            if registro['estado'] in ('al día', 'construido'):
+                resultados[nombre] = resultado
+                estado[nombre] = {'firma': firma, 'resultado': resultado,
+                                  'salidas': {ruta: hash_archivo(ruta) for ruta in self.nodos[nombre]['salidas']}}
+            else:
+                estado.pop(nombre, None)
+            if informar is not None:
+                detalle = f" ({error})" if error else ""
+                informar(f"{registro['tiempo']:8.3f} s  {registro['estado']:<10}  {nombre}{detalle}")
+
+        try:
+            while restantes or en_curso:
+                for nombre in list(restantes):
+                    dependencias = self.nodos[nombre]['dependencias']
+                    if any(informe.get(d, {}).get('estado') in ('error', 'omitido') for d in dependencias):
+                        restantes.remove(nombre)
+                        terminar(nombre, {'estado': 'omitido', 'tiempo': 0.0},
+                                 error="falló una dependencia")
+                        continue
+                    if not all(d in resultados for d in dependencias):
+                        continue
+                    restantes.remove(nombre)
+                    firma = self.firma(nombre, resultados)
+                    previo = estado.get(nombre)
+                    if (not forzar and previo is not None and previo['firma'] == firma
+                            and all(hash_archivo(ruta) == valor for ruta, valor in previo['salidas'].items())):
+                        terminar(nombre, {'estado': 'al día', 'tiempo': 0.0}, previo['resultado'], firma)
+                        continue
+                    if pool is None:
+                        pool = ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_trabajador)
+                    nodo = self.nodos[nombre]
+                    futuro = pool.submit(_ejecutar_nodo, nodo['funcion'], nodo['args'],
+                                         {d: resultados[d] for d in dependencias})
+                    en_curso[futuro] = (nombre, firma)
+
+                if not en_curso:
+                    continue
+                terminados, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+                for futuro in terminados:
+                    nombre, firma = en_curso.pop(futuro)
+                    try:
+                        resultado, tiempo = futuro.result()
+                    except Exception as error:
+                        terminar(nombre, {'estado': 'error', 'tiempo': 0.0},
+                                 error=f"{type(error).__name__}: {error}")
+                    else:
+                        terminar(nombre, {'estado': 'construido', 'tiempo': tiempo}, resultado, firma)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+            self._guardar_estado(estado)
+        return informe
+
+
+def combinar_resultado(ruta, salida, metodo, dependencias):
+    """
+    Nodo de resultado combinado: `combinar_csv` de un CSV de obj3 (REML con
+    Hartung–Knapp, como los scripts de R), escrito en `salida` como JSON.
+    """
+    resultado = _normalizar(combinar_csv(ruta, metodo))
+    _escribir_atomico(salida, json.dumps(resultado, indent=1, ensure_ascii=False))
+    return resultado
+
+
+def forest_combinado(salida, titulo, medida, combinado, dependencias):
+    """Nodo de forest plot (PDF) de una medida de un resultado combinado"""
+    from metaanalisis.graficos import figura_forest
+
+    datos = dependencias[combinado]['medidas'][medida]
+    estudios = datos['estudios']
+    etiqueta = f"Efectos aleatorios ({len(estudios['nombre'])} estudios)"
+    figura = figura_forest(estudios['nombre'], estudios['efecto'], estudios['inferior'], estudios['superior'],
+                           estudios['n_total'], (datos['efecto'], datos['inferior'], datos['superior'], etiqueta),
+                           titulo=titulo, etiqueta_x=medida if medida == 'MD' else f"log {medida}")
+    os.makedirs(os.path.dirname(salida) or ".", exist_ok=True)
+    figura.savefig(salida, bbox_inches='tight')
+
+
+def escribir_resumen(salida, claves, dependencias):
+    """
+    Nodo de meta_analisis_resumen.csv, con las columnas de
+    ejecutar_analisis_completo.R y una fila por resultado
+    """
+    from metaanalisis.perezoso import pandas as pd
+
+    filas = [fila_resumen(clave, dependencias[nodo]) for clave, nodo in claves]
+    _escribir_atomico(salida, pd.DataFrame(filas).to_csv(index=False, quoting=csv.QUOTE_NONNUMERIC))
+    return _normalizar(filas)
+
+
+def _formato_p(p):
+    """Valor p con el formato de tabla.R"""
+    if p is None or not np.isfinite(p):
+        return "N/A"
+    if p < 0.0001:
+        return "<0.0001"
+    return f"{p:.4f}" if p < 0.001 else f"{p:.3f}"
+
+
+COLUMNAS_INFORME = ("Variable", "N° Estudios", "N° Participantes", "Media Comb.", "Media Mono.", "Diferencia",
+                    "Estimador", "IC 95%", "Valor p", "I²", "Heterogeneidad", "Estad. Significativo",
+                    "Interpretación")
+GRUPOS_INFORME = ((" ", 3), ("Valores por grupo", 3), ("Efecto Meta-Analítico", 3),
+                  ("Análisis de Heterogeneidad", 2), ("Significancia", 2))
+_ESTILO_CABECERA = "font-weight: bold;color: white !important;background-color: rgba(44, 62, 80, 255) !important;"
+_ESTILO_GRUPO = "background-color: rgba(248, 249, 249, 255) !important;"
+_ESTILO_SIGNIFICATIVO = "background-color: rgba(212, 241, 249, 255) !important;"
+
+
+def _fila_informe(clave, resultado):
+    etiquetas = RESULTADOS_OBJ3.get(clave, {'variable': clave})
+    medida = MEDIDA_INFORME[resultado['tipo']]
+    datos = resultado['medidas'][medida]
+    intervencion, control = resultado['media_intervencion'], resultado['media_control']
+    if resultado['tipo'] == 'binario':
+        medias = [f"{intervencion * 100:.1f}%", f"{control * 100:.1f}%", f"{(intervencion - control) * 100:.1f}%"]
+    else:
+        medias = [f"{intervencion:.2f}", f"{control:.2f}", f"{intervencion - control:.2f}"]
+    significativo = datos['pvalor'] < 0.05
+    if not significativo:
+        interpretacion = "Sin diferencia significativa"
+    else:
+        # Como en tabla.R, el OR se compara con 1 aunque el estimador esté en escala log
+        combinada = datos['efecto'] > 1 if medida == 'OR' else datos['efecto'] <= 0
+        interpretacion = "Favorece terapia combinada" if combinada else "Favorece Metformina sola"
+    return [etiquetas['variable'], str(resultado['num_estudios']), str(resultado['participantes']), *medias,
+            f"{datos['efecto']:.2f}", f"[{datos['inferior']:.2f}, {datos['superior']:.2f}]",
+            _formato_p(datos['pvalor']), f"{datos['I2'] * 100:.1f}%", heterogeneidad(datos['I2']),
+            "Sí" if significativo else "No", interpretacion], significativo
+
+
+def escribir_informe(salida, claves, dependencias):
+    """
+    Nodo de resultados_meta_analisis_corregido.html: la tabla resumen de
+    tabla.R con la misma estructura y estilos que genera kableExtra
+    """
+    alineacion = ['left', 'right', 'right'] + ['left'] * (len(COLUMNAS_INFORME) - 3)
+    lineas = ['<table class="table table-striped table-hover table-condensed table-responsive" '
+              'style="margin-left: auto; margin-right: auto;">',
+              "<caption>Tabla Resumen de Meta-Análisis: Metformina + Inositol vs. Metformina</caption>",
+              " <thead>", "<tr>"]
+    for titulo, columnas in GRUPOS_INFORME:
+        if titulo.strip():
+            lineas.append(f'<th style="border-bottom:hidden;padding-bottom:0; padding-left:3px;padding-right:3px;'
+                          f'text-align: center; " colspan="{columnas}"><div style="border-bottom: 1px solid #ddd; '
+                          f'padding-bottom: 5px; ">{html.escape(titulo)}</div></th>')
+        else:
+            lineas.append(f'<th style="empty-cells: hide;border-bottom:hidden;" colspan="{columnas}"></th>')
+    lineas += ["</tr>", "  <tr>"]
+    for columna, alinear in zip(COLUMNAS_INFORME, alineacion):
+        lineas.append(f'   <th style="text-align:{alinear};{_ESTILO_CABECERA}"> {html.escape(columna)} </th>')
+    lineas += ["  </tr>", " </thead>", "<tbody>"]
+
+    for clave, nodo in claves:
+        celdas, significativo = _fila_informe(clave, dependencias[nodo])
+        lineas.append("  <tr>")
+        for indice, (celda, alinear) in enumerate(zip(celdas, alineacion)):
+            estilo = f"text-align:{alinear};"
+            if indice in (0, 8):
+                estilo += "font-weight: bold;"
+            if indice in (3, 4, 5):
+                estilo += _ESTILO_GRUPO
+            if significativo:
+                estilo += _ESTILO_SIGNIFICATIVO
+            lineas.append(f'   <td style="{estilo}"> {html.escape(celda)} </td>')
+        lineas.append("  </tr>")
+    lineas += ["</tbody>", "</table>"]
+    _escribir_atomico(salida, "\n".join(lineas) + "\n")
+
+
+def grafo_obj3(salida="construccion", raiz=".", metodo='REML'):
+    """
+    Grafo de construcción de obj3: un nodo de resultado combinado por CSV de
+    obj3/objetivo3, los forest plots de cada uno, meta_analisis_resumen.csv
+    y resultados_meta_analisis_corregido.html, todos dentro de `salida`.
+
+    Retorna:
+    GrafoConstruccion
+    """
+    if metodo not in METODOS_TAU2:
+        raise ValueError(f"Método desconocido: {metodo} (use {', '.join(METODOS_TAU2)})")
+    grafo = GrafoConstruccion(salida)
+    combinados = []
+    for clave, definicion in resultados_obj3(raiz):
+        nodo = grafo.nodo(f"combinado/{clave}", combinar_resultado,
+                          (definicion['ruta'], os.path.join(salida, 'combinado', f"{clave}.json"), metodo),
+                          fuentes=(definicion['ruta'],),
+                          salidas=(os.path.join(salida, 'combinado', f"{clave}.json"),))
+        combinados.append((clave, nodo))
+
+        medidas = ('MD',) if definicion['tipo'] == 'continuo' else ('RR', 'OR')
+        forest = RESULTADOS_OBJ3.get(clave, {}).get('forest')
+        if forest is None:
+            forest = tuple((f"{clave}_{medida.lower()}" if len(medidas) > 1 else clave, medida)
+                           for medida in medidas)
+        titulo = RESULTADOS_OBJ3.get(clave, {}).get('outcome_es', clave)
+        for sufijo, medida in forest:
+            ruta = os.path.join(salida, f"forest_plot_{sufijo}.pdf")
+            grafo.nodo(f"forest/{sufijo}", forest_combinado, (ruta, titulo, medida, nodo),
+                       dependencias=(nodo,), salidas=(ruta,))
+
+    nodos_combinados = [nodo for _, nodo in combinados]
+    ruta_resumen = os.path.join(salida, 'meta_analisis_resumen.csv')
+    grafo.nodo('resumen', escribir_resumen, (ruta_resumen, combinados),
+               dependencias=nodos_combinados, salidas=(ruta_resumen,))
+    ruta_informe = os.path.join(salida, 'resultados_meta_analisis_corregido.html')
+    grafo.nodo('informe', escribir_informe, (ruta_informe, combinados),
+               dependencias=nodos_combinados, salidas=(ruta_informe,))
+    return grafo
+
+
+def construir_obj3(salida="construccion", raiz=".", metodo='REML', procesos=None, forzar=False, informar=print):
+    """Construye (incrementalmente) los artefactos de obj3; ver `grafo_obj3` y `GrafoConstruccion.construir`"""
+    return grafo_obj3(salida, raiz, metodo).construir(procesos, forzar, informar)
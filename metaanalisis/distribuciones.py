@@ -0,0 +1,169 @@
+import functools
+import math
+
+import numpy as np
+
+_erfc = np.vectorize(math.erfc, otypes=[float])
+
+# Grados de libertad cubiertos por las tablas de cuantiles de la t
+DF_TABLA_T = 100
+
+
+def valor_p_normal(z):
+    """Valor p bilateral de un estadístico con distribución normal estándar"""
+    p = _erfc(np.abs(np.asarray(z, dtype=float)) / math.sqrt(2))
+    return p.item() if p.ndim == 0 else p
+
+
+def cdf_t(t, df):
+    """
+    Función de distribución de la t de Student para grados de libertad
+    enteros, con las series finitas de Abramowitz y Stegun (26.7.3–26.7.4),
+    exactas y sin depender de scipy.
+
+    Parámetros:
+    t: Valor o array de valores
+    df: Grados de libertad (entero positivo, escalar)
+
+    Retorna:
+    float o array con P(T <= t)
+    """
+    df = int(df)
+    if df < 1:
+        raise ValueError("Los grados de libertad deben ser un entero positivo")
+    t = np.asarray(t, dtype=float)
+    theta = np.arctan(t / np.sqrt(df))
+    seno, coseno2 = np.sin(theta), np.cos(theta)**2
+
+    # A(t|df) = P(|T| < |t|) como suma de potencias de cos²θ
+    if df % 2 == 1:
+        suma = np.zeros_like(t)
+        if df > 1:
+            termino = np.ones_like(t)
+            suma = termino.copy()
+            for j in range(1, (df - 3) // 2 + 1):
+                termino = termino * coseno2 * (2 * j) / (2 * j + 1)
+                suma = suma + termino
+            suma = suma * np.cos(theta)
+        A = 2 / np.pi * (theta + seno * suma)
+    else:
+        termino = np.ones_like(t)
+        suma = termino.copy()
+        for j in range(1, (df - 2) // 2 + 1):
+            termino = termino * coseno2 * (2 * j - 1) / (2 * j)
+            suma = suma + termino
+        A = seno * suma
+
+    resultado = 0.5 + A / 2
+    return resultado.item() if resultado.ndim == 0 else resultado
+
+
+def cuantil_t(p, df):
+    """
+    Cuantil de la t de Student (inversa de `cdf_t`) por bisección, para
+    grados de libertad enteros.
+
+    Parámetros:
+    p: Probabilidad o array de probabilidades en (0, 1)
+    df: Grados de libertad (entero positivo, escalar)
+
+    Retorna:
+    float o array con t tal que P(T <= t) = p
+    """
+    p = np.asarray(p, dtype=float)
+    # Por simetría se busca el cuantil superior |t| de max(p, 1 - p)
+    superior = np.maximum(p, 1 - p)
+    inferior, limite = np.zeros_like(superior), np.ones_like(superior)
+    while np.any(cdf_t(limite, df) < superior):
+        limite = np.where(cdf_t(limite, df) < superior, limite * 2, limite)
+    for _ in range(100):
+        medio = (inferior + limite) / 2
+        debajo = cdf_t(medio, df) < superior
+        inferior, limite = np.where(debajo, medio, inferior), np.where(debajo, limite, medio)
+        if np.all(limite - inferior <= 4 * np.finfo(float).eps * limite):
+            break
+    t = np.where(p < 0.5, -1, 1) * (inferior + limite) / 2
+    return t.item() if t.ndim == 0 else t
+
+
+@functools.lru_cache(maxsize=None)
+def tabla_cuantiles_t(p):
+    """
+    Cuantiles `p` de la t para df = 0..DF_TABLA_T (la posición 0 es NaN).
+    Se calculan una sola vez por probabilidad y se reutilizan en todas las
+    llamadas siguientes; el array es de solo lectura.
+    """
+    tabla = np.full(DF_TABLA_T + 1, np.nan)
+    for df in range(1, DF_TABLA_T + 1):
+        tabla[df] = cuantil_t(p, df)
+    tabla.flags.writeable = False
+    return tabla
+
+
+@functools.lru_cache(maxsize=1024)
+def _cuantil_t_memorizado(p, df):
+    return cuantil_t(p, df)
+
+
+def cuantiles_t(p, df):
+    """
+    Cuantil `p` de la t para un array de grados de libertad, p. ej. los k - 1
+    de muchos meta-análisis a la vez. Los df hasta DF_TABLA_T se buscan en
+    `tabla_cuantiles_t`; los mayores se calculan una vez por valor distinto.
+
+    Parámetros:
+    p: Probabilidad (escalar)
+    df: Grados de libertad enteros (escalar o array); df < 1 da NaN
+
+    Retorna:
+    float o array con la forma de `df`
+    """
+    df = np.asarray(df)
+    enteros = np.where(df >= 1, df, 0).astype(np.int64)
+    # Copia escribible (la tabla es de solo lectura y un df escalar da un escalar numpy)
+    resultado = np.array(tabla_cuantiles_t(float(p))[np.minimum(enteros, DF_TABLA_T)], ndmin=1)
+    grandes = np.array(enteros > DF_TABLA_T, ndmin=1)
+    if grandes.any():
+        enteros_1d = np.array(enteros, ndmin=1)
+        for valor in np.unique(enteros_1d[grandes]):
+            resultado[enteros_1d == valor] = _cuantil_t_memorizado(float(p), int(valor))
+    return resultado.item() if df.ndim == 0 else resultado.reshape(df.shape)
+
+
+def valor_p_t(t, df):
+    """
+    Valor p bilateral de un estadístico t con `df` grados de libertad; `df`
+    puede ser un array (un valor por estadístico, df < 1 da NaN)
+    """
+    if np.ndim(df) == 0:
+        return 2 * (1 - cdf_t(np.abs(t), df))
+    t, df = np.broadcast_arrays(np.asarray(t, dtype=float), np.asarray(df))
+    p = np.full(t.shape, np.nan)
+    for valor in np.unique(df[df >= 1]):
+        seleccion = df == valor
+        p[seleccion] = 2 * (1 - cdf_t(np.abs(t[seleccion]), valor))
+    return p
+
+
+def valor_p_chi2(estadistico, df):
+    """
+    Valor p (cola superior) de una chi² con `df` grados de libertad enteros,
+    con las formas cerradas para df par e impar.
+    """
+    df = int(df)
+    if not np.isfinite(estadistico) or df < 1:
+        return np.nan
+    x = estadistico / 2
+    if df % 2 == 0:
+        termino, suma = 1.0, 1.0
+        for j in range(1, df // 2):
+            termino *= x / j
+            suma += termino
+        return math.exp(-x) * suma
+    # df impar: cola normal bilateral de sqrt(chi²) más términos semienteros
+    p = valor_p_normal(math.sqrt(estadistico))
+    termino = math.sqrt(4 * x / math.pi) * math.exp(-x)
+    for j in range(1, (df - 1) // 2 + 1):
+        p += termino
+        termino *= 2 * x / (2 * j + 1)
+    return p
@@ -0,0 +1,255 @@
+import numpy as np
+
+from metaanalisis.instrumentacion import etapa
+from metaanalisis.perezoso import pandas as pd
+
+# Valor crítico de la normal estándar para intervalos de confianza del 95%
+Z_95 = 1.96
+
+# Claves que debe contener cada diccionario de estudio
+CLAVES_ESTUDIO = ('n_control', 'n_intervencion', 'media_control', 'media_intervencion',
+                  'de_control', 'de_intervencion')
+
+
+def interpretar_tamano_efecto(g):
+    """
+    Interpreta la magnitud del tamaño del efecto según los umbrales de Cohen
+    (0.2, 0.5, 0.8) de forma vectorizada.
+
+    Parámetros:
+    g: Escalar o array con tamaños del efecto
+
+    Retorna:
+    array de cadenas ("Sin efecto", "Pequeño", "Moderado", "Grande")
+    """
+    magnitud = np.abs(np.asarray(g, dtype=float))
+    return np.select([magnitud >= 0.8, magnitud >= 0.5, magnitud >= 0.2],
+                     ["Grande", "Moderado", "Pequeño"], default="Sin efecto")
+
+
+def columnas_hedges(n_control, n_intervencion, media_control, media_intervencion,
+                    de_control, de_intervencion, z=Z_95):
+    """
+    Núcleo vectorizado del cálculo de g de Hedges. Recibe arrays (o escalares)
+    alineados por estudio y calcula todas las columnas por estudio en una sola
+    pasada, sin bucles de Python.
+
+    Parámetros:
+    n_control, n_intervencion: Tamaños de muestra de cada grupo
+    media_control, media_intervencion: Medias de cada grupo
+    de_control, de_intervencion: Desviaciones estándar de cada grupo
+    z: Valor crítico para el intervalo de confianza (1.96 por defecto)
+
+    Retorna:
+    dict: columnas 'diferencia_medias', 'de_agrupada', 'd_cohen', 'g_hedges',
+          'se_g_hedges', 'IC_95_inferior', 'IC_95_superior' y 'peso'
+    """
+    n_c = np.asarray(n_control, dtype=float)
+    n_i = np.asarray(n_intervencion, dtype=float)
+    de_c = np.asarray(de_control, dtype=float)
+    de_i = np.asarray(de_intervencion, dtype=float)
+
+    suma_n = n_c + n_i
+    grados_libertad = suma_n - 2
+
+    # Diferencia de medias
+    diferencia_medias = np.subtract(media_intervencion, media_control, dtype=float)
+
+    # Desviación estándar agrupada: sqrt(((n1-1)*s1^2 + (n2-1)*s2^2) / (n1+n2-2))
+    de_agrupada = np.sqrt(((n_c - 1) * de_c**2 + (n_i - 1) * de_i**2) / grados_libertad)
+
+    # d de Cohen y g de Hedges con factor de corrección J = 1 - 3/(4(n1+n2-2)-1)
+    d_cohen = diferencia_medias / de_agrupada
+    factor_correccion = 1 - 3 / (4 * grados_libertad - 1)
+    g_hedges = d_cohen * factor_correccion
+
+    # SE(g) = sqrt((n1+n2)/(n1*n2) + g^2/(2*(n1+n2-2)))
+    varianza_g = suma_n / (n_c * n_i) + g_hedges**2 / (2 * grados_libertad)
+    se_g_hedges = np.sqrt(varianza_g)
+
+    return {
+        'diferencia_medias': diferencia_medias,
+        'de_agrupada': de_agrupada,
+        'd_cohen': d_cohen,
+        'g_hedges': g_hedges,
+        'se_g_hedges': se_g_hedges,
+        'IC_95_inferior': g_hedges - z * se_g_hedges,
+        'IC_95_superior': g_hedges + z * se_g_hedges,
+        'peso': 1 / varianza_g
+    }
+
+
+def combinar_efecto_fijo(efectos, pesos, z=Z_95):
+    """
+    Combina los efectos por estudio con el modelo de efectos fijos
+    (inverso de la varianza) y calcula la heterogeneidad.
+
+    Parámetros:
+    efectos: Array con el efecto de cada estudio
+    pesos: Array con el peso (1/varianza) de cada estudio
+    z: Valor crítico para el intervalo de confianza
+
+    Retorna:
+    dict: 'efecto_combinado', 'se_combinado', 'IC_95_combinado_inf',
+          'IC_95_combinado_sup', 'Q', 'df' e 'I_cuadrado'
+    """
+    efectos = np.asarray(efectos, dtype=float)
+    pesos = np.asarray(pesos, dtype=float)
+
+    suma_pesos = pesos.sum()
+    efecto_combinado = np.dot(pesos, efectos) / suma_pesos
+    se_combinado = np.sqrt(1 / suma_pesos)
+
+    # Heterogeneidad (Q de Cochran e I²)
+    Q = np.dot(pesos, (efectos - efecto_combinado)**2)
+    df = len(efectos) - 1
+    I_cuadrado = max(0, (Q - df) / Q * 100) if Q > 0 else 0
+
+    return {
+        'efecto_combinado': efecto_combinado,
+        'se_combinado': se_combinado,
+        'IC_95_combinado_inf': efecto_combinado - z * se_combinado,
+        'IC_95_combinado_sup': efecto_combinado + z * se_combinado,
+        'Q': Q,
+        'df': df,
+        'I_cuadrado': I_cuadrado
+    }
+
+
+def _columnas_de_estudios(estudios):
+    """
+    Convierte una lista de diccionarios de estudio en arrays por columna.
+    Una TablaEstudios ya guarda sus columnas como arrays y se usa directamente.
+    """
+    if hasattr(estudios, 'columnas'):
+        return estudios.columnas()
+    return {clave: np.array([estudio[clave] for estudio in estudios]) for clave in CLAVES_ESTUDIO}
+
+
+def _nombres_de_estudios(estudios, numerar=True):
+    """Devuelve el nombre de cada estudio, con un nombre genérico si falta"""
+    if hasattr(estudios, 'nombres'):
+        return estudios.nombres
+    if numerar:
+        return [estudio.get('nombre', f"Estudio {i + 1}") for i, estudio in enumerate(estudios)]
+    return [estudio.get('nombre', "Estudio") for estudio in estudios]
+
+
+def calcular_tamano_efecto(estudios):
+    """
+    Calcula el tamaño del efecto (d de Cohen, g de Hedges) entre grupo control e intervención
+    usando estadísticas resumidas de múltiples estudios, con el núcleo vectorizado
+    `columnas_hedges`.
+
+    Parámetros:
+    estudios: Lista de diccionarios con las estadísticas resumidas de cada estudio
+             (ver CLAVES_ESTUDIO; 'nombre' es opcional) o una TablaEstudios
+
+    Retorna:
+    tupla: (resultados, df_estudios)
+    """
+    datos = _columnas_de_estudios(estudios)
+    columnas = columnas_hedges(**datos)
+
+    df_estudios = pd.DataFrame({
+        'nombre': _nombres_de_estudios(estudios),
+        'n_control': datos['n_control'],
+        'n_intervencion': datos['n_intervencion'],
+        'n_total': datos['n_control'] + datos['n_intervencion'],
+        'media_control': datos['media_control'],
+        'media_intervencion': datos['media_intervencion'],
+        'de_control': datos['de_control'],
+        'de_intervencion': datos['de_intervencion'],
+        **columnas,
+        'interpretacion': interpretar_tamano_efecto(columnas['g_hedges'])
+    })
+
+    combinado = combinar_efecto_fijo(columnas['g_hedges'], columnas['peso'])
+
+    # Estadísticas globales
+    n_total_control = df_estudios['n_control'].sum()
+    n_total_intervencion = df_estudios['n_intervencion'].sum()
+
+    resultados = {
+        'efecto_combinado': combinado['efecto_combinado'],
+        'se_combinado': combinado['se_combinado'],
+        'IC_95_combinado': (combinado['IC_95_combinado_inf'], combinado['IC_95_combinado_sup']),
+        'interpretacion_combinada': str(interpretar_tamano_efecto(combinado['efecto_combinado'])),
+        'n_total_control': n_total_control,
+        'n_total_intervencion': n_total_intervencion,
+        'n_total': n_total_control + n_total_intervencion,
+        'Q': combinado['Q'],
+        'df': combinado['df'],
+        'I_cuadrado': combinado['I_cuadrado']
+    }
+
+    return resultados, df_estudios
+
+
+def extract_results(estudios, categoria):
+    """Calcula tamaños del efecto y devuelve resultados para una categoría"""
+    with etapa('extract_results', resultado=categoria):
+        return _extraer_resultados(estudios, categoria)
+
+
+def _extraer_resultados(estudios, categoria):
+    with etapa('columnas_hedges'):
+        datos = _columnas_de_estudios(estudios)
+        columnas = columnas_hedges(**datos)
+
+    with etapa('dataframe'):
+        df_estudios = pd.DataFrame({
+            'nombre': _nombres_de_estudios(estudios, numerar=False),
+            'categoria': categoria,
+            'n_control': datos['n_control'],
+            'n_intervencion': datos['n_intervencion'],
+            'n_total': datos['n_control'] + datos['n_intervencion'],
+            'g_hedges': columnas['g_hedges'],
+            'se_g_hedges': columnas['se_g_hedges'],
+            'IC_95_inferior': columnas['IC_95_inferior'],
+            'IC_95_superior': columnas['IC_95_superior'],
+            'peso': columnas['peso'],
+            'interpretacion': interpretar_tamano_efecto(columnas['g_hedges'])
+        })
+
+    if len(df_estudios) > 0:
+        with etapa('combinar'):
+            combinado = combinar_efecto_fijo(columnas['g_hedges'], columnas['peso'])
+
+        # Estadísticas globales
+        n_total_control = df_estudios['n_control'].sum()
+        n_total_intervencion = df_estudios['n_intervencion'].sum()
+
+        resultados = {
+            'categoria': categoria,
+            'efecto_combinado': combinado['efecto_combinado'],
+            'se_combinado': combinado['se_combinado'],
+            'IC_95_combinado_inf': combinado['IC_95_combinado_inf'],
+            'IC_95_combinado_sup': combinado['IC_95_combinado_sup'],
+            'interpretacion_combinada': str(interpretar_tamano_efecto(combinado['efecto_combinado'])),
+            'n_total_control': n_total_control,
+            'n_total_intervencion': n_total_intervencion,
+            'n_total': n_total_control + n_total_intervencion,
+            'Q': combinado['Q'],
+            'df': combinado['df'],
+            'I_cuadrado': combinado['I_cuadrado'],
+            'num_estudios': len(df_estudios)
+        }
+    else:
+        resultados = {
+            'categoria': categoria,
+            'efecto_combinado': np.nan,
+            'se_combinado': np.nan,
+            'IC_95_combinado_inf': np.nan,
+            'IC_95_combinado_sup': np.nan,
+            'interpretacion_combinada': "N/A",
+            'n_total_control': 0,
+            'n_total_intervencion': 0,
+            'n_total': 0,
+            'Q': np.nan,
+            'df': 0,
+            'I_cuadrado': np.nan,
+            'num_estudios': 0
+        }
+
+    return resultados, df_estudios
@@ -0,0 +1,192 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from metaanalisis.aleatorios import combinar_efectos_aleatorios
+from metaanalisis.binario import analizar_binario, leer_csv_eventos
+from metaanalisis.cache import CacheResultados, clave_cache, huella_codigo
+from metaanalisis.efecto import Z_95, calcular_tamano_efecto
+from metaanalisis.perezoso import pandas as pd
+from metaanalisis.tabla import TablaEstudios
+
+
+def _inicializar_trabajador():
+    """Fija el backend no interactivo antes de que el proceso importe pyplot"""
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def _analizar_continuo(ruta, metodo, z):
+    """g de Hedges con efectos fijos y aleatorios para un CSV de medias"""
+    tabla = TablaEstudios.desde_csv(ruta)
+    resultados, df_estudios = calcular_tamano_efecto(tabla)
+    aleatorio = combinar_efectos_aleatorios(df_estudios['g_hedges'].to_numpy(),
+                                            df_estudios['se_g_hedges'].to_numpy()**2, metodo, z)
+    fijo = {
+        'medida': 'g',
+        'efecto_fijo': resultados['efecto_combinado'],
+        'IC_fijo_inf': resultados['IC_95_combinado'][0],
+        'IC_fijo_sup': resultados['IC_95_combinado'][1]
+    }
+    filas = (df_estudios['nombre'], df_estudios['g_hedges'], df_estudios['IC_95_inferior'],
+             df_estudios['IC_95_superior'], df_estudios['n_total'])
+    return fijo, aleatorio, resultados['Q'], resultados['I_cuadrado'], df_estudios, filas
+
+
+def _analizar_binario(ruta, metodo, z):
+    """Log RR de Mantel–Haenszel y efectos aleatorios para un CSV de eventos"""
+    df_eventos = leer_csv_eventos(ruta)
+    resultados, df_estudios = analizar_binario(df_eventos, medida='RR', metodo='MH', z=z)
+    aleatorio = combinar_efectos_aleatorios(df_estudios['efecto'].to_numpy(),
+                                            df_estudios['se_efecto'].to_numpy()**2, metodo, z)
+    fijo = {
+        'medida': 'log RR',
+        'efecto_fijo': resultados['efecto_combinado'],
+        'IC_fijo_inf': resultados['IC_95_combinado'][0],
+        'IC_fijo_sup': resultados['IC_95_combinado'][1]
+    }
+    filas = (df_estudios['nombre'], df_estudios['efecto'], df_estudios['IC_95_inferior'],
+             df_estudios['IC_95_superior'], df_estudios['n_intervencion'] + df_estudios['n_control'])
+    return fijo, aleatorio, resultados['Q'], resultados['I_cuadrado'], df_estudios, filas
+
+
+def _archivos_resultado(definicion, directorio_salida, figuras):
+    base = os.path.join(directorio_salida, f"{definicion['objetivo']}_{definicion['resultado']}")
+    return [f"{base}_estudios.csv"] + ([f"{base}_forest.png"] if figuras else [])
+
+
+def _calcular_resultado(definicion, directorio_salida, metodo, figuras, z):
+    inicio = time.perf_counter()
+    analizar = _analizar_binario if definicion['tipo'] == 'binario' else _analizar_continuo
+    fijo, aleatorio, Q, I_cuadrado, df_estudios, filas = analizar(definicion['ruta'], metodo, z)
+
+    archivos = _archivos_resultado(definicion, directorio_salida, figuras)
+    df_estudios.to_csv(archivos[0], index=False)
+    tiempo_calculo = time.perf_counter() - inicio
+
+    if figuras:
+        from metaanalisis.graficos import figura_forest
+
+        inicio_figura = time.perf_counter()
+        combinados = [
+            (fijo['efecto_fijo'], fijo['IC_fijo_inf'], fijo['IC_fijo_sup'], "Efectos fijos"),
+            (aleatorio['efecto_combinado'], aleatorio['IC_95_combinado_inf'],
+             aleatorio['IC_95_combinado_sup'], f"Efectos aleatorios ({metodo})")
+        ]
+        figura = figura_forest(*filas, combinados, titulo=definicion['resultado'], etiqueta_x=fijo['medida'])
+        figura.savefig(archivos[-1], dpi=150, bbox_inches='tight')
+        tiempo_figura = time.perf_counter() - inicio_figura
+    else:
+        tiempo_figura = 0.0
+
+    return {
+        'objetivo': definicion['objetivo'],
+        'resultado': definicion['resultado'],
+        **fijo,
+        'efecto_aleatorio': aleatorio['efecto_combinado'],
+        'IC_aleatorio_inf': aleatorio['IC_95_combinado_inf'],
+        'IC_aleatorio_sup': aleatorio['IC_95_combinado_sup'],
+        'tau2': aleatorio['tau2'],
+        'Q': Q,
+        'I_cuadrado': I_cuadrado,
+        'num_estudios': len(df_estudios),
+        'archivos': archivos,
+        'tiempo_calculo': tiempo_calculo,
+        'tiempo_figura': tiempo_figura,
+        'tiempo_total': time.perf_counter() - inicio
+    }
+
+
+def _huella_calculo():
+    """Huella del código que calcula y dibuja cada resultado (ver `huella_codigo`)"""
+    return huella_codigo(__file__, 'metaanalisis.efecto', 'metaanalisis.aleatorios', 'metaanalisis.binario',
+                         'metaanalisis.distribuciones', 'metaanalisis.graficos')
+
+
+def analizar_resultado(definicion, directorio_salida, metodo='REML', figuras=True, z=Z_95, directorio_cache=None):
+    """
+    Analiza un resultado y escribe sus artefactos en `directorio_salida`:
+    la tabla por estudio (CSV) y, si `figuras` es True, el forest plot (PNG).
+
+    Si se indica `directorio_cache`, los resultados y artefactos se buscan
+    primero en la caché por el contenido de los estudios y las opciones del
+    análisis, y solo se recalculan si algo cambió.
+
+    Retorna:
+    dict: fila de resumen con los efectos combinados, los archivos escritos,
+          los tiempos de cálculo, figura y total en segundos y 'cache'
+          (True si se reutilizó una entrada de la caché)
+    """
+    if directorio_cache is None:
+        return {**_calcular_resultado(definicion, directorio_salida, metodo, figuras, z), 'cache': False}
+
+    inicio = time.perf_counter()
+    if definicion['tipo'] == 'binario':
+        datos = leer_csv_eventos(definicion['ruta'])
+    else:
+        datos = TablaEstudios.desde_csv(definicion['ruta'])
+    clave = clave_cache(datos, tipo=definicion['tipo'], metodo=metodo, z=z, figuras=figuras,
+                        estilo='figura_forest', dpi=150, codigo=_huella_calculo())
+    archivos = _archivos_resultado(definicion, directorio_salida, figuras)
+
+    cache = CacheResultados(directorio_cache)
+    fila, acierto = cache.obtener_o_calcular(
+        clave, lambda: _calcular_resultado(definicion, directorio_salida, metodo, figuras, z), archivos)
+    if acierto:
+        fila = {**fila, 'archivos': archivos, 'tiempo_calculo': 0.0, 'tiempo_figura': 0.0,
+                'tiempo_total': time.perf_counter() - inicio}
+    return {**fila, 'cache': acierto}
+
+
+def ejecutar(definiciones, directorio_salida, procesos=None, metodo='REML', figuras=True, informar=print,
+             directorio_cache=None, tamano_cache=None):
+    """
+    Ejecuta el análisis de todos los resultados en un pool de procesos, de
+    modo que la reconstrucción completa tarda lo que el resultado más lento y
+    no la suma de todos. Cada proceso usa el backend Agg.
+
+    Parámetros:
+    definiciones: Lista devuelta por `descubrir_resultados`
+    directorio_salida: Directorio donde se escriben los artefactos
+    procesos: Número de procesos (por defecto uno por resultado, hasta os.cpu_count())
+    metodo: Estimador de tau² para el modelo de efectos aleatorios
+    figuras: Si es False solo se escriben las tablas
+    informar: Función que recibe una línea de progreso por tarea (None para silenciar)
+    directorio_cache: Directorio de la caché de resultados (None para desactivarla)
+    tamano_cache: Tamaño máximo de la caché en bytes; al terminar se desalojan
+                  las entradas menos usadas
+
+    Retorna:
+    tupla: (resumen, tiempo_total) con el DataFrame de resumen (también
+           escrito como resumen.csv) y el tiempo de pared en segundos
+    """
+    os.makedirs(directorio_salida, exist_ok=True)
+    inicio = time.perf_counter()
+    procesos = procesos or max(1, min(len(definiciones), os.cpu_count() or 1))
+
+    filas = []
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_trabajador) as pool:
+        futuros = {pool.submit(analizar_resultado, definicion, directorio_salida, metodo, figuras,
+                               directorio_cache=directorio_cache): definicion
+                   for definicion in definiciones}
+        for futuro in as_completed(futuros):
+            definicion = futuros[futuro]
+            try:
+                fila = futuro.result()
+            except Exception as error:
+                fila = {'objetivo': definicion['objetivo'], 'resultado': definicion['resultado'],
+                        'error': f"{type(error).__name__}: {error}", 'tiempo_total': np.nan}
+            filas.append(fila)
+            if informar is not None:
+                estado = fila.get('error') or f"{fila['num_estudios']} estudios{', caché' if fila['cache'] else ''}"
+                informar(f"{fila['tiempo_total']:8.3f} s  {fila['objetivo']}/{fila['resultado']} ({estado})")
+
+    if directorio_cache is not None:
+        CacheResultados(directorio_cache).desalojar(tamano_cache)
+
+    resumen = pd.DataFrame(filas).sort_values(['objetivo', 'resultado'], ignore_index=True)
+    resumen.drop(columns='archivos', errors='ignore').to_csv(
+        os.path.join(directorio_salida, 'resumen.csv'), index=False)
+    return resumen, time.perf_counter() - inicio
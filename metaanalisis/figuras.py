@@ -0,0 +1,247 @@
+"""
+Cola de renderizado de figuras sobre un pool de procesos acotado.
+
+Cada trabajo construye una figura (una llamada a una función que devuelve
+una matplotlib.figure.Figure) y la guarda en uno o varios archivos, p. ej.
+el mismo forest plot en PNG a 300 dpi, PDF y SVG: la figura se construye una
+vez y solo se repite el `savefig` de cada formato.
+
+    python -m metaanalisis figuras [--salida figuras] [--modelos fijo aleatorio] [--idiomas es en]
+                                   [--formatos png pdf svg] [--dpi 300] [--procesos N] [--pendientes N]
+
+Los procesos de trabajo se inicializan una sola vez con el backend Agg,
+matplotlib, el módulo de gráficos y la caché de fuentes ya cargados, y se
+reutilizan para todos los trabajos. Nunca hay más de `max_pendientes`
+trabajos enviados al pool: los trabajos se consumen de un iterable a medida
+que terminan los anteriores, así que la memoria no crece con el número de
+figuras. Un trabajo que falla (o un proceso que muere) se registra como
+error sin detener el resto del lote.
+"""
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from metaanalisis.aleatorios import METODOS_TAU2
+from metaanalisis.lectura import DIRECTORIOS_DATOS, descubrir_resultados
+from metaanalisis.perezoso import pandas as pd
+
+MODELOS = ('fijo', 'aleatorio')
+FORMATOS = ('png', 'pdf', 'svg')
+IDIOMAS = ('es', 'en')
+
+TEXTOS = {
+    'es': {'fijo': "Efectos fijos", 'aleatorio': "Efectos aleatorios", 'estudios': "estudios",
+           'g': "g de Hedges", 'log RR': "log RR"},
+    'en': {'fijo': "Fixed effects", 'aleatorio': "Random effects", 'estudios': "studies",
+           'g': "Hedges' g", 'log RR': "log RR"}
+}
+
+
+def _inicializar_trabajador():
+    """
+    Deja el proceso listo para dibujar: backend Agg, módulos de matplotlib
+    importados y la caché de fuentes cargada con una figura de prueba, de
+    modo que el primer trabajo no paga el arranque.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import io
+
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from metaanalisis.graficos import figura_forest
+
+    figura = figura_forest(["-"], [0.0], [-1.0], [1.0], [10], (0.0, -1.0, 1.0, "-"))
+    FigureCanvasAgg(figura).print_png(io.BytesIO())
+
+
+def _ejecutar_trabajo(trabajo):
+    """Construye la figura de un trabajo y la guarda en todas sus salidas"""
+    inicio = time.perf_counter()
+    figura = trabajo['funcion'](*trabajo.get('args', ()), **trabajo.get('kwargs', {}))
+    tiempo_figura = time.perf_counter() - inicio
+    tamanos = []
+    try:
+        for ruta, dpi in trabajo['salidas']:
+            os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+            figura.savefig(ruta, dpi=dpi or 'figure', bbox_inches='tight')
+            tamanos.append(os.path.getsize(ruta))
+    finally:
+        # Las figuras creadas con pyplot quedan registradas en su gestor hasta cerrarlas
+        if getattr(figura.canvas, 'manager', None) is not None:
+            import matplotlib.pyplot as plt
+            plt.close(figura)
+    return {'tiempo_figura': tiempo_figura, 'bytes': sum(tamanos),
+            'tiempo_total': time.perf_counter() - inicio}
+
+
+def _fila(trabajo, **campos):
+    return {'nombre': trabajo.get('nombre', ""),
+            'archivos': [ruta for ruta, _ in trabajo['salidas']],
+            'error': None, 'tiempo_figura': float('nan'), 'tiempo_total': float('nan'), 'bytes': 0,
+            **campos}
+
+
+def renderizar_iter(trabajos, procesos=None, max_pendientes=None, trabajos_por_proceso=None):
+    """
+    Renderiza los trabajos en un pool de procesos y produce una fila de
+    informe por trabajo a medida que terminan (no en el orden de entrada).
+
+    Parámetros:
+    trabajos: Iterable de diccionarios con 'funcion' (función de nivel de
+              módulo que devuelve una Figure), 'args', 'kwargs', 'salidas'
+              (lista de (ruta, dpi); dpi None usa el de la figura) y 'nombre'
+    procesos: Número de procesos (por defecto os.cpu_count())
+    max_pendientes: Trabajos enviados al pool a la vez (por defecto 2 por
+                    proceso); el iterable no se consume más allá
+    trabajos_por_proceso: Si se indica, cada proceso se reemplaza tras ese
+                          número de trabajos para liberar memoria acumulada
+
+    Retorna:
+    generador de dict: 'nombre', 'archivos', 'error' (None si fue bien),
+                       'tiempo_figura', 'tiempo_total' y 'bytes' escritos
+    """
+    procesos = procesos or os.cpu_count() or 1
+    max_pendientes = max_pendientes or 2 * procesos
+    iterador = iter(trabajos)
+
+    def crear_pool():
+        return ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_trabajador,
+                                   max_tasks_per_child=trabajos_por_proceso)
+
+    pool = crear_pool()
+    pendientes = {}
+    reintentar = []
+    reintentados = set()
+    agotado = False
+    try:
+        while True:
+            if reintentar:
+                # Los reintentos van de uno en uno y solos, para que un trabajo
+                # que vuelve a tumbar su proceso no arrastre a ningún otro
+                if not pendientes:
+                    trabajo = reintentar.pop()
+                    pendientes[pool.submit(_ejecutar_trabajo, trabajo)] = trabajo
+            else:
+                while not agotado and len(pendientes) < max_pendientes:
+                    trabajo = next(iterador, None)
+                    if trabajo is None:
+                        agotado = True
+                    else:
+                        pendientes[pool.submit(_ejecutar_trabajo, trabajo)] = trabajo
+            if not pendientes:
+                break
+
+            terminados, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+            roto = False
+            for futuro in terminados:
+                trabajo = pendientes.pop(futuro)
+                try:
+                    yield _fila(trabajo, **futuro.result())
+                except BrokenProcessPool as error:
+                    roto = True
+                    # Al morir un proceso fallan todos los trabajos en curso, no
+                    # solo el culpable: cada uno se reintenta una vez
+                    if id(trabajo) in reintentados:
+                        yield _fila(trabajo, error=f"Proceso de trabajo terminado: {error}")
+                    else:
+                        reintentados.add(id(trabajo))
+                        reintentar.append(trabajo)
+                except Exception as error:
+                    yield _fila(trabajo, error=f"{type(error).__name__}: {error}")
+            if roto:
+                # Un proceso murió (p. ej. por falta de memoria) y el pool ya no
+                # acepta trabajos: los que quedaban se reenvían a uno nuevo
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = crear_pool()
+                reintentar.extend(pendientes.values())
+                pendientes = {}
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def renderizar(trabajos, procesos=None, max_pendientes=None, trabajos_por_proceso=None, informar=print):
+    """
+    Renderiza todos los trabajos (ver `renderizar_iter`) e informa del
+    progreso con una línea por trabajo.
+
+    Retorna:
+    tupla: (informe, tiempo_total) con un DataFrame de una fila por trabajo
+           y el tiempo de pared en segundos
+    """
+    inicio = time.perf_counter()
+    filas = []
+    for fila in renderizar_iter(trabajos, procesos, max_pendientes, trabajos_por_proceso):
+        filas.append(fila)
+        if informar is not None:
+            estado = fila['error'] or f"{len(fila['archivos'])} archivos, {fila['bytes'] / 2**10:.0f} KB"
+            informar(f"{fila['tiempo_total']:8.3f} s  {fila['nombre']} ({estado})")
+    informe = pd.DataFrame(filas, columns=list(_fila({'salidas': []})))
+    return informe.sort_values('nombre', ignore_index=True), time.perf_counter() - inicio
+
+
+def forest_resultado(definicion, modelo='aleatorio', idioma='es', metodo='REML'):
+    """
+    Forest plot de un resultado descubierto por `descubrir_resultados` con
+    el efecto combinado de un modelo y los textos en un idioma.
+
+    Retorna:
+    matplotlib.figure.Figure
+    """
+    from metaanalisis.ejecutor import _analizar_binario, _analizar_continuo
+    from metaanalisis.graficos import figura_forest
+
+    textos = TEXTOS[idioma]
+    analizar = _analizar_binario if definicion['tipo'] == 'binario' else _analizar_continuo
+    fijo, aleatorio, _, _, df_estudios, filas = analizar(definicion['ruta'], metodo, 1.96)
+    if modelo == 'fijo':
+        combinado = (fijo['efecto_fijo'], fijo['IC_fijo_inf'], fijo['IC_fijo_sup'], textos['fijo'])
+    else:
+        combinado = (aleatorio['efecto_combinado'], aleatorio['IC_95_combinado_inf'],
+                     aleatorio['IC_95_combinado_sup'], f"{textos['aleatorio']} ({metodo})")
+    combinado = combinado[:3] + (f"{combinado[3]}, {len(df_estudios)} {textos['estudios']}",)
+    return figura_forest(*filas, combinado, titulo=definicion['resultado'], etiqueta_x=textos[fijo['medida']])
+
+
+def trabajos_forest(definiciones, directorio_salida, modelos=MODELOS, idiomas=IDIOMAS, formatos=FORMATOS,
+                    dpi=300, metodo='REML'):
+    """
+    Genera (sin materializarlos) los trabajos de forest plot de cada
+    resultado × modelo × idioma; cada trabajo escribe todos los `formatos`
+    como `<objetivo>_<resultado>_<modelo>_<idioma>.<formato>`. `dpi` solo se
+    aplica a los formatos de mapa de bits.
+    """
+    for definicion in definiciones:
+        for modelo in modelos:
+            for idioma in idiomas:
+                nombre = f"{definicion['objetivo']}_{definicion['resultado']}_{modelo}_{idioma}"
+                yield {
+                    'nombre': nombre,
+                    'funcion': forest_resultado,
+                    'args': (definicion, modelo, idioma, metodo),
+                    'salidas': [(os.path.join(directorio_salida, f"{nombre}.{formato}"),
+                                 dpi if formato == 'png' else None) for formato in formatos]
+                }
+
+
+def renderizar_forest(directorio_salida="figuras", directorios=DIRECTORIOS_DATOS, raiz=".", modelos=MODELOS,
+                      idiomas=IDIOMAS, formatos=FORMATOS, dpi=300, metodo='REML', procesos=None,
+                      max_pendientes=None, informar=print):
+    """
+    Regenera los forest plots de todos los resultados de `directorios` en
+    todas las combinaciones de modelo, idioma y formato, y escribe el
+    informe de trabajos como figuras.csv.
+
+    Retorna:
+    tupla: (informe, tiempo_total), ver `renderizar`
+    """
+    if metodo not in METODOS_TAU2:
+        raise ValueError(f"Método desconocido: {metodo}")
+    os.makedirs(directorio_salida, exist_ok=True)
+    trabajos = trabajos_forest(descubrir_resultados(directorios, raiz), directorio_salida, modelos, idiomas,
+                               formatos, dpi, metodo)
+    informe, tiempo_total = renderizar(trabajos, procesos, max_pendientes, informar=informar)
+    informe.assign(archivos=informe['archivos'].str.join(';')).to_csv(
+        os.path.join(directorio_salida, 'figuras.csv'), index=False)
+    return informe, tiempo_total
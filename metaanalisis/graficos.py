@@ -0,0 +1,196 @@
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.text import Text
+from matplotlib.transforms import blended_transform_factory
+
+# Tipos de fila de los forest plots combinados (columna `es_combinado`)
+FILA_ESPACIO = -2
+FILA_ENCABEZADO = -1
+FILA_ESTUDIO = 0
+FILA_COMBINADO = 1
+
+
+def dibujar_filas_forest(ax, y, efectos, inferiores, superiores, tipos, colores, tamanos_muestra):
+    """
+    Dibuja todos los intervalos de confianza y marcadores de un forest plot
+    con tres artistas en lugar de dos por fila: una LineCollection para los
+    intervalos, una PathCollection de círculos para los estudios y otra de
+    diamantes para los efectos combinados.
+
+    Parámetros:
+    ax: Ejes de matplotlib
+    y: Posición vertical de cada fila
+    efectos, inferiores, superiores: Efecto e IC de cada fila
+    tipos: Tipo de fila (FILA_ESTUDIO, FILA_COMBINADO; las demás se omiten)
+    colores: Color de cada fila de estudio
+    tamanos_muestra: Tamaño de muestra de cada fila (escala de los círculos)
+
+    Retorna:
+    tupla: (intervalos, marcadores_estudios, marcadores_combinados)
+    """
+    y = np.asarray(y, dtype=float)
+    efectos = np.asarray(efectos, dtype=float)
+    tipos = np.asarray(tipos)
+    colores = np.asarray(colores, dtype=object)
+
+    visibles = tipos >= 0
+    combinados = tipos == FILA_COMBINADO
+    estudios = tipos == FILA_ESTUDIO
+
+    # Intervalos de confianza: un segmento [(inf, y), (sup, y)] por fila
+    segmentos = np.stack([np.column_stack([inferiores, y]), np.column_stack([superiores, y])], axis=1)
+    intervalos = LineCollection(
+        segmentos[visibles],
+        colors=list(np.where(combinados, 'red', colores)[visibles]),
+        linewidths=np.where(combinados, 2, 1.5)[visibles],
+        linestyles=['--' if es_combinado else '-' for es_combinado in combinados[visibles]],
+        zorder=3
+    )
+    ax.add_collection(intervalos)
+
+    # Círculos para estudios individuales, tamaño proporcional a la muestra (entre 30 y 150)
+    tamanos = np.clip(np.asarray(tamanos_muestra, dtype=float) / 5, 30, 150)
+    marcadores_estudios = ax.scatter(efectos[estudios], y[estudios], s=tamanos[estudios],
+                                     c=list(colores[estudios]), edgecolor='black', zorder=4)
+
+    # Diamantes rojos para efectos combinados
+    marcadores_combinados = ax.scatter(efectos[combinados], y[combinados], marker='D', s=100,
+                                       color='red', edgecolor='black', zorder=4)
+
+    return intervalos, marcadores_estudios, marcadores_combinados
+
+
+class BloqueTexto(Text):
+    """
+    Columna de etiquetas dibujada como un único artista de texto multilínea.
+
+    Cada línea corresponde a una fila del forest plot (separadas `paso`
+    unidades de datos en el eje Y). El interlineado se recalcula al dibujar a
+    partir de la altura en píxeles de una fila, por lo que las líneas siguen
+    alineadas con sus filas tras `tight_layout`, `subplots_adjust` o un
+    cambio de dpi al guardar.
+    """
+
+    def __init__(self, x, y_superior, lineas, paso=1.0, **kwargs):
+        kwargs.setdefault('va', 'top')
+        super().__init__(x, y_superior + paso / 2, "\n".join(lineas), **kwargs)
+        self._num_lineas = max(len(lineas), 1)
+        self._paso = paso
+
+    def _ajustar_interlineado(self, renderer):
+        transformacion = self.axes.transData
+        alto_fila = abs(transformacion.transform((0, self._paso))[1] - transformacion.transform((0, 0))[1])
+        self.set_linespacing(1.0)
+        alto_linea = super().get_window_extent(renderer).height / self._num_lineas
+        if alto_linea > 0:
+            self.set_linespacing(alto_fila / alto_linea)
+
+    def get_window_extent(self, renderer=None, dpi=None):
+        if self.axes is not None and renderer is not None:
+            self._ajustar_interlineado(renderer)
+        return super().get_window_extent(renderer, dpi)
+
+    def draw(self, renderer):
+        if self.axes is not None and self.get_visible():
+            self._ajustar_interlineado(renderer)
+        super().draw(renderer)
+
+
+def columna_texto(ax, x, y, textos, estilos, coordenadas_x='datos', paso=1.0, **comunes):
+    """
+    Dibuja una columna de etiquetas agrupando las filas por estilo: cada
+    estilo distinto (negrita, tamaño, cursiva...) se convierte en un único
+    BloqueTexto en el que las filas de otros estilos quedan en blanco.
+
+    Parámetros:
+    ax: Ejes de matplotlib
+    x: Posición horizontal de la columna
+    y: Posición vertical de cada fila (equiespaciadas `paso` unidades)
+    textos: Texto de cada fila ("" o None para dejarla vacía)
+    estilos: Diccionario de propiedades de texto de cada fila
+    coordenadas_x: 'datos' si `x` está en unidades de datos, 'ejes' si es una
+                   fracción del ancho de los ejes
+    comunes: Propiedades de texto compartidas por toda la columna
+
+    Retorna:
+    list: los BloqueTexto creados
+    """
+    y = np.asarray(y, dtype=float)
+    if len(y) == 0:
+        return []
+    y_superior = y.max()
+    indices_linea = np.rint((y_superior - y) / paso).astype(int)
+    num_lineas = indices_linea.max() + 1
+
+    transformacion_x = ax.transData if coordenadas_x == 'datos' else ax.transAxes
+    transformacion = blended_transform_factory(transformacion_x, ax.transData)
+
+    grupos = {}
+    for indice, texto, estilo in zip(indices_linea, textos, estilos):
+        if texto:
+            clave = tuple(sorted(estilo.items()))
+            grupos.setdefault(clave, [""] * num_lineas)[indice] = texto
+
+    bloques = []
+    for clave, lineas in grupos.items():
+        bloque = BloqueTexto(x, y_superior, lineas, paso=paso, transform=transformacion,
+                             clip_on=False, **comunes, **dict(clave))
+        ax.add_artist(bloque)
+        bloques.append(bloque)
+    return bloques
+
+
+def figura_forest(nombres, efectos, inferiores, superiores, tamanos_muestra, combinado, titulo="",
+                  etiqueta_x="g de Hedges", referencia=0.0):
+    """
+    Crea el forest plot de un único resultado sin pasar por pyplot, de modo
+    que puede generarse en procesos de trabajo sin estado global compartido.
+
+    Parámetros:
+    nombres: Nombre de cada estudio
+    efectos, inferiores, superiores: Efecto e IC de cada estudio
+    tamanos_muestra: Tamaño de muestra de cada estudio
+    combinado: Tupla (efecto, inferior, superior, etiqueta) del efecto combinado;
+               puede haber varias en una lista (p. ej. efectos fijos y aleatorios)
+    titulo: Título de la figura
+    etiqueta_x: Etiqueta del eje X
+    referencia: Posición de la línea de no efecto
+
+    Retorna:
+    matplotlib.figure.Figure
+    """
+    combinados = combinado if isinstance(combinado, list) else [combinado]
+    k = len(nombres)
+    num_filas = k + len(combinados)
+
+    y = np.arange(num_filas, 0, -1, dtype=float)
+    tipos = np.r_[np.full(k, FILA_ESTUDIO), np.full(len(combinados), FILA_COMBINADO)]
+    filas_efecto = np.r_[np.asarray(efectos, dtype=float), [c[0] for c in combinados]]
+    filas_inf = np.r_[np.asarray(inferiores, dtype=float), [c[1] for c in combinados]]
+    filas_sup = np.r_[np.asarray(superiores, dtype=float), [c[2] for c in combinados]]
+    tamanos = np.r_[np.asarray(tamanos_muestra, dtype=float), np.zeros(len(combinados))]
+    etiquetas = list(nombres) + [c[3] for c in combinados]
+    textos_efecto = [f"{e:.2f} [{i:.2f}, {s:.2f}]" for e, i, s in zip(filas_efecto, filas_inf, filas_sup)]
+    estilos = [{'fontweight': 'bold' if tipo == FILA_COMBINADO else 'normal'} for tipo in tipos]
+
+    figura = Figure(figsize=(10, max(3.0, 0.4 * num_filas + 1.5)))
+    ax = figura.add_subplot(111)
+    dibujar_filas_forest(ax, y, filas_efecto, filas_inf, filas_sup, tipos, ['tab:blue'] * num_filas, tamanos)
+    ax.axvline(x=referencia, color='black', linestyle='-', lw=0.8, zorder=2)
+
+    finitos = np.isfinite(filas_inf) & np.isfinite(filas_sup)
+    x_min = min(filas_inf[finitos].min(initial=referencia), referencia)
+    x_max = max(filas_sup[finitos].max(initial=referencia), referencia)
+    margen = 0.1 * (x_max - x_min or 1.0)
+    ax.set_xlim(x_min - margen, x_max + margen)
+    ax.set_ylim(0.3, num_filas + 0.7)
+    ax.set_yticks([])
+    ax.set_xlabel(etiqueta_x)
+    ax.set_title(titulo, fontweight='bold')
+    ax.grid(axis='x', linestyle='--', alpha=0.3)
+
+    columna_texto(ax, -0.02, y, etiquetas, estilos, coordenadas_x='ejes', ha='right', fontsize=9)
+    columna_texto(ax, 1.02, y, textos_efecto, estilos, coordenadas_x='ejes', ha='left', fontsize=9)
+    figura.subplots_adjust(left=0.25, right=0.75)
+    return figura
@@ -0,0 +1,219 @@
+"""
+Instrumentación opcional de las etapas del análisis y de los gráficos.
+
+Desactivada por defecto: `etapa` devuelve un contexto nulo compartido y
+`cronometrado` llama directamente a la función, así que el coste es una
+comprobación de un booleano. Se activa con `activar()` o con la variable de
+entorno METAANALISIS_INSTRUMENTAR=1 (METAANALISIS_INSTRUMENTAR=memoria
+activa además tracemalloc para medir el pico de memoria de cada etapa).
+
+    from metaanalisis import instrumentacion
+
+    instrumentacion.activar(memoria=True)
+    with instrumentacion.etapa('extract_results', resultado='HOMA-IR'):
+        ...
+    print(instrumentacion.tabla_informe())
+    instrumentacion.guardar_informe('perfil.json')
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import nullcontext
+
+_NULO = nullcontext()
+
+_activo = False
+_memoria = False
+_bloqueo = threading.Lock()
+_local = threading.local()
+# (ruta de la etapa, resultado) -> [llamadas, total, mínimo, máximo, pico de memoria]
+_etapas = {}
+_contadores = {}
+
+
+def activa():
+    """True si la instrumentación está registrando"""
+    return _activo
+
+
+def activar(memoria=False):
+    """
+    Empieza a registrar tiempos. Con `memoria=True` se inicia tracemalloc
+    (que por sí mismo ralentiza las asignaciones) y se registra el pico de
+    memoria de cada etapa.
+    """
+    global _activo, _memoria
+    _memoria = memoria
+    if memoria and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _activo = True
+
+
+def desactivar():
+    """Deja de registrar; los datos acumulados se conservan hasta `reiniciar`"""
+    global _activo, _memoria
+    _activo = False
+    if _memoria and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _memoria = False
+
+
+def reiniciar():
+    """Borra los tiempos y contadores acumulados"""
+    with _bloqueo:
+        _etapas.clear()
+        _contadores.clear()
+
+
+def _pila():
+    pila = getattr(_local, 'pila', None)
+    if pila is None:
+        pila = _local.pila = []
+    return pila
+
+
+class _Etapa:
+    """Contexto que mide una etapa; las etapas anidadas se registran como 'padre/hija'"""
+
+    __slots__ = ('nombre', 'resultado', 'ruta', 'inicio', 'pico_hijas', 'pico_previo')
+
+    def __init__(self, nombre, resultado):
+        self.nombre = nombre
+        self.resultado = resultado
+
+    def __enter__(self):
+        pila = _pila()
+        padre = pila[-1] if pila else None
+        self.ruta = f"{padre.ruta}/{self.nombre}" if padre else self.nombre
+        if self.resultado is None and padre is not None:
+            self.resultado = padre.resultado
+        self.pico_hijas = 0
+        if _memoria:
+            # tracemalloc solo tiene un pico global: se guarda el acumulado
+            # hasta ahora para que el padre no lo pierda al reiniciarlo
+            self.pico_previo = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+        pila.append(self)
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excepcion):
+        duracion = time.perf_counter() - self.inicio
+        pila = _pila()
+        pila.pop()
+        pico = 0
+        if _memoria and tracemalloc.is_tracing():
+            pico = max(tracemalloc.get_traced_memory()[1], self.pico_hijas)
+            if pila:
+                pila[-1].pico_hijas = max(pila[-1].pico_hijas, pico, self.pico_previo)
+        with _bloqueo:
+            registro = _etapas.get((self.ruta, self.resultado))
+            if registro is None:
+                _etapas[(self.ruta, self.resultado)] = [1, duracion, duracion, duracion, pico]
+            else:
+                registro[0] += 1
+                registro[1] += duracion
+                registro[2] = min(registro[2], duracion)
+                registro[3] = max(registro[3], duracion)
+                registro[4] = max(registro[4], pico)
+        return False
+
+
+def etapa(nombre, resultado=None):
+    """
+    Contexto que mide una etapa. `resultado` etiqueta la medición para el
+    desglose por resultado (las etapas anidadas heredan el del padre).
+    """
+    if not _activo:
+        return _NULO
+    return _Etapa(nombre, resultado)
+
+
+def cronometrado(nombre=None):
+    """Decorador que mide cada llamada a la función como una etapa"""
+    def decorador(funcion):
+        etiqueta = nombre or funcion.__name__
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not _activo:
+                return funcion(*args, **kwargs)
+            with _Etapa(etiqueta, None):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def contar(nombre, cantidad=1):
+    """Suma `cantidad` al contador `nombre` (p. ej. filas dibujadas)"""
+    if not _activo:
+        return
+    with _bloqueo:
+        _contadores[nombre] = _contadores.get(nombre, 0) + cantidad
+
+
+def informe():
+    """
+    Informe estructurado de lo registrado.
+
+    Retorna:
+    dict: 'etapas' (una entrada por etapa y resultado con llamadas, tiempo
+          total, medio, mínimo y máximo en segundos y pico de memoria en
+          bytes), 'contadores' y 'memoria_pico' (pico global de tracemalloc,
+          o None si no se midió la memoria)
+    """
+    with _bloqueo:
+        etapas = [{
+            'etapa': ruta,
+            'resultado': resultado,
+            'llamadas': llamadas,
+            'tiempo_total': total,
+            'tiempo_medio': total / llamadas,
+            'tiempo_min': minimo,
+            'tiempo_max': maximo,
+            'memoria_pico': pico
+        } for (ruta, resultado), (llamadas, total, minimo, maximo, pico) in _etapas.items()]
+        contadores = dict(_contadores)
+    etapas.sort(key=lambda fila: (fila['etapa'], str(fila['resultado'])))
+    picos = [fila['memoria_pico'] for fila in etapas]
+    return {
+        'etapas': etapas,
+        'contadores': contadores,
+        'memoria_pico': max(picos, default=0) if _memoria or any(picos) else None
+    }
+
+
+def guardar_informe(ruta):
+    """Escribe `informe()` como JSON"""
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(informe(), archivo, indent=2, ensure_ascii=False)
+
+
+def tabla_informe(datos=None):
+    """Tabla de texto del informe, con las etapas ordenadas por tiempo total"""
+    datos = datos or informe()
+    filas = sorted(datos['etapas'], key=lambda fila: -fila['tiempo_total'])
+    ancho = max([len("Etapa")] + [len(fila['etapa']) for fila in filas])
+    ancho_resultado = max([len("Resultado")] + [len(str(fila['resultado'] or "")) for fila in filas])
+    lineas = [f"{'Etapa':<{ancho}}  {'Resultado':<{ancho_resultado}}  {'Llamadas':>8}  "
+              f"{'Total (s)':>10}  {'Medio (ms)':>10}  {'Pico (MB)':>9}"]
+    lineas.append("-" * len(lineas[0]))
+    for fila in filas:
+        pico = f"{fila['memoria_pico'] / 2**20:9.2f}" if fila['memoria_pico'] else f"{'-':>9}"
+        lineas.append(f"{fila['etapa']:<{ancho}}  {str(fila['resultado'] or ''):<{ancho_resultado}}  "
+                      f"{fila['llamadas']:>8}  {fila['tiempo_total']:>10.4f}  "
+                      f"{fila['tiempo_medio'] * 1000:>10.3f}  {pico}")
+    for nombre, valor in sorted(datos['contadores'].items()):
+        lineas.append(f"{nombre}: {valor}")
+    if datos['memoria_pico'] is not None:
+        lineas.append(f"Pico de memoria: {datos['memoria_pico'] / 2**20:.2f} MB")
+    return "\n".join(lineas)
+
+
+_variable = os.environ.get('METAANALISIS_INSTRUMENTAR', '').strip().lower()
+if _variable and _variable not in ('0', 'no', 'false'):
+    activar(memoria=_variable == 'memoria')
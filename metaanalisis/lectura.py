@@ -0,0 +1,187 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from metaanalisis.perezoso import pandas as pd
+
+# Directorios con las definiciones de resultados (un CSV por resultado)
+DIRECTORIOS_DATOS = ('obj2/objetivo2', 'obj3/objetivo3')
+
+# Tipo de cada columna de la tabla canónica de estudios
+TIPOS_CANONICOS = {
+    'nombre': str,
+    'intervencion': str,
+    'grupo_control': str,
+    'duracion': str,
+    'n_control': np.int32,
+    'n_intervencion': np.int32,
+    'media_control': np.float64,
+    'media_intervencion': np.float64,
+    'de_control': np.float64,
+    'de_intervencion': np.float64,
+    'eventos_control': np.int32,
+    'eventos_intervencion': np.int32,
+}
+
+# Columnas de texto: se leen si están, pero no identifican el esquema
+COLUMNAS_TEXTO = ('nombre', 'intervencion', 'grupo_control', 'duracion')
+
+# Esquemas de los CSV de resultados: tipo de resultado y equivalencias
+# {columna del archivo: columna canónica}
+ESQUEMAS = {
+    'obj2': ('continuo', {
+        'nombre': 'nombre',
+        'intervencion': 'intervencion',
+        'n_control': 'n_control',
+        'n_intervencion': 'n_intervencion',
+        'media_control': 'media_control',
+        'media_intervencion': 'media_intervencion',
+        'de_control': 'de_control',
+        'de_intervencion': 'de_intervencion',
+    }),
+    'obj3': ('continuo', {
+        'Study': 'nombre',
+        'Intervention_Group': 'intervencion',
+        'Control_Group': 'grupo_control',
+        'Duration': 'duracion',
+        'Control_N': 'n_control',
+        'Intervention_N': 'n_intervencion',
+        'Control_Mean': 'media_control',
+        'Intervention_Mean': 'media_intervencion',
+        'Control_SD': 'de_control',
+        'Intervention_SD': 'de_intervencion',
+    }),
+    'obj2_eventos': ('binario', {
+        'nombre': 'nombre',
+        'intervencion': 'intervencion',
+        'n_control': 'n_control',
+        'n_intervencion': 'n_intervencion',
+        'eventos_control': 'eventos_control',
+        'eventos_intervencion': 'eventos_intervencion',
+    }),
+    'obj3_eventos': ('binario', {
+        'Study': 'nombre',
+        'Intervention_Group': 'intervencion',
+        'Control_Group': 'grupo_control',
+        'Duration': 'duracion',
+        'Control_Total': 'n_control',
+        'Intervention_Total': 'n_intervencion',
+        'Control_Events': 'eventos_control',
+        'Intervention_Events': 'eventos_intervencion',
+    }),
+}
+
+
+def motor_csv():
+    """'pyarrow' si está instalado (lectura multihilo); si no, el motor C de pandas"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return 'c'
+    return 'pyarrow'
+
+
+def detectar_esquema(columnas):
+    """
+    Identifica el esquema de un CSV de resultados por su cabecera.
+
+    Parámetros:
+    columnas: Nombres de las columnas del archivo
+
+    Retorna:
+    str: clave de ESQUEMAS
+    """
+    columnas = set(columnas)
+    for esquema, (_, equivalencias) in ESQUEMAS.items():
+        requeridas = [original for original, canonica in equivalencias.items() if canonica not in COLUMNAS_TEXTO]
+        if columnas.issuperset(requeridas):
+            return esquema
+    raise ValueError(f"Esquema de CSV desconocido: {', '.join(sorted(columnas))}")
+
+
+def leer_resultado(ruta, motor=None):
+    """
+    Lee el CSV de un resultado de obj2/objetivo2 u obj3/objetivo3 como
+    tabla canónica de estudios: detecta el esquema por la cabecera, lee
+    solo las columnas del esquema con tipos explícitos (TIPOS_CANONICOS) y
+    las renombra a los nombres canónicos (nombre, n_control, media_control, ...).
+
+    Parámetros:
+    ruta: Ruta del CSV
+    motor: Motor de pandas.read_csv ('pyarrow' o 'c'; por defecto `motor_csv()`)
+
+    Retorna:
+    tupla: (df, esquema, tipo) con el DataFrame canónico, la clave de
+           ESQUEMAS y 'continuo' o 'binario'
+    """
+    cabecera = pd.read_csv(ruta, nrows=0).columns
+    esquema = detectar_esquema(cabecera)
+    tipo, equivalencias = ESQUEMAS[esquema]
+    columnas = [original for original in equivalencias if original in cabecera]
+    df = pd.read_csv(ruta, usecols=columnas, engine=motor or motor_csv(),
+                     dtype={original: TIPOS_CANONICOS[equivalencias[original]] for original in columnas})
+    return df.rename(columns=equivalencias)[[equivalencias[original] for original in columnas]], esquema, tipo
+
+
+def descubrir_resultados(directorios=DIRECTORIOS_DATOS, raiz="."):
+    """
+    Busca los CSV de resultados en `directorios` y detecta su esquema y su
+    tipo por la cabecera: continuo (medias y desviaciones) o binario (eventos).
+
+    Retorna:
+    list: un diccionario por resultado con 'objetivo', 'resultado', 'tipo' y 'ruta'
+    """
+    definiciones = []
+    for directorio in directorios:
+        ruta_directorio = os.path.join(raiz, directorio)
+        if not os.path.isdir(ruta_directorio):
+            continue
+        objetivo = os.path.normpath(directorio).split(os.sep)[0]
+        for archivo in sorted(os.listdir(ruta_directorio)):
+            if not archivo.endswith('.csv'):
+                continue
+            ruta = os.path.join(ruta_directorio, archivo)
+            try:
+                esquema = detectar_esquema(pd.read_csv(ruta, nrows=0).columns)
+            except ValueError as error:
+                raise ValueError(f"{ruta}: {error}") from None
+            definiciones.append({
+                'objetivo': objetivo,
+                'resultado': archivo[:-len('.csv')],
+                'tipo': ESQUEMAS[esquema][0],
+                'ruta': ruta
+            })
+    return definiciones
+
+
+def _leer_definicion(definicion, motor):
+    df, esquema, tipo = leer_resultado(definicion['ruta'], motor)
+    return {**definicion, 'tipo': tipo, 'esquema': esquema, 'datos': df}
+
+
+def leer_directorio(directorios=DIRECTORIOS_DATOS, raiz=".", hilos=None, motor=None):
+    """
+    Lee todos los CSV de resultados de `directorios` en una sola llamada.
+    Los archivos se leen en paralelo en un pool de hilos (los motores C y
+    pyarrow liberan el GIL mientras parsean), así que añadir un resultado
+    solo requiere dejar su CSV en el directorio.
+
+    Parámetros:
+    directorios: Directorios con los CSV de resultados
+    raiz: Raíz del repositorio
+    hilos: Número de hilos (por defecto uno por archivo, hasta os.cpu_count())
+    motor: Motor de pandas.read_csv (ver `leer_resultado`)
+
+    Retorna:
+    list: un diccionario por resultado con 'objetivo', 'resultado', 'tipo',
+          'ruta', 'esquema' y 'datos' (DataFrame canónico), en el orden de
+          `descubrir_resultados`
+    """
+    definiciones = descubrir_resultados(directorios, raiz)
+    if not definiciones:
+        return []
+    motor = motor or motor_csv()
+    hilos = hilos or max(1, min(len(definiciones), os.cpu_count() or 1))
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        return list(pool.map(_leer_definicion, definiciones, [motor] * len(definiciones)))
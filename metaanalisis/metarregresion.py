@@ -0,0 +1,419 @@
+import itertools
+import math
+import re
+
+import numpy as np
+
+from metaanalisis.distribuciones import valor_p_chi2, valor_p_normal
+from metaanalisis.efecto import Z_95, calcular_tamano_efecto
+from metaanalisis.lectura import leer_directorio
+from metaanalisis.perezoso import pandas as pd
+from metaanalisis.tabla import TablaEstudios
+
+# Estimadores de tau² residual del modelo mixto
+METODOS_METARREGRESION = ('DL', 'REML')
+
+# Permutaciones reajustadas a la vez; acota la memoria de las matrices (bloque, k, k)
+PERMUTACIONES_POR_BLOQUE = 5000
+
+_NUMERO = r'(\d+(?:[.,]\d+)?)'
+_UNIDADES_MG = {'g': 1000.0, 'mg': 1.0, 'mcg': 0.001, 'µg': 0.001}
+_PATRON_DOSIS = re.compile(_NUMERO + r'\s*(mcg|µg|mg|g)\b\s*(?:de\s+)?([\w-]+)?', re.IGNORECASE)
+_PATRON_RAZON = re.compile(_NUMERO + r'\s*:\s*' + _NUMERO + r'\s*myo-inositol\s*:\s*d-chiro', re.IGNORECASE)
+_PATRON_DURACION = re.compile(_NUMERO + r'\s*(mes|meses|month|months|semana|semanas|week|weeks)\b', re.IGNORECASE)
+
+
+def _numero(texto):
+    return float(texto.replace(',', '.'))
+
+
+def parsear_intervencion(texto, duracion=None):
+    """
+    Extrae covariables numéricas de la descripción de una intervención,
+    como las de la columna 'intervencion' de obj2/objetivo2
+    ("1.1 g myo-Inositol + 300 mg D-chiro-Inositol c/24h por 6 meses",
+    "4 g de Inositol en formulacion 40:1 myo-Inositol:D-chiro-Inositol ...")
+    o 'Intervention_Group' de obj3/objetivo3 ("1g Metformina + 1.4g Inositol").
+
+    Parámetros:
+    texto: Descripción de la intervención
+    duracion: Texto de duración aparte (columna 'Duration', p. ej. "6 months");
+              si se omite se busca en `texto`
+
+    Retorna:
+    dict: 'dosis_myo_mg', 'dosis_dci_mg', 'dosis_inositol_mg' (total),
+          'fraccion_myo' (myo / total), 'razon_myo_dci' (NaN sin D-chiro),
+          'meses', 'dosis_metformina_mg', 'acido_folico' y 'dieta'
+    """
+    texto = "" if texto is None or (isinstance(texto, float) and np.isnan(texto)) else str(texto)
+    myo = dci = inositol = metformina = np.nan
+
+    for cantidad, unidad, sustancia in _PATRON_DOSIS.findall(texto):
+        mg = _numero(cantidad) * _UNIDADES_MG[unidad.lower()]
+        sustancia = (sustancia or "").lower()
+        if sustancia.startswith('myo'):
+            myo = mg
+        elif sustancia.startswith('d-chiro'):
+            dci = mg
+        elif sustancia.startswith('inositol'):
+            inositol = mg
+        elif sustancia.startswith('metformina') or sustancia.startswith('metformin'):
+            metformina = mg
+
+    razon = _PATRON_RAZON.search(texto)
+    if razon and np.isfinite(inositol):
+        partes_myo, partes_dci = _numero(razon.group(1)), _numero(razon.group(2))
+        myo = inositol * partes_myo / (partes_myo + partes_dci)
+        dci = inositol * partes_dci / (partes_myo + partes_dci)
+    elif np.isfinite(myo) or np.isfinite(dci):
+        # Formulación explícita: el componente no mencionado vale 0
+        myo = 0.0 if np.isnan(myo) else myo
+        dci = 0.0 if np.isnan(dci) else dci
+        inositol = myo + dci
+
+    meses = np.nan
+    coincidencia = _PATRON_DURACION.search(duracion if duracion is not None else texto)
+    if coincidencia:
+        cantidad, unidad = _numero(coincidencia.group(1)), coincidencia.group(2).lower()
+        meses = cantidad if unidad.startswith(('mes', 'month')) else cantidad * 7 / 30.4375
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'dosis_myo_mg': myo,
+            'dosis_dci_mg': dci,
+            'dosis_inositol_mg': inositol,
+            'fraccion_myo': myo / inositol if inositol > 0 else np.nan,
+            'razon_myo_dci': myo / dci if dci > 0 else np.nan,
+            'meses': meses,
+            'dosis_metformina_mg': metformina,
+            'acido_folico': float('fólico' in texto.lower() or 'folico' in texto.lower()),
+            'dieta': float('dieta' in texto.lower() or 'diet' in texto.lower())
+        }
+
+
+def covariables(df):
+    """
+    Tabla de covariables (una fila por estudio) a partir de un DataFrame
+    con el esquema de obj2/objetivo2 ('intervencion'), el canónico de
+    `leer_resultado` ('intervencion' y 'duracion') o el de obj3/objetivo3
+    ('Intervention_Group' y 'Duration').
+    """
+    if 'intervencion' in df.columns:
+        duraciones = df['duracion'] if 'duracion' in df.columns else [None] * len(df)
+        filas = [parsear_intervencion(texto, duracion) for texto, duracion in zip(df['intervencion'], duraciones)]
+    elif 'Intervention_Group' in df.columns:
+        duraciones = df['Duration'] if 'Duration' in df.columns else [None] * len(df)
+        filas = [parsear_intervencion(texto, duracion) for texto, duracion in zip(df['Intervention_Group'], duraciones)]
+    else:
+        raise ValueError("Faltan columnas de intervención: 'intervencion' o 'Intervention_Group'")
+    return pd.DataFrame(filas, index=df.index)
+
+
+def _matriz_P(w, X, mascara):
+    """
+    Para cada modelo del lote, P = W - W X (X'WX)⁻¹ X'W con W diagonal.
+
+    Retorna:
+    tupla: (P, A_inv) con formas (m, k, k) y (m, p, p)
+    """
+    w = np.where(mascara, w, 0.0)
+    WX = w[:, :, None] * X
+    A_inv = np.linalg.pinv(np.swapaxes(X, 1, 2) @ WX)
+    P = -(WX @ A_inv @ np.swapaxes(WX, 1, 2))
+    indices = np.arange(w.shape[1])
+    P[:, indices, indices] += w
+    return P, A_inv
+
+
+def _ajustar_lote(efectos, varianzas, X, mascara, modelo, metodo, tol=1e-10, max_iter=200):
+    """
+    Ajusta m meta-regresiones a la vez. X tiene forma (m, k, p) y
+    `mascara` (m, k) marca los estudios con todas las covariables del
+    modelo disponibles.
+    """
+    m, k, p = X.shape
+    y = np.where(mascara, efectos, 0.0)
+    v = np.where(mascara, varianzas, 1.0)
+    k_efectivo = mascara.sum(axis=1)
+
+    P0, _ = _matriz_P(1 / v, X, mascara)
+    Py = np.einsum('mij,mj->mi', P0, y)
+    Q_E = np.einsum('mi,mi->m', y, Py)
+    tau2 = np.zeros(m)
+
+    if modelo == 'mixto':
+        traza_P0 = np.trace(P0, axis1=1, axis2=2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tau2 = np.maximum(0.0, (Q_E - (k_efectivo - p)) / traza_P0)
+        tau2 = np.where(np.isfinite(tau2), tau2, 0.0)
+
+        if metodo == 'REML':
+            activos = k_efectivo > p
+            for _ in range(max_iter):
+                if not activos.any():
+                    break
+                P, _ = _matriz_P(1 / (v[activos] + tau2[activos, None]), X[activos], mascara[activos])
+                Py = np.einsum('mij,mj->mi', P, y[activos])
+                # Fisher scoring: Δτ² = (y'PPy - tr P) / tr(PP)
+                puntaje = np.einsum('mi,mi->m', Py, Py) - np.trace(P, axis1=1, axis2=2)
+                informacion = np.einsum('mij,mji->m', P, P)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    nuevo = np.maximum(0.0, tau2[activos] + np.where(informacion > 0, puntaje / informacion, 0.0))
+                cambio = np.abs(nuevo - tau2[activos])
+                tau2[activos] = nuevo
+                indices = np.flatnonzero(activos)
+                activos[indices[cambio < tol]] = False
+
+    w = np.where(mascara, 1 / (v + tau2[:, None]), 0.0)
+    WX = w[:, :, None] * X
+    covarianza = np.linalg.pinv(np.swapaxes(X, 1, 2) @ WX)
+    coeficientes = np.einsum('mpq,mq->mp', covarianza, np.einsum('mkp,mk->mp', WX, y))
+    return coeficientes, covarianza, tau2, Q_E, k_efectivo
+
+
+def metarregresion(efectos, varianzas, moderadores, conjuntos=None, modelo='mixto', metodo='REML',
+                   intercepto=True, z=Z_95):
+    """
+    Meta-regresión por mínimos cuadrados ponderados de efectos fijos o
+    mixtos para muchos conjuntos de moderadores en una sola llamada: los
+    modelos con el mismo número de términos se resuelven juntos con álgebra
+    lineal por lotes (matrices (m, k, p)).
+
+    Los estudios sin valor en alguna covariable de un conjunto se excluyen
+    solo de ese modelo.
+
+    Parámetros:
+    efectos: Efecto de cada estudio (k)
+    varianzas: Varianza de cada estudio (k)
+    moderadores: DataFrame de covariables con una fila por estudio (ver `covariables`)
+    conjuntos: Lista de listas de columnas de `moderadores` que se quieren
+               comparar (por defecto cada columna por separado)
+    modelo: 'fijo' o 'mixto'
+    metodo: Estimador de tau² residual ('DL' o 'REML')
+    intercepto: Si se añade el término independiente
+    z: Valor crítico para los intervalos de confianza
+
+    Retorna:
+    tupla: (comparacion, coeficientes). `comparacion` tiene una fila por
+           conjunto con k, tau², Q_E (heterogeneidad residual), Q_M (prueba
+           conjunta de los moderadores), su valor p y R² (proporción de tau²
+           explicada); `coeficientes` una fila por término con estimación,
+           SE, z, valor p e IC
+    """
+    if modelo not in ('fijo', 'mixto'):
+        raise ValueError(f"Modelo desconocido: {modelo} (use 'fijo' o 'mixto')")
+    if metodo not in METODOS_METARREGRESION:
+        raise ValueError(f"Método desconocido: {metodo} (use {', '.join(METODOS_METARREGRESION)})")
+
+    efectos = np.asarray(efectos, dtype=float)
+    varianzas = np.asarray(varianzas, dtype=float)
+    moderadores = moderadores.reset_index(drop=True)
+    if conjuntos is None:
+        conjuntos = [[columna] for columna in moderadores.columns]
+    conjuntos = [[conjunto] if isinstance(conjunto, str) else list(conjunto) for conjunto in conjuntos]
+    validos = np.isfinite(efectos) & np.isfinite(varianzas)
+
+    # Agrupar los conjuntos por número de términos para apilarlos en un lote
+    grupos = {}
+    for indice, conjunto in enumerate(conjuntos):
+        grupos.setdefault(len(conjunto) + intercepto, []).append(indice)
+
+    comparacion = [None] * len(conjuntos)
+    coeficientes = []
+    for p, indices in grupos.items():
+        m, k = len(indices), len(efectos)
+        X = np.ones((m, k, p))
+        mascara = np.tile(validos, (m, 1))
+        for fila, indice in enumerate(indices):
+            valores = moderadores[conjuntos[indice]].to_numpy(dtype=float)
+            mascara[fila] &= np.isfinite(valores).all(axis=1)
+            X[fila, :, int(intercepto):] = np.where(np.isfinite(valores), valores, 0.0)
+
+        beta, covarianza, tau2, Q_E, k_efectivo = _ajustar_lote(efectos, varianzas, X, mascara, modelo, metodo)
+
+        # Modelo nulo (solo intercepto) con los mismos estudios, para R²
+        _, _, tau2_nulo, _, _ = _ajustar_lote(efectos, varianzas, np.ones((m, k, 1)), mascara, modelo, metodo)
+
+        se = np.sqrt(np.diagonal(covarianza, axis1=1, axis2=2))
+        for fila, indice in enumerate(indices):
+            terminos = (['intercepto'] if intercepto else []) + conjuntos[indice]
+            b = beta[fila, int(intercepto):]
+            cov = covarianza[fila, int(intercepto):, int(intercepto):]
+            Q_M = float(b @ np.linalg.pinv(cov) @ b) if len(b) else np.nan
+            grados_M = len(b)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                R2 = max(0.0, (tau2_nulo[fila] - tau2[fila]) / tau2_nulo[fila] * 100) if tau2_nulo[fila] > 0 else 0.0
+            comparacion[indice] = {
+                'conjunto': " + ".join(conjuntos[indice]),
+                'num_estudios': int(k_efectivo[fila]),
+                'num_terminos': p,
+                'tau2': tau2[fila],
+                'Q_E': Q_E[fila],
+                'df_E': int(k_efectivo[fila] - p),
+                'Q_M': Q_M,
+                'df_M': grados_M,
+                'valor_p_M': valor_p_chi2(Q_M, grados_M),
+                'R_cuadrado': R2 if modelo == 'mixto' else np.nan
+            }
+            for termino, estimacion, error in zip(terminos, beta[fila], se[fila]):
+                coeficientes.append({
+                    'conjunto': " + ".join(conjuntos[indice]),
+                    'termino': termino,
+                    'estimacion': estimacion,
+                    'se': error,
+                    'z': estimacion / error,
+                    'valor_p': valor_p_normal(estimacion / error),
+                    'IC_95_inferior': estimacion - z * error,
+                    'IC_95_superior': estimacion + z * error
+                })
+
+    return pd.DataFrame(comparacion), pd.DataFrame(coeficientes)
+
+
+def matriz_permutaciones(k, num_permutaciones=10_000, semilla=None):
+    """
+    Matriz (P × k) de índices de permutación de los estudios. Si k! no
+    supera `num_permutaciones` se enumeran todas las permutaciones (la
+    primera fila es la identidad); si no, se sortean P permutaciones.
+
+    Retorna:
+    tupla: (indices, exacta)
+    """
+    if math.factorial(k) <= num_permutaciones:
+        return np.array(list(itertools.permutations(range(k))), dtype=np.intp).reshape(-1, k), True
+    rng = np.random.default_rng(semilla)
+    return rng.permuted(np.tile(np.arange(k, dtype=np.intp), (num_permutaciones, 1)), axis=1), False
+
+
+def _estadisticos_moderadores(efectos, varianzas, X, modelo, metodo, intercepto):
+    """Q_M y z de cada término para un lote de matrices de diseño (m, k, p)"""
+    mascara = np.ones(X.shape[:2], dtype=bool)
+    beta, covarianza, _, _, _ = _ajustar_lote(efectos, varianzas, X, mascara, modelo, metodo)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = beta / np.sqrt(np.diagonal(covarianza, axis1=1, axis2=2))
+    b = beta[:, int(intercepto):]
+    cov = covarianza[:, int(intercepto):, int(intercepto):]
+    Q_M = np.einsum('mp,mpq,mq->m', b, np.linalg.pinv(cov), b)
+    return Q_M, z
+
+
+def prueba_permutacion(efectos, varianzas, moderadores, conjunto, num_permutaciones=10_000, modelo='mixto',
+                       metodo='REML', intercepto=True, semilla=None):
+    """
+    Prueba de permutación de los moderadores de una meta-regresión, más
+    fiable que la chi² asintótica con pocos estudios.
+
+    Las covariables se permutan entre estudios con una matriz de índices
+    (P × k) precalculada (ver `matriz_permutaciones`) y las P regresiones
+    ponderadas se reajustan en lotes de PERMUTACIONES_POR_BLOQUE. Con k
+    pequeño (k! <= num_permutaciones) se enumeran todas las permutaciones y
+    el valor p es exacto; si no, se usa (1 + #{T* >= T}) / (P + 1).
+
+    Parámetros:
+    efectos: Efecto de cada estudio (k)
+    varianzas: Varianza de cada estudio (k)
+    moderadores: DataFrame de covariables con una fila por estudio
+    conjunto: Columna o lista de columnas de `moderadores`
+    num_permutaciones: Número máximo de permutaciones
+    modelo: 'fijo' o 'mixto'
+    metodo: Estimador de tau² residual ('DL' o 'REML')
+    intercepto: Si se añade el término independiente
+    semilla: Semilla para reproducir el resultado
+
+    Retorna:
+    tupla: (resumen, coeficientes). `resumen` es un dict con Q_M, su valor
+           p asintótico y por permutación, el número de permutaciones y si
+           la enumeración fue exacta; `coeficientes` tiene una fila por
+           término con z, valor p asintótico y por permutación
+    """
+    if modelo not in ('fijo', 'mixto'):
+        raise ValueError(f"Modelo desconocido: {modelo} (use 'fijo' o 'mixto')")
+    if metodo not in METODOS_METARREGRESION:
+        raise ValueError(f"Método desconocido: {metodo} (use {', '.join(METODOS_METARREGRESION)})")
+
+    conjunto = [conjunto] if isinstance(conjunto, str) else list(conjunto)
+    efectos = np.asarray(efectos, dtype=float)
+    varianzas = np.asarray(varianzas, dtype=float)
+    valores = moderadores.reset_index(drop=True)[conjunto].to_numpy(dtype=float)
+    validos = np.isfinite(efectos) & np.isfinite(varianzas) & np.isfinite(valores).all(axis=1)
+    efectos, varianzas, valores = efectos[validos], varianzas[validos], valores[validos]
+
+    k = len(efectos)
+    X = np.column_stack([np.ones(k)] * int(intercepto) + [valores])
+    terminos = (['intercepto'] if intercepto else []) + conjunto
+    resumen = {
+        'conjunto': " + ".join(conjunto),
+        'num_estudios': k,
+        'Q_M': np.nan,
+        'valor_p_M': np.nan,
+        'valor_p_M_permutacion': np.nan,
+        'num_permutaciones': 0,
+        'exacta': False
+    }
+    if k <= X.shape[1]:
+        coeficientes = pd.DataFrame({'conjunto': resumen['conjunto'], 'termino': terminos,
+                                     'z': np.nan, 'valor_p': np.nan, 'valor_p_permutacion': np.nan})
+        return resumen, coeficientes
+
+    Q_M, z = _estadisticos_moderadores(efectos, varianzas, X[None], modelo, metodo, intercepto)
+    Q_M, z = Q_M[0], z[0]
+
+    indices, exacta = matriz_permutaciones(k, num_permutaciones, semilla)
+    # Tolerancia relativa para contar como empates las permutaciones que
+    # reproducen el diseño observado (covariables repetidas)
+    umbral_Q = Q_M - 1e-8 * max(1.0, abs(Q_M))
+    umbral_z = np.abs(z) - 1e-8 * np.maximum(1.0, np.abs(z))
+    mayores_Q = 0
+    mayores_z = np.zeros(len(terminos))
+    for inicio in range(0, len(indices), PERMUTACIONES_POR_BLOQUE):
+        bloque = indices[inicio:inicio + PERMUTACIONES_POR_BLOQUE]
+        Q_perm, z_perm = _estadisticos_moderadores(efectos, varianzas, X[bloque], modelo, metodo, intercepto)
+        mayores_Q += int((Q_perm >= umbral_Q).sum())
+        mayores_z += (np.abs(z_perm) >= umbral_z).sum(axis=0)
+
+    if exacta:
+        valor_p_Q, valores_p_z = mayores_Q / len(indices), mayores_z / len(indices)
+    else:
+        valor_p_Q, valores_p_z = (1 + mayores_Q) / (len(indices) + 1), (1 + mayores_z) / (len(indices) + 1)
+
+    resumen.update({
+        'Q_M': Q_M,
+        'valor_p_M': valor_p_chi2(Q_M, X.shape[1] - int(intercepto)),
+        'valor_p_M_permutacion': valor_p_Q,
+        'num_permutaciones': len(indices),
+        'exacta': exacta
+    })
+    coeficientes = pd.DataFrame({
+        'conjunto': resumen['conjunto'],
+        'termino': terminos,
+        'z': z,
+        'valor_p': valor_p_normal(z),
+        'valor_p_permutacion': valores_p_z
+    })
+    # La permutación no dice nada del intercepto
+    if intercepto:
+        coeficientes.loc[0, 'valor_p_permutacion'] = np.nan
+    return resumen, coeficientes
+
+
+def prueba_permutacion_directorio(directorio='obj2/objetivo2', conjunto='meses', num_permutaciones=10_000,
+                                  modelo='mixto', metodo='REML', semilla=None, raiz="."):
+    """
+    Ejecuta `prueba_permutacion` sobre el g de Hedges de cada CSV de
+    resultados continuos de `directorio`, con un flujo aleatorio
+    independiente por resultado derivado de `semilla`.
+
+    Retorna:
+    DataFrame: una fila por resultado con el resumen de la prueba
+    """
+    definiciones = [definicion for definicion in leer_directorio([directorio], raiz)
+                    if definicion['tipo'] == 'continuo']
+    semillas = np.random.SeedSequence(semilla).spawn(len(definiciones))
+    filas = []
+    for definicion, semilla_resultado in zip(definiciones, semillas):
+        df = definicion['datos']
+        _, df_estudios = calcular_tamano_efecto(TablaEstudios.desde_dataframe(df))
+        resumen, _ = prueba_permutacion(df_estudios['g_hedges'], df_estudios['se_g_hedges']**2, covariables(df),
+                                        conjunto, num_permutaciones, modelo, metodo, semilla=semilla_resultado)
+        filas.append({'resultado': definicion['resultado'], **resumen})
+    return pd.DataFrame(filas)
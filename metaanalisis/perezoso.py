@@ -0,0 +1,67 @@
+"""
+Importación diferida de pandas y matplotlib.
+
+Los caminos de cálculo solo necesitan numpy; pandas se carga la primera
+vez que se usa un atributo de `pd` (al pedir un DataFrame) y pyplot la
+primera vez que se dibuja. Los módulos escriben
+
+    from metaanalisis.perezoso import pandas as pd
+
+y usan `pd` como siempre.
+"""
+
+import importlib
+import os
+import sys
+import types
+
+
+def sin_pantalla():
+    """True si no hay servidor gráfico (Linux sin DISPLAY ni WAYLAND_DISPLAY)"""
+    return (sys.platform.startswith('linux')
+            and not os.environ.get('DISPLAY') and not os.environ.get('WAYLAND_DISPLAY'))
+
+
+def usar_agg_sin_pantalla():
+    """
+    Selecciona el backend Agg cuando no hay pantalla y el usuario no eligió
+    otro con MPLBACKEND, para no cargar backends gráficos que no se pueden usar.
+    """
+    if sin_pantalla() and not os.environ.get('MPLBACKEND'):
+        import matplotlib
+        matplotlib.use('Agg')
+
+
+class ModuloPerezoso(types.ModuleType):
+    """
+    Sustituto de un módulo que lo importa en el primer acceso a un atributo.
+    `al_cargar` se llama una vez justo antes de la importación.
+    """
+
+    def __init__(self, nombre, al_cargar=None):
+        super().__init__(nombre)
+        self.__dict__['_al_cargar'] = al_cargar
+
+    def _cargar(self):
+        al_cargar = self.__dict__.pop('_al_cargar', None)
+        if al_cargar is not None:
+            al_cargar()
+        return importlib.import_module(self.__name__)
+
+    def __getattr__(self, atributo):
+        return getattr(self._cargar(), atributo)
+
+    def __repr__(self):
+        estado = "cargado" if self.__name__ in sys.modules else "sin cargar"
+        return f"<módulo diferido {self.__name__!r} ({estado})>"
+
+
+def es_dataframe(objeto):
+    """isinstance(objeto, pandas.DataFrame) sin importar pandas si aún no se cargó"""
+    pandas = sys.modules.get('pandas')
+    return pandas is not None and isinstance(objeto, pandas.DataFrame)
+
+
+pandas = ModuloPerezoso('pandas')
+pyplot = ModuloPerezoso('matplotlib.pyplot', al_cargar=usar_agg_sin_pantalla)
+patches = ModuloPerezoso('matplotlib.patches')
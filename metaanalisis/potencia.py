@@ -0,0 +1,167 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+
+from metaanalisis.aleatorios import combinar_efectos_aleatorios
+from metaanalisis.efecto import _columnas_de_estudios, columnas_hedges
+from metaanalisis.perezoso import pandas as pd
+
+# Simulaciones procesadas a la vez en cada punto de la rejilla
+SIMULACIONES_POR_BLOQUE = 50_000
+
+
+def _simular_punto(n_por_grupo, efecto_verdadero, num_simulaciones, existentes, modelo, metodo, z, semilla):
+    """
+    Simula `num_simulaciones` estudios nuevos con `n_por_grupo` pacientes por
+    grupo y diferencia estandarizada verdadera `efecto_verdadero`, los añade
+    a los estudios existentes y vuelve a combinar cada meta-análisis.
+
+    Las estadísticas resumidas del estudio nuevo se simulan en la escala
+    estandarizada (DE = 1): medias N(0, 1/n) y N(δ, 1/n) y varianzas
+    χ²(n-1)/(n-1).
+
+    Retorna:
+    dict: fila de la tabla de potencia
+    """
+    rng = np.random.default_rng(semilla)
+    g_existentes, var_existentes = existentes
+    suma_pesos = (1 / var_existentes).sum()
+    suma_wy = (g_existentes / var_existentes).sum()
+    if modelo == 'fijo':
+        significativo_actual = abs(suma_wy) / np.sqrt(suma_pesos) > z
+    else:
+        actual = combinar_efectos_aleatorios(g_existentes, var_existentes, metodo)
+        significativo_actual = abs(actual['efecto_combinado'] / actual['se_combinado']) > z
+
+    significativos = 0
+    cambios = 0
+    suma_efectos = 0.0
+    for inicio in range(0, num_simulaciones, SIMULACIONES_POR_BLOQUE):
+        b = min(SIMULACIONES_POR_BLOQUE, num_simulaciones - inicio)
+        columnas = columnas_hedges(
+            n_por_grupo, n_por_grupo,
+            rng.normal(0.0, 1 / np.sqrt(n_por_grupo), b),
+            rng.normal(efecto_verdadero, 1 / np.sqrt(n_por_grupo), b),
+            np.sqrt(rng.chisquare(n_por_grupo - 1, b) / (n_por_grupo - 1)),
+            np.sqrt(rng.chisquare(n_por_grupo - 1, b) / (n_por_grupo - 1))
+        )
+        g_nuevo = columnas['g_hedges']
+        var_nueva = columnas['se_g_hedges']**2
+
+        if modelo == 'fijo':
+            # Con efectos fijos basta con sumar el estudio nuevo a los totales existentes
+            pesos = suma_pesos + 1 / var_nueva
+            efecto = (suma_wy + g_nuevo / var_nueva) / pesos
+            se = np.sqrt(1 / pesos)
+        else:
+            efectos = np.column_stack([np.broadcast_to(g_existentes, (b, len(g_existentes))), g_nuevo])
+            varianzas = np.column_stack([np.broadcast_to(var_existentes, (b, len(var_existentes))), var_nueva])
+            ajuste = combinar_efectos_aleatorios(efectos, varianzas, metodo)
+            efecto, se = ajuste['efecto_combinado'], ajuste['se_combinado']
+
+        significativo = np.abs(efecto / se) > z
+        significativos += int(significativo.sum())
+        cambios += int((significativo != significativo_actual).sum())
+        suma_efectos += float(efecto.sum())
+
+    return {
+        'n_por_grupo': n_por_grupo,
+        'efecto_verdadero': efecto_verdadero,
+        'potencia': significativos / num_simulaciones,
+        'prob_cambio': cambios / num_simulaciones,
+        'efecto_medio': suma_efectos / num_simulaciones,
+        'significativo_actual': bool(significativo_actual),
+        'simulaciones': num_simulaciones
+    }
+
+
+def simular_potencia(estudios, tamanos, efectos_verdaderos, num_simulaciones=10_000, modelo='fijo',
+                     metodo='DL', alfa=0.05, semilla=None, procesos=1):
+    """
+    Planificador de potencia por Monte Carlo: ¿con cuántos pacientes un
+    estudio nuevo haría significativo (o dejaría de hacerlo) el efecto
+    combinado de una categoría?
+
+    Para cada punto de la rejilla (tamaño por grupo × efecto verdadero) se
+    simulan `num_simulaciones` estudios nuevos y se vuelve a combinar cada
+    meta-análisis de forma vectorizada sobre el eje de simulación. Cada
+    punto usa su propio flujo aleatorio derivado de `semilla`, por lo que el
+    resultado no depende del número de procesos.
+
+    Parámetros:
+    estudios: Lista de diccionarios de la categoría (p. ej. `homa_estudios`) o TablaEstudios
+    tamanos: Tamaños por grupo del estudio nuevo
+    efectos_verdaderos: Diferencias estandarizadas verdaderas del estudio nuevo
+    num_simulaciones: Meta-análisis simulados por punto de la rejilla
+    modelo: 'fijo' o 'aleatorio'
+    metodo: Estimador de tau² para el modelo de efectos aleatorios (DL por
+            defecto: forma cerrada, sin iteraciones por simulación)
+    alfa: Nivel de significación bilateral
+    semilla: Semilla para reproducir el resultado
+    procesos: Número de procesos para repartir los puntos de la rejilla
+              (None para usar todos los núcleos)
+
+    Retorna:
+    DataFrame: una fila por punto con 'potencia' (proporción de meta-análisis
+               significativos), 'prob_cambio' (proporción en que cambia la
+               significación respecto a la actual) y 'efecto_medio'
+    """
+    if modelo not in ('fijo', 'aleatorio'):
+        raise ValueError(f"Modelo desconocido: {modelo} (use 'fijo' o 'aleatorio')")
+
+    columnas = columnas_hedges(**_columnas_de_estudios(estudios))
+    existentes = (columnas['g_hedges'], columnas['se_g_hedges']**2)
+    z = NormalDist().inv_cdf(1 - alfa / 2)
+
+    rejilla = [(int(n), float(efecto)) for n in tamanos for efecto in efectos_verdaderos]
+    semillas = np.random.SeedSequence(semilla).spawn(len(rejilla))
+    argumentos = [(n, efecto, num_simulaciones, existentes, modelo, metodo, z, semilla_punto)
+                  for (n, efecto), semilla_punto in zip(rejilla, semillas)]
+
+    procesos = procesos or os.cpu_count() or 1
+    if procesos > 1 and len(rejilla) > 1:
+        with ProcessPoolExecutor(max_workers=min(procesos, len(rejilla))) as pool:
+            filas = list(pool.map(_simular_punto, *zip(*argumentos)))
+    else:
+        filas = [_simular_punto(*args) for args in argumentos]
+
+    return pd.DataFrame(filas)
+
+
+def tamano_necesario(df_potencia, potencia_objetivo=0.8, columna='potencia'):
+    """
+    Menor tamaño por grupo que alcanza `potencia_objetivo` para cada efecto
+    verdadero (NaN si ningún tamaño de la rejilla lo alcanza).
+    """
+    alcanzan = df_potencia[df_potencia[columna] >= potencia_objetivo]
+    minimos = alcanzan.groupby('efecto_verdadero')['n_por_grupo'].min()
+    efectos = np.sort(df_potencia['efecto_verdadero'].unique())
+    return minimos.reindex(efectos).rename('n_por_grupo').reset_index()
+
+
+def figura_potencia(df_potencia, titulo="Potencia del meta-análisis con un estudio nuevo", columna='potencia',
+                    potencia_objetivo=0.8):
+    """
+    Curvas de potencia: una línea por efecto verdadero frente al tamaño por
+    grupo del estudio nuevo.
+
+    Retorna:
+    matplotlib.figure.Figure
+    """
+    from matplotlib.figure import Figure
+
+    figura = Figure(figsize=(8, 5))
+    ax = figura.add_subplot(111)
+    for efecto, curva in df_potencia.groupby('efecto_verdadero'):
+        curva = curva.sort_values('n_por_grupo')
+        ax.plot(curva['n_por_grupo'], curva[columna], marker='o', ms=3, label=f"δ = {efecto:g}")
+    ax.axhline(potencia_objetivo, color='gray', linestyle='--', lw=1)
+    ax.set_ylim(0, 1)
+    ax.set_xlabel('Pacientes por grupo del estudio nuevo')
+    ax.set_ylabel('Potencia' if columna == 'potencia' else 'Probabilidad de cambio')
+    ax.set_title(titulo, fontweight='bold')
+    ax.grid(linestyle='--', alpha=0.3)
+    ax.legend(title='Efecto verdadero', fontsize=8)
+    return figura
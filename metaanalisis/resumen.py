@@ -0,0 +1,217 @@
+"""
+Reproducción en Python de obj3/meta_analisis_resumen.csv (generado por
+obj3/ejecutar_analisis_completo.R) y comprobación contra el CSV de R:
+
+    python -m metaanalisis resumen [--salida resumen.csv] [--comparar obj3/meta_analisis_resumen.csv]
+
+Cada resultado se combina como `metacont`/`metabin` con method.tau = "REML"
+y hakn = TRUE: efectos aleatorios REML con el error estándar de
+Hartung–Knapp y el intervalo y el valor p de una t con k - 1 grados de
+libertad.
+"""
+
+import numpy as np
+
+from metaanalisis.aleatorios import combinar_efectos_aleatorios
+from metaanalisis.binario import efectos_binarios
+from metaanalisis.efecto import Z_95
+from metaanalisis.lectura import descubrir_resultados, leer_resultado
+from metaanalisis.perezoso import pandas as pd
+
+# Etiquetas de los resultados de obj3 en meta_analisis_resumen.csv
+# (Outcome, Outcome_es), en la tabla HTML (Variable) y sufijos de los forest
+# plots con la medida de cada uno, en el orden de ejecutar_analisis_completo.R
+RESULTADOS_OBJ3 = {
+    'imc': {'outcome': "IMC", 'outcome_es': "IMC", 'variable': "IMC (kg/m²)",
+            'forest': (('imc', 'MD'),)},
+    'homa-ir': {'outcome': "HOMA-IR", 'outcome_es': "HOMA-IR", 'variable': "HOMA-IR",
+                'forest': (('homa', 'MD'),)},
+    'glucosa-ayunas': {'outcome': "Glucosa Ayunas", 'outcome_es': "Glucosa en Ayunas",
+                       'variable': "Glucosa en ayunas (mg/dL)", 'forest': (('glucosa', 'MD'),)},
+    'insulina-ayunas': {'outcome': "Insulina Ayunas", 'outcome_es': "Insulina en Ayunas",
+                        'variable': "Insulina en ayunas (µIU/mL)", 'forest': (('insulina', 'MD'),)},
+    'regularizacion-ciclo-menstrual': {'outcome': "Regularización Menstrual (RR)",
+                                       'outcome_es': "Regularización Menstrual (RR)",
+                                       'variable': "Regularización del ciclo menstrual (OR)",
+                                       'forest': (('ciclo_rr', 'RR'), ('ciclo_or', 'OR'))}
+}
+
+# Medida del resumen CSV para cada tipo de resultado
+MEDIDA_RESUMEN = {'continuo': 'MD', 'binario': 'RR'}
+NOMBRES_MEDIDAS = {'MD': "Diferencia de Medias", 'RR': "Riesgo Relativo", 'OR': "Odds Ratio"}
+
+COLUMNAS_NUMERICAS = ('Efecto', 'Lower', 'Upper', 'Pvalue', 'I2')
+COLUMNAS_TEXTO = ('Medida', 'Outcome_es', 'Estimador', 'Significativo', 'Heterogeneidad', 'Medida_es')
+
+# Filas del CSV de R que no se pueden reproducir con los datos actuales. La
+# fila RR se generó con otra versión de regularizacion-ciclo-menstrual.csv:
+# la tabla HTML de tabla.R (OR, 3 estudios, 163 participantes) sí coincide
+# con los datos actuales.
+DIVERGENCIAS_CONOCIDAS = {
+    "Regularización Menstrual (RR)": "El CSV de R es anterior a los datos actuales del ciclo menstrual"
+}
+
+
+def heterogeneidad(I2):
+    """Interpretación de I² (como fracción) de ejecutar_analisis_completo.R"""
+    return "Baja" if I2 < 0.25 else "Moderada" if I2 < 0.5 else "Alta"
+
+
+def combinar_medida(efectos, varianzas, metodo='REML', hartung_knapp=True):
+    """
+    Efectos aleatorios de un vector de efectos con el intervalo y el valor p
+    de `meta` en R, y las filas por estudio para el forest plot.
+
+    Parámetros:
+    efectos, varianzas: Efecto y varianza de cada estudio
+    metodo: Estimador de tau²
+    hartung_knapp: Si es True (hakn = TRUE) se usa el error estándar de
+                   Hartung–Knapp con una t de k - 1 grados de libertad; si no,
+                   el error estándar habitual con la normal
+
+    Retorna:
+    dict: 'efecto', 'inferior', 'superior', 'pvalor', 'tau2', 'Q', 'I2'
+          (fracción) y 'estudios' (efecto, inferior y superior por estudio)
+    """
+    efectos = np.asarray(efectos, dtype=float)
+    varianzas = np.asarray(varianzas, dtype=float)
+    # Con un solo estudio no hay grados de libertad para la t: se usa la normal
+    intervalo = 'hksj' if hartung_knapp and len(efectos) > 1 else 'z'
+    combinado = combinar_efectos_aleatorios(efectos, varianzas, metodo, Z_95, intervalo=intervalo)
+    efecto = combinado['efecto_combinado']
+
+    se_estudios = np.sqrt(varianzas)
+    return {
+        'efecto': efecto,
+        'inferior': combinado['IC_95_combinado_inf'],
+        'superior': combinado['IC_95_combinado_sup'],
+        'pvalor': combinado['valor_p'],
+        'tau2': combinado['tau2'],
+        'Q': combinado['Q'],
+        'I2': combinado['I_cuadrado'] / 100,
+        'estudios': {
+            'efecto': efectos,
+            'inferior': efectos - Z_95 * se_estudios,
+            'superior': efectos + Z_95 * se_estudios
+        }
+    }
+
+
+def combinar_csv(ruta, metodo='REML', hartung_knapp=True):
+    """
+    Combina un CSV de obj3: MD para resultados continuos, log RR y log OR
+    para binarios, más los totales y las medias (o proporciones) por grupo
+    de la tabla resumen de tabla.R.
+
+    Retorna:
+    dict: 'tipo', 'num_estudios', 'participantes', 'media_intervencion',
+          'media_control' y 'medidas' (medida -> `combinar_medida`, con el
+          nombre y el tamaño de cada estudio)
+    """
+    df, _, tipo = leer_resultado(ruta)
+    n_total = (df['n_intervencion'] + df['n_control']).to_numpy(dtype=float)
+    resultado = {'tipo': tipo, 'num_estudios': len(df), 'participantes': int(n_total.sum()), 'medidas': {}}
+
+    if tipo == 'binario':
+        for medida in ('RR', 'OR'):
+            efectos, varianzas = efectos_binarios(df['eventos_intervencion'], df['n_intervencion'],
+                                                  df['eventos_control'], df['n_control'], medida)
+            resultado['medidas'][medida] = combinar_medida(efectos, varianzas, metodo, hartung_knapp)
+        resultado['media_intervencion'] = df['eventos_intervencion'].sum() / df['n_intervencion'].sum()
+        resultado['media_control'] = df['eventos_control'].sum() / df['n_control'].sum()
+    else:
+        efectos = (df['media_intervencion'] - df['media_control']).to_numpy()
+        varianzas = (df['de_intervencion']**2 / df['n_intervencion']
+                     + df['de_control']**2 / df['n_control']).to_numpy()
+        resultado['medidas']['MD'] = combinar_medida(efectos, varianzas, metodo, hartung_knapp)
+        resultado['media_intervencion'] = np.average(df['media_intervencion'], weights=df['n_intervencion'])
+        resultado['media_control'] = np.average(df['media_control'], weights=df['n_control'])
+
+    for datos in resultado['medidas'].values():
+        datos['estudios'].update(nombre=df['nombre'].tolist(), n_total=n_total)
+    return resultado
+
+
+def fila_resumen(clave, resultado):
+    """Fila de meta_analisis_resumen.csv para un resultado de `combinar_csv`"""
+    etiquetas = RESULTADOS_OBJ3.get(clave, {'outcome': clave, 'outcome_es': clave})
+    medida = MEDIDA_RESUMEN[resultado['tipo']]
+    datos = resultado['medidas'][medida]
+    return {
+        'Outcome': etiquetas['outcome'],
+        'Efecto': datos['efecto'],
+        'Lower': datos['inferior'],
+        'Upper': datos['superior'],
+        'Medida': medida,
+        'Pvalue': datos['pvalor'],
+        'I2': datos['I2'],
+        'Outcome_es': etiquetas['outcome_es'],
+        'Estimador': f"{datos['efecto']:.2f} [{datos['inferior']:.2f}, {datos['superior']:.2f}]",
+        'Significativo': "Sí" if datos['pvalor'] < 0.05 else "No",
+        'Heterogeneidad': heterogeneidad(datos['I2']),
+        'Medida_es': NOMBRES_MEDIDAS[medida]
+    }
+
+
+def resultados_obj3(raiz="."):
+    """
+    CSV de obj3/objetivo3 en el orden de ejecutar_analisis_completo.R (los
+    que no conoce ese script van después, por orden alfabético).
+
+    Retorna:
+    list: tuplas (clave, definicion) con las definiciones de `descubrir_resultados`
+    """
+    definiciones = {definicion['resultado']: definicion
+                    for definicion in descubrir_resultados(('obj3/objetivo3',), raiz)}
+    claves = [clave for clave in RESULTADOS_OBJ3 if clave in definiciones]
+    claves += sorted(set(definiciones) - set(claves))
+    return [(clave, definiciones[clave]) for clave in claves]
+
+
+def resumen_obj3(raiz=".", metodo='REML', hartung_knapp=True):
+    """
+    Calcula meta_analisis_resumen.csv a partir de los CSV de obj3/objetivo3.
+
+    Retorna:
+    DataFrame con las columnas del CSV de R y una fila por resultado
+    """
+    filas = [fila_resumen(clave, combinar_csv(definicion['ruta'], metodo, hartung_knapp))
+             for clave, definicion in resultados_obj3(raiz)]
+    return pd.DataFrame(filas)
+
+
+def comparar_resumen(resumen, referencia, tolerancia=1e-4):
+    """
+    Compara un resumen con el CSV de R celda a celda: las columnas numéricas
+    con tolerancia relativa y absoluta `tolerancia`, las de texto exactas.
+
+    Parámetros:
+    resumen: DataFrame de `resumen_obj3`
+    referencia: Ruta del CSV de R o DataFrame
+    tolerancia: Diferencia admitida en las columnas numéricas
+
+    Retorna:
+    DataFrame con una fila por resultado y columna: 'Outcome', 'columna',
+    'python', 'r', 'diferencia', 'coincide' y 'conocida' (motivo si es una
+    divergencia de DIVERGENCIAS_CONOCIDAS)
+    """
+    if isinstance(referencia, str):
+        referencia = pd.read_csv(referencia)
+    python = resumen.set_index('Outcome')
+    r = referencia.set_index('Outcome')
+    filas = []
+    for outcome in r.index.union(python.index, sort=False):
+        for columna in COLUMNAS_NUMERICAS + COLUMNAS_TEXTO:
+            valor_python = python[columna].get(outcome) if columna in python else None
+            valor_r = r[columna].get(outcome) if columna in r else None
+            if valor_python is None or valor_r is None:
+                diferencia, coincide = np.nan, False
+            elif columna in COLUMNAS_NUMERICAS:
+                diferencia = float(valor_python) - float(valor_r)
+                coincide = bool(np.isclose(float(valor_python), float(valor_r), rtol=tolerancia, atol=tolerancia))
+            else:
+                diferencia, coincide = np.nan, str(valor_python) == str(valor_r)
+            filas.append({'Outcome': outcome, 'columna': columna, 'python': valor_python, 'r': valor_r,
+                          'diferencia': diferencia, 'coincide': coincide,
+                          'conocida': DIVERGENCIAS_CONOCIDAS.get(outcome) if not coincide else None})
+    return pd.DataFrame(filas)
@@ -0,0 +1,135 @@
+import numpy as np
+
+from metaanalisis.aleatorios import combinar_efectos_aleatorios
+from metaanalisis.efecto import Z_95
+from metaanalisis.perezoso import pandas as pd
+
+# Modelos disponibles para el análisis de sensibilidad
+MODELOS = ('fijo', 'aleatorio')
+
+
+def _dejar_uno_fuera_fijo(efectos, pesos, z):
+    """
+    Efecto combinado de efectos fijos omitiendo cada estudio, a partir de
+    los totales del análisis completo. Se usa la forma centrada (Welford
+    inversa) en lugar de Σw·y² - (Σw·y)²/Σw para no perder precisión:
+
+        W₋ᵢ = W - wᵢ
+        μ₋ᵢ = μ - wᵢ(yᵢ - μ) / W₋ᵢ
+        Q₋ᵢ = Q - wᵢ(yᵢ - μ)² · W / W₋ᵢ
+    """
+    suma_pesos = pesos.sum()
+    media = np.dot(pesos, efectos) / suma_pesos
+    desviacion = efectos - media
+    Q = np.dot(pesos, desviacion**2)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        suma_sin = suma_pesos - pesos
+        efecto = media - pesos * desviacion / suma_sin
+        Q_sin = np.maximum(0.0, Q - pesos * desviacion**2 * suma_pesos / suma_sin)
+        se = np.sqrt(1 / suma_sin)
+        df = len(efectos) - 2
+        I_cuadrado = np.where((df > 0) & (Q_sin > 0), np.maximum(0.0, (Q_sin - df) / Q_sin * 100), 0.0)
+        inferior, superior = efecto - z * se, efecto + z * se
+
+    return {
+        'efecto_combinado': efecto,
+        'se_combinado': se,
+        'IC_95_combinado_inf': inferior,
+        'IC_95_combinado_sup': superior,
+        'Q': Q_sin,
+        'df': np.full(len(efectos), df),
+        'I_cuadrado': I_cuadrado
+    }
+
+
+def dejar_uno_fuera(df_estudios, modelo='fijo', metodo='REML', columna_efecto='g_hedges',
+                    columna_peso='peso', columna_se='se_g_hedges', z=Z_95):
+    """
+    Análisis de sensibilidad dejando un estudio fuera cada vez.
+
+    Con efectos fijos cada combinación se obtiene restando la contribución
+    del estudio omitido a los totales del análisis completo, en O(k) en
+    total en lugar de repetir `extract_results` k veces. Con efectos
+    aleatorios tau² se vuelve a estimar para las k combinaciones en una
+    sola llamada al motor vectorizado, partiendo del tau² del análisis
+    completo.
+
+    Parámetros:
+    df_estudios: DataFrame por estudio (como el devuelto por `extract_results`)
+    modelo: 'fijo' o 'aleatorio'
+    metodo: Estimador de tau² para el modelo de efectos aleatorios
+    columna_efecto: Columna con el efecto de cada estudio
+    columna_peso: Columna con el peso de efectos fijos (1 / varianza)
+    columna_se: Columna con el error estándar (solo para efectos aleatorios)
+    z: Valor crítico para el intervalo de confianza
+
+    Retorna:
+    tupla: (completo, df_sensibilidad) con el resultado del análisis completo
+           y una fila por estudio omitido ('omitido', efecto, IC, Q, df, I²,
+           'cambio' respecto al efecto completo y, con efectos aleatorios, 'tau2')
+    """
+    if modelo not in MODELOS:
+        raise ValueError(f"Modelo desconocido: {modelo} (use {', '.join(MODELOS)})")
+
+    efectos = df_estudios[columna_efecto].to_numpy(dtype=float)
+    nombres = df_estudios['nombre'].to_numpy() if 'nombre' in df_estudios else np.arange(1, len(efectos) + 1)
+    k = len(efectos)
+
+    if modelo == 'fijo':
+        pesos = df_estudios[columna_peso].to_numpy(dtype=float)
+        suma_pesos = pesos.sum()
+        efecto_completo = np.dot(pesos, efectos) / suma_pesos
+        se_completo = np.sqrt(1 / suma_pesos)
+        Q = np.dot(pesos, (efectos - efecto_completo)**2)
+        completo = {
+            'efecto_combinado': efecto_completo,
+            'se_combinado': se_completo,
+            'IC_95_combinado_inf': efecto_completo - z * se_completo,
+            'IC_95_combinado_sup': efecto_completo + z * se_completo,
+            'Q': Q,
+            'df': k - 1,
+            'I_cuadrado': max(0, (Q - (k - 1)) / Q * 100) if k > 1 and Q > 0 else 0
+        }
+        columnas = _dejar_uno_fuera_fijo(efectos, pesos, z)
+    else:
+        varianzas = df_estudios[columna_se].to_numpy(dtype=float)**2
+        completo = combinar_efectos_aleatorios(efectos, varianzas, metodo, z)
+
+        # Fila i = todos los estudios salvo el i (diagonal rellena con NaN)
+        omitidos = np.eye(k, dtype=bool)
+        matriz_efectos = np.where(omitidos, np.nan, efectos)
+        matriz_varianzas = np.where(omitidos, np.nan, varianzas)
+        columnas = combinar_efectos_aleatorios(matriz_efectos, matriz_varianzas, metodo, z,
+                                               tau2_inicial=completo['tau2'])
+        columnas = {clave: columnas[clave] for clave in
+                    ('efecto_combinado', 'se_combinado', 'IC_95_combinado_inf', 'IC_95_combinado_sup',
+                     'Q', 'df', 'I_cuadrado', 'tau2')}
+
+    df_sensibilidad = pd.DataFrame({'omitido': nombres, **columnas})
+    df_sensibilidad['cambio'] = df_sensibilidad['efecto_combinado'] - completo['efecto_combinado']
+    return completo, df_sensibilidad
+
+
+def figura_dejar_uno_fuera(completo, df_sensibilidad, titulo="Análisis de sensibilidad", etiqueta_x="g de Hedges"):
+    """
+    Forest plot de influencia: una fila por estudio omitido con el efecto
+    combinado sin ese estudio, y el efecto del análisis completo al final.
+
+    Retorna:
+    matplotlib.figure.Figure
+    """
+    from metaanalisis.graficos import figura_forest
+
+    return figura_forest(
+        [f"Sin {nombre}" for nombre in df_sensibilidad['omitido']],
+        df_sensibilidad['efecto_combinado'],
+        df_sensibilidad['IC_95_combinado_inf'],
+        df_sensibilidad['IC_95_combinado_sup'],
+        np.zeros(len(df_sensibilidad)),
+        (completo['efecto_combinado'], completo['IC_95_combinado_inf'],
+         completo['IC_95_combinado_sup'], "Todos los estudios"),
+        titulo=titulo,
+        etiqueta_x=etiqueta_x,
+        referencia=completo['efecto_combinado']
+    )
@@ -0,0 +1,538 @@
+"""
+Servicio HTTP (asyncio, sin dependencias externas) que combina estudios
+bajo demanda:
+
+    python -m metaanalisis servir [--host 127.0.0.1] [--puerto 8000] [--ventana-ms 5] [--procesos N]
+
+    POST /combinar               JSON -> efecto combinado (JSON)
+    POST /forest?formato=png     JSON -> forest plot (PNG o SVG, en trozos)
+    GET  /salud, /estadisticas
+
+Cuerpo de las peticiones:
+
+    {"estudios": [{"nombre": ..., "n_control": ..., "media_control": ..., ...}, ...],
+     "excluir": ["Nordio 2019"], "medida": "g" | "diferencia",
+     "modelo": "fijo" | "aleatorio", "metodo": "REML", "intervalo": "z" | "t" | "hksj",
+     "prediccion": false, "categoria": "HOMA-IR", "incluir_estudios": false, "dpi": 150}
+
+`intervalo` y `prediccion` solo se aplican al modelo aleatorio (ver
+`combinar_efectos_aleatorios`).
+
+Las peticiones de /combinar que llegan dentro de la misma ventana de unos
+milisegundos se agrupan por opciones y se resuelven juntas como matrices
+(petición × estudio) rellenas con NaN: un único cálculo vectorizado de los
+efectos y del efecto combinado para todo el lote. Los forest plots se
+dibujan en un pool de procesos para no bloquear el bucle de eventos.
+"""
+
+import asyncio
+import io
+import json
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from metaanalisis.aleatorios import INTERVALOS, METODOS_TAU2, _media_ponderada, _preparar, combinar_efectos_aleatorios, \
+    rellenar_matriz
+from metaanalisis.efecto import CLAVES_ESTUDIO, Z_95, columnas_hedges, interpretar_tamano_efecto
+
+# Medidas de efecto: g de Hedges (`extract_results`) o diferencia de medias
+# (`calcular_diferencia_grupos_estadisticas`)
+MEDIDAS = ('g', 'diferencia')
+MODELOS = ('fijo', 'aleatorio')
+FORMATOS_FIGURA = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+VENTANA_LOTE = 0.005
+TAMANO_MAXIMO_LOTE = 512
+TAMANO_MAXIMO_CUERPO = 16 * 2**20
+TAMANO_TROZO = 64 * 2**10
+# Resolución admitida para los forest plots (la figura se dibuja en los procesos de trabajo)
+DPI_MINIMO, DPI_MAXIMO = 10, 600
+
+_RAZONES = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class ErrorSolicitud(ValueError):
+    """Petición mal formada; se responde con 400 y el mensaje"""
+
+
+def _normalizar_estudio(i, estudio):
+    """Copia de un estudio con tamaños enteros positivos y medias y DE como float"""
+    faltantes = [clave for clave in CLAVES_ESTUDIO if clave not in estudio]
+    if faltantes:
+        raise ErrorSolicitud(f"Al estudio {i + 1} le faltan: {', '.join(faltantes)}")
+    try:
+        valores = {clave: float(estudio[clave]) for clave in CLAVES_ESTUDIO}
+    except (TypeError, ValueError):
+        raise ErrorSolicitud(f"El estudio {i + 1} tiene valores no numéricos") from None
+    if not all(math.isfinite(valor) for valor in valores.values()):
+        raise ErrorSolicitud(f"El estudio {i + 1} tiene valores no finitos")
+    for clave in ('n_control', 'n_intervencion'):
+        if not valores[clave].is_integer() or valores[clave] < 1:
+            raise ErrorSolicitud(f"'{clave}' del estudio {i + 1} debe ser un entero positivo")
+        valores[clave] = int(valores[clave])
+    if 'nombre' in estudio:
+        valores['nombre'] = str(estudio['nombre'])
+    return {**estudio, **valores}
+
+
+def validar_solicitud(datos):
+    """
+    Comprueba una petición JSON y la normaliza: opciones por defecto y
+    estudios excluidos ya eliminados.
+
+    Retorna:
+    dict: 'estudios' (lista), 'medida', 'modelo', 'metodo', 'intervalo',
+          'prediccion', 'z', 'categoria', 'incluir_estudios' y 'dpi'
+    """
+    if not isinstance(datos, dict):
+        raise ErrorSolicitud("El cuerpo debe ser un objeto JSON")
+    estudios = datos.get('estudios')
+    if not isinstance(estudios, list) or not all(isinstance(estudio, dict) for estudio in estudios):
+        raise ErrorSolicitud("'estudios' debe ser una lista de objetos")
+    excluir = datos.get('excluir') or []
+    if not isinstance(excluir, list) or not all(isinstance(nombre, str) for nombre in excluir):
+        raise ErrorSolicitud("'excluir' debe ser una lista de nombres")
+    excluir = set(excluir)
+    estudios = [_normalizar_estudio(i, estudio) for i, estudio in enumerate(estudios)]
+    estudios = [estudio for estudio in estudios if estudio.get('nombre') not in excluir]
+    if not estudios:
+        raise ErrorSolicitud("No queda ningún estudio que combinar")
+
+    try:
+        z = float(datos.get('z', Z_95))
+        dpi = int(datos.get('dpi', 150))
+    except (TypeError, ValueError):
+        raise ErrorSolicitud("'z' y 'dpi' deben ser numéricos") from None
+    if not (math.isfinite(z) and z > 0):
+        raise ErrorSolicitud("'z' debe ser un número positivo")
+    if not DPI_MINIMO <= dpi <= DPI_MAXIMO:
+        raise ErrorSolicitud(f"'dpi' debe estar entre {DPI_MINIMO} y {DPI_MAXIMO}")
+
+    solicitud = {
+        'estudios': estudios,
+        'medida': datos.get('medida', 'g'),
+        'modelo': datos.get('modelo', 'fijo'),
+        'metodo': datos.get('metodo', 'REML'),
+        'intervalo': datos.get('intervalo', 'z'),
+        'prediccion': bool(datos.get('prediccion', False)),
+        'z': z,
+        'categoria': str(datos.get('categoria', "")),
+        'incluir_estudios': bool(datos.get('incluir_estudios', False)),
+        'dpi': dpi
+    }
+    if solicitud['medida'] not in MEDIDAS:
+        raise ErrorSolicitud(f"Medida desconocida: {solicitud['medida']} (use {', '.join(MEDIDAS)})")
+    if solicitud['modelo'] not in MODELOS:
+        raise ErrorSolicitud(f"Modelo desconocido: {solicitud['modelo']} (use {', '.join(MODELOS)})")
+    if solicitud['metodo'] not in METODOS_TAU2:
+        raise ErrorSolicitud(f"Método desconocido: {solicitud['metodo']} (use {', '.join(METODOS_TAU2)})")
+    if solicitud['intervalo'] not in INTERVALOS:
+        raise ErrorSolicitud(f"Intervalo desconocido: {solicitud['intervalo']} (use {', '.join(INTERVALOS)})")
+    return solicitud
+
+
+def _combinar_fijo(efectos, varianzas, z):
+    """Efecto fijo por inverso de la varianza de cada fila de una matriz rellena con NaN"""
+    y, v, mascara = _preparar(efectos, varianzas)
+    w = np.where(mascara, 1 / v, 0.0)
+    efecto, suma_w = _media_ponderada(y, w)
+    k = mascara.sum(axis=1)
+    Q = (w * (y - efecto[:, None])**2).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        se = np.sqrt(1 / suma_w)
+        I_cuadrado = np.where((k > 1) & (Q > 0), np.maximum(0.0, (Q - (k - 1)) / Q * 100), 0.0)
+    return {
+        'efecto_combinado': efecto,
+        'se_combinado': se,
+        'IC_95_combinado_inf': efecto - z * se,
+        'IC_95_combinado_sup': efecto + z * se,
+        'tau2': np.zeros(len(k)),
+        'Q': Q,
+        'df': k - 1,
+        'I_cuadrado': I_cuadrado,
+        'num_estudios': k
+    }
+
+
+def combinar_lote(solicitudes):
+    """
+    Combina un lote de peticiones validadas con las mismas opciones de
+    medida, modelo, método, intervalo, predicción y z. Los estadísticos resumidos se apilan en
+    matrices (petición × estudio) y los efectos por estudio y los combinados
+    se calculan una sola vez para todo el lote.
+
+    Retorna:
+    list: un diccionario de resultados por petición, en el mismo orden
+    """
+    if not solicitudes:
+        return []
+    opciones = solicitudes[0]
+    columnas = {clave: rellenar_matriz([[estudio[clave] for estudio in solicitud['estudios']]
+                                        for solicitud in solicitudes])
+                for clave in CLAVES_ESTUDIO}
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if opciones['medida'] == 'g':
+            por_estudio = columnas_hedges(**columnas, z=opciones['z'])
+            efectos, se = por_estudio['g_hedges'], por_estudio['se_g_hedges']
+        else:
+            efectos = columnas['media_intervencion'] - columnas['media_control']
+            se = np.sqrt(columnas['de_control']**2 / columnas['n_control']
+                         + columnas['de_intervencion']**2 / columnas['n_intervencion'])
+
+    if opciones['modelo'] == 'aleatorio':
+        combinado = combinar_efectos_aleatorios(efectos, se**2, opciones['metodo'], opciones['z'],
+                                                intervalo=opciones['intervalo'], prediccion=opciones['prediccion'])
+    else:
+        combinado = _combinar_fijo(efectos, se**2, opciones['z'])
+
+    resultados = []
+    for fila, solicitud in enumerate(solicitudes):
+        resultado = {
+            'categoria': solicitud['categoria'],
+            'medida': solicitud['medida'],
+            'modelo': solicitud['modelo'],
+            'metodo': solicitud['metodo'] if solicitud['modelo'] == 'aleatorio' else None,
+            **{clave: np.asarray(combinado[clave])[fila].item() for clave in
+               ('efecto_combinado', 'se_combinado', 'IC_95_combinado_inf', 'IC_95_combinado_sup',
+                'tau2', 'Q', 'df', 'I_cuadrado', 'num_estudios')}
+        }
+        if solicitud['modelo'] == 'aleatorio':
+            resultado['intervalo'] = solicitud['intervalo']
+            # Claves opcionales del modelo aleatorio: valor p e intervalo de predicción
+            resultado.update({clave: np.asarray(combinado[clave])[fila].item() for clave in
+                              ('valor_p', 'IP_95_inf', 'IP_95_sup') if clave in combinado})
+        if solicitud['medida'] == 'g':
+            resultado['interpretacion_combinada'] = str(interpretar_tamano_efecto(resultado['efecto_combinado']))
+        if solicitud['incluir_estudios']:
+            resultado['estudios'] = [{
+                'nombre': estudio.get('nombre', f"Estudio {i + 1}"),
+                'efecto': efectos[fila, i].item(),
+                'se': se[fila, i].item(),
+                'IC_95_inferior': efectos[fila, i].item() - solicitud['z'] * se[fila, i].item(),
+                'IC_95_superior': efectos[fila, i].item() + solicitud['z'] * se[fila, i].item(),
+                'n_total': int(estudio['n_control']) + int(estudio['n_intervencion'])
+            } for i, estudio in enumerate(solicitud['estudios'])]
+        resultados.append(resultado)
+    return resultados
+
+
+def _clave_lote(solicitud):
+    return (solicitud['medida'], solicitud['modelo'], solicitud['metodo'], solicitud['intervalo'],
+            solicitud['prediccion'], solicitud['z'])
+
+
+def renderizar_forest(solicitud, formato='png'):
+    """
+    Dibuja el forest plot de una petición validada y lo devuelve como bytes
+    (se ejecuta en los procesos de trabajo del servicio).
+    """
+    from metaanalisis.graficos import figura_forest
+
+    resultado = combinar_lote([{**solicitud, 'incluir_estudios': True}])[0]
+    estudios = resultado['estudios']
+    etiqueta = "Efectos aleatorios" if solicitud['modelo'] == 'aleatorio' else "Efectos fijos"
+    figura = figura_forest(
+        [estudio['nombre'] for estudio in estudios],
+        [estudio['efecto'] for estudio in estudios],
+        [estudio['IC_95_inferior'] for estudio in estudios],
+        [estudio['IC_95_superior'] for estudio in estudios],
+        [estudio['n_total'] for estudio in estudios],
+        (resultado['efecto_combinado'], resultado['IC_95_combinado_inf'], resultado['IC_95_combinado_sup'],
+         f"{etiqueta} ({resultado['num_estudios']} estudios)"),
+        titulo=solicitud['categoria'],
+        etiqueta_x="g de Hedges" if solicitud['medida'] == 'g' else "Diferencia de medias"
+    )
+    salida = io.BytesIO()
+    figura.savefig(salida, format=formato, dpi=solicitud['dpi'], bbox_inches='tight')
+    return salida.getvalue()
+
+
+def _inicializar_trabajador():
+    """Backend Agg y módulos de dibujo precargados en cada proceso"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import metaanalisis.graficos  # noqa: F401
+
+
+class _Agrupador:
+    """
+    Acumula las peticiones de /combinar durante `ventana` segundos (o hasta
+    `tamano_maximo`) y las resuelve juntas con `combinar_lote`.
+    """
+
+    def __init__(self, ventana, tamano_maximo):
+        self.ventana = ventana
+        self.tamano_maximo = tamano_maximo
+        self.pendientes = []
+        self.temporizador = None
+        self.lotes = 0
+        self.solicitudes = 0
+
+    def enviar(self, solicitud):
+        futuro = asyncio.get_running_loop().create_future()
+        self.pendientes.append((solicitud, futuro))
+        if len(self.pendientes) >= self.tamano_maximo:
+            self.vaciar()
+        elif self.temporizador is None:
+            self.temporizador = asyncio.get_running_loop().call_later(self.ventana, self.vaciar)
+        return futuro
+
+    def vaciar(self):
+        if self.temporizador is not None:
+            self.temporizador.cancel()
+            self.temporizador = None
+        pendientes, self.pendientes = self.pendientes, []
+        grupos = {}
+        for solicitud, futuro in pendientes:
+            grupos.setdefault(_clave_lote(solicitud), []).append((solicitud, futuro))
+        for grupo in grupos.values():
+            self.lotes += 1
+            self.solicitudes += len(grupo)
+            try:
+                resultados = combinar_lote([solicitud for solicitud, _ in grupo])
+            except Exception:
+                # Una petición que hace fallar el lote no debe arrastrar a las
+                # demás: se resuelven de una en una
+                resultados = [_combinar_sola(solicitud) for solicitud, _ in grupo]
+            for (_, futuro), resultado in zip(grupo, resultados):
+                if futuro.done():
+                    continue
+                if isinstance(resultado, Exception):
+                    futuro.set_exception(resultado)
+                else:
+                    futuro.set_result(resultado)
+
+
+def _combinar_sola(solicitud):
+    """Resultado de una sola petición, o la excepción que produjo"""
+    try:
+        return combinar_lote([solicitud])[0]
+    except Exception as error:
+        return error
+
+
+class ServicioMetaanalisis:
+    """
+    Servidor HTTP/1.1 mínimo sobre asyncio.start_server.
+
+    Parámetros:
+    ventana: Segundos que se esperan para agrupar peticiones de /combinar
+    tamano_maximo_lote: Peticiones a partir de las cuales el lote se resuelve sin esperar
+    procesos: Procesos del pool de figuras (por defecto os.cpu_count())
+    """
+
+    def __init__(self, ventana=VENTANA_LOTE, tamano_maximo_lote=TAMANO_MAXIMO_LOTE, procesos=None):
+        self.agrupador = _Agrupador(ventana, tamano_maximo_lote)
+        self.procesos = procesos
+        self.pool = None
+        self.servidor = None
+        self.figuras = 0
+        self.inicio = None
+
+    async def iniciar(self, host="127.0.0.1", puerto=8000):
+        """Empieza a escuchar y devuelve el puerto (útil con puerto=0)"""
+        self.pool = ProcessPoolExecutor(max_workers=self.procesos, initializer=_inicializar_trabajador)
+        self.servidor = await asyncio.start_server(self._atender, host, puerto)
+        self.inicio = time.monotonic()
+        return self.servidor.sockets[0].getsockname()[1]
+
+    async def detener(self):
+        if self.servidor is not None:
+            self.servidor.close()
+            await self.servidor.wait_closed()
+            self.servidor = None
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *excepcion):
+        await self.detener()
+
+    def estadisticas(self):
+        return {
+            'solicitudes_combinar': self.agrupador.solicitudes,
+            'lotes': self.agrupador.lotes,
+            'figuras': self.figuras,
+            'segundos_activo': time.monotonic() - self.inicio if self.inicio is not None else 0.0
+        }
+
+    async def _atender(self, reader, writer):
+        try:
+            while True:
+                peticion = await _leer_peticion(reader)
+                if peticion is None:
+                    break
+                metodo, destino, cabeceras, cuerpo = peticion
+                mantener = cabeceras.get('connection', '').lower() != 'close'
+                await self._despachar(writer, metodo, destino, cuerpo, mantener)
+                if not mantener:
+                    break
+        except _ErrorHTTP as error:
+            await _responder_json(writer, error.estado, {'error': str(error)}, mantener=False)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _despachar(self, writer, metodo, destino, cuerpo, mantener):
+        partes = urlsplit(destino)
+        ruta = partes.path.rstrip('/') or '/'
+        try:
+            if ruta == '/salud':
+                return await _responder_json(writer, 200, {'estado': 'ok'}, mantener)
+            if ruta == '/estadisticas':
+                return await _responder_json(writer, 200, self.estadisticas(), mantener)
+            if ruta not in ('/combinar', '/forest'):
+                return await _responder_json(writer, 404, {'error': f"Ruta desconocida: {ruta}"}, mantener)
+            if metodo != 'POST':
+                return await _responder_json(writer, 405, {'error': "Use POST"}, mantener)
+
+            try:
+                solicitud = validar_solicitud(json.loads(cuerpo or b'null'))
+            except json.JSONDecodeError as error:
+                raise ErrorSolicitud(f"JSON inválido: {error}") from None
+
+            if ruta == '/combinar':
+                resultado = await self.agrupador.enviar(solicitud)
+                return await _responder_json(writer, 200, resultado, mantener)
+
+            formato = parse_qs(partes.query).get('formato', ['png'])[0].lower()
+            if formato not in FORMATOS_FIGURA:
+                raise ErrorSolicitud(f"Formato desconocido: {formato} (use {', '.join(FORMATOS_FIGURA)})")
+            imagen = await asyncio.get_running_loop().run_in_executor(self.pool, renderizar_forest,
+                                                                      solicitud, formato)
+            self.figuras += 1
+            await _responder_trozos(writer, imagen, FORMATOS_FIGURA[formato], mantener)
+        except ErrorSolicitud as error:
+            await _responder_json(writer, 400, {'error': str(error)}, mantener)
+        except Exception as error:
+            await _responder_json(writer, 500, {'error': f"{type(error).__name__}: {error}"}, mantener)
+
+
+class _ErrorHTTP(Exception):
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+async def _leer_peticion(reader):
+    """Lee línea de petición, cabeceras y cuerpo (Content-Length); None si se cerró la conexión"""
+    linea = await reader.readline()
+    if not linea.strip():
+        return None
+    try:
+        metodo, destino, _ = linea.decode('latin-1').split()
+    except ValueError:
+        raise _ErrorHTTP(400, "Línea de petición inválida") from None
+    cabeceras = {}
+    while True:
+        linea = await reader.readline()
+        if linea in (b'\r\n', b'\n', b''):
+            break
+        nombre, _, valor = linea.decode('latin-1').partition(':')
+        cabeceras[nombre.strip().lower()] = valor.strip()
+    try:
+        longitud = int(cabeceras.get('content-length', 0) or 0)
+    except ValueError:
+        raise _ErrorHTTP(400, "Content-Length inválido") from None
+    if longitud < 0:
+        raise _ErrorHTTP(400, "Content-Length inválido")
+    if longitud > TAMANO_MAXIMO_CUERPO:
+        raise _ErrorHTTP(413, f"Cuerpo de más de {TAMANO_MAXIMO_CUERPO} bytes")
+    cuerpo = await reader.readexactly(longitud) if longitud else b''
+    return metodo.upper(), destino, cabeceras, cuerpo
+
+
+def _cabecera(estado, tipo, extra, mantener):
+    lineas = [f"HTTP/1.1 {estado} {_RAZONES.get(estado, '')}", f"Content-Type: {tipo}",
+              f"Connection: {'keep-alive' if mantener else 'close'}"] + extra
+    return ("\r\n".join(lineas) + "\r\n\r\n").encode('latin-1')
+
+
+def _sin_no_finitos(datos):
+    """Sustituye NaN e infinitos por None (null), que JSON estricto no admite"""
+    if isinstance(datos, float):
+        return datos if math.isfinite(datos) else None
+    if isinstance(datos, dict):
+        return {clave: _sin_no_finitos(valor) for clave, valor in datos.items()}
+    if isinstance(datos, (list, tuple)):
+        return [_sin_no_finitos(valor) for valor in datos]
+    return datos
+
+
+async def _responder_json(writer, estado, datos, mantener=True):
+    cuerpo = json.dumps(_sin_no_finitos(datos), ensure_ascii=False, allow_nan=False).encode('utf-8')
+    writer.write(_cabecera(estado, 'application/json; charset=utf-8', [f"Content-Length: {len(cuerpo)}"], mantener)
+                 + cuerpo)
+    await writer.drain()
+
+
+async def _responder_trozos(writer, datos, tipo, mantener=True):
+    """Envía `datos` con Transfer-Encoding: chunked, esperando a que el cliente lea cada trozo"""
+    writer.write(_cabecera(200, tipo, ["Transfer-Encoding: chunked"], mantener))
+    for inicio in range(0, len(datos), TAMANO_TROZO):
+        trozo = datos[inicio:inicio + TAMANO_TROZO]
+        writer.write(f"{len(trozo):x}\r\n".encode('latin-1') + trozo + b"\r\n")
+        await writer.drain()
+    writer.write(b"0\r\n\r\n")
+    await writer.drain()
+
+
+async def solicitar(host, puerto, metodo, ruta, datos=None):
+    """
+    Cliente HTTP mínimo para probar el servicio en local.
+
+    Retorna:
+    tupla: (estado, cabeceras, cuerpo) con el cuerpo en bytes (ya
+           reensamblado si llegó en trozos)
+    """
+    reader, writer = await asyncio.open_connection(host, puerto)
+    cuerpo = b'' if datos is None else json.dumps(datos).encode('utf-8')
+    writer.write((f"{metodo} {ruta} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n"
+                  f"Content-Type: application/json\r\nContent-Length: {len(cuerpo)}\r\n\r\n").encode('latin-1')
+                 + cuerpo)
+    await writer.drain()
+
+    estado = int((await reader.readline()).split()[1])
+    cabeceras = {}
+    while (linea := await reader.readline()) not in (b'\r\n', b''):
+        nombre, _, valor = linea.decode('latin-1').partition(':')
+        cabeceras[nombre.strip().lower()] = valor.strip()
+    if cabeceras.get('transfer-encoding') == 'chunked':
+        partes = []
+        while (longitud := int((await reader.readline()).strip(), 16)) > 0:
+            partes.append(await reader.readexactly(longitud))
+            await reader.readexactly(2)
+        await reader.readline()
+        respuesta = b''.join(partes)
+    else:
+        respuesta = await reader.readexactly(int(cabeceras.get('content-length', 0)))
+    writer.close()
+    return estado, cabeceras, respuesta
+
+
+def servir(host="127.0.0.1", puerto=8000, ventana=VENTANA_LOTE, procesos=None, informar=print):
+    """Arranca el servicio y atiende peticiones hasta Ctrl+C"""
+    async def principal():
+        servicio = ServicioMetaanalisis(ventana, procesos=procesos)
+        puerto_real = await servicio.iniciar(host, puerto)
+        if informar is not None:
+            informar(f"Escuchando en http://{host}:{puerto_real} (ventana de lote {ventana * 1000:.1f} ms)")
+        try:
+            await servicio.servidor.serve_forever()
+        finally:
+            await servicio.detener()
+
+    try:
+        asyncio.run(principal())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,295 @@
+from statistics import NormalDist
+
+import numpy as np
+
+from metaanalisis.distribuciones import valor_p_normal, valor_p_t
+from metaanalisis.efecto import Z_95
+from metaanalisis.perezoso import pandas as pd
+
+# Estimadores del número de estudios ausentes en trim-and-fill
+ESTIMADORES_K0 = ('L0', 'R0')
+
+
+def _efectos_y_se(df_estudios, columna_efecto, columna_se):
+    efectos = df_estudios[columna_efecto].to_numpy(dtype=float)
+    se = df_estudios[columna_se].to_numpy(dtype=float)
+    validos = np.isfinite(efectos) & np.isfinite(se) & (se > 0)
+    return efectos[validos], se[validos]
+
+
+def prueba_egger(df_estudios, columna_efecto='g_hedges', columna_se='se_g_hedges'):
+    """
+    Prueba de regresión de Egger: regresión por mínimos cuadrados de
+    efecto/SE sobre la precisión 1/SE. Un intercepto distinto de cero
+    indica asimetría del embudo (efectos de estudios pequeños).
+
+    Retorna:
+    dict: 'intercepto', 'se_intercepto', 't', 'df', 'valor_p' y 'pendiente'
+          (NaN si hay menos de 3 estudios)
+    """
+    efectos, se = _efectos_y_se(df_estudios, columna_efecto, columna_se)
+    k = len(efectos)
+    if k < 3:
+        return {'intercepto': np.nan, 'se_intercepto': np.nan, 't': np.nan, 'df': max(k - 2, 0),
+                'valor_p': np.nan, 'pendiente': np.nan}
+
+    precision = 1 / se
+    normalizado = efectos / se
+    X = np.column_stack([np.ones(k), precision])
+    coeficientes, _, _, _ = np.linalg.lstsq(X, normalizado, rcond=None)
+    residuos = normalizado - X @ coeficientes
+    varianza_residual = residuos @ residuos / (k - 2)
+    covarianza = varianza_residual * np.linalg.inv(X.T @ X)
+
+    se_intercepto = np.sqrt(covarianza[0, 0])
+    t = coeficientes[0] / se_intercepto
+    return {
+        'intercepto': coeficientes[0],
+        'se_intercepto': se_intercepto,
+        't': t,
+        'df': k - 2,
+        'valor_p': valor_p_t(t, k - 2),
+        'pendiente': coeficientes[1]
+    }
+
+
+def prueba_begg(df_estudios, columna_efecto='g_hedges', columna_se='se_g_hedges'):
+    """
+    Prueba de correlación de rangos de Begg y Mazumdar: tau de Kendall
+    entre los efectos estandarizados respecto al efecto fijo y sus
+    varianzas, con la aproximación normal (sin corrección por empates).
+
+    Retorna:
+    dict: 'tau_kendall', 'z', 'valor_p' (NaN si hay menos de 3 estudios)
+    """
+    efectos, se = _efectos_y_se(df_estudios, columna_efecto, columna_se)
+    k = len(efectos)
+    if k < 3:
+        return {'tau_kendall': np.nan, 'z': np.nan, 'valor_p': np.nan}
+
+    varianzas = se**2
+    pesos = 1 / varianzas
+    efecto_fijo = np.dot(pesos, efectos) / pesos.sum()
+    estandarizados = (efectos - efecto_fijo) / np.sqrt(varianzas - 1 / pesos.sum())
+
+    # Pares concordantes menos discordantes, sobre el triángulo superior
+    i, j = np.triu_indices(k, 1)
+    S = np.sum(np.sign(estandarizados[i] - estandarizados[j]) * np.sign(varianzas[i] - varianzas[j]))
+    z = S / np.sqrt(k * (k - 1) * (2 * k + 5) / 18)
+    return {
+        'tau_kendall': S / (k * (k - 1) / 2),
+        'z': z,
+        'valor_p': valor_p_normal(z)
+    }
+
+
+class _SumasOrdenadas:
+    """
+    Sumas acumuladas de los estudios ordenados de menor a mayor efecto.
+    Recortar los k0 mayores deja los m = k - k0 primeros, cuyo efecto fijo
+    y tau² de DerSimonian–Laird salen en O(1) de estas sumas; solo el
+    efecto aleatorio final de cada iteración recorre los m estudios.
+    """
+
+    def __init__(self, efectos, varianzas):
+        self.efectos = efectos
+        self.varianzas = varianzas
+        w = 1 / varianzas
+        self.w = np.r_[0.0, np.cumsum(w)]
+        self.wy = np.r_[0.0, np.cumsum(w * efectos)]
+        self.wy2 = np.r_[0.0, np.cumsum(w * efectos**2)]
+        self.w2 = np.r_[0.0, np.cumsum(w**2)]
+
+    def combinar(self, m, modelo):
+        """Efecto combinado de los m primeros estudios y su tau² (0 con efectos fijos)"""
+        suma_w, suma_wy = self.w[m], self.wy[m]
+        if modelo == 'fijo' or m < 2:
+            return suma_wy / suma_w, 0.0
+        Q = self.wy2[m] - suma_wy**2 / suma_w
+        C = suma_w - self.w2[m] / suma_w
+        tau2 = max(0.0, (Q - (m - 1)) / C)
+        w = 1 / (self.varianzas[:m] + tau2)
+        return np.dot(w, self.efectos[:m]) / w.sum(), tau2
+
+
+def _k0(desviaciones, estimador):
+    """Número de estudios ausentes estimado a partir de las desviaciones al centro"""
+    k = len(desviaciones)
+    orden = np.argsort(np.abs(desviaciones), kind='stable')
+    rangos = np.empty(k)
+    rangos[orden] = np.arange(1, k + 1)
+    if estimador == 'L0':
+        T = rangos[desviaciones > 0].sum()
+        k0 = (4 * T - k * (k + 1)) / (2 * k - 1)
+    else:
+        # Longitud de la racha final de desviaciones positivas al ordenar por |d|
+        positivas = desviaciones[orden] > 0
+        racha = k - np.flatnonzero(~positivas)[-1] - 1 if (~positivas).any() else k
+        k0 = racha - 1
+    return int(max(0, round(k0)))
+
+
+def trim_and_fill(df_estudios, columna_efecto='g_hedges', columna_se='se_g_hedges', estimador='L0',
+                  modelo='aleatorio', lado=None, max_iter=100, z=Z_95):
+    """
+    Método de recorte y relleno (trim-and-fill) de Duval y Tweedie.
+
+    Los estudios se ordenan una sola vez por efecto; recortar los k0 más
+    extremos equivale a quedarse con un prefijo del orden, cuyo efecto
+    combinado sale de sumas acumuladas en lugar de volver a ajustar el
+    modelo en cada iteración.
+
+    Parámetros:
+    df_estudios: DataFrame por estudio (como el devuelto por `extract_results`)
+    estimador: 'L0' o 'R0'
+    modelo: 'fijo' o 'aleatorio' (DerSimonian–Laird) para el centro y el efecto final
+    lado: Lado donde faltan estudios ('izquierda' o 'derecha'); por defecto
+          se deduce del signo del intercepto de Egger
+    max_iter: Número máximo de iteraciones
+    z: Valor crítico para el intervalo de confianza
+
+    Retorna:
+    tupla: (resultados, df_relleno) con el efecto combinado original y el
+           corregido, k0, el lado y las iteraciones, y los estudios imputados
+           (efectos NaN y ningún estudio imputado si hay menos de 3 estudios)
+    """
+    if estimador not in ESTIMADORES_K0:
+        raise ValueError(f"Estimador desconocido: {estimador} (use {', '.join(ESTIMADORES_K0)})")
+    if modelo not in ('fijo', 'aleatorio'):
+        raise ValueError(f"Modelo desconocido: {modelo} (use 'fijo' o 'aleatorio')")
+
+    efectos, se = _efectos_y_se(df_estudios, columna_efecto, columna_se)
+    k = len(efectos)
+    varianzas = se**2
+    if k < 3:
+        # Como en las pruebas de Egger y Begg: sin estudios suficientes no se
+        # puede deducir el lado ni estimar k0
+        resultados = {clave: np.nan for clave in (
+            'efecto_original', 'IC_original_inf', 'IC_original_sup', 'efecto_combinado', 'se_combinado',
+            'IC_95_combinado_inf', 'IC_95_combinado_sup', 'tau2')}
+        resultados = {'estimador': estimador, 'lado': lado, 'k0': 0, 'iteraciones': 0, **resultados,
+                      'num_estudios': k}
+        df_relleno = pd.DataFrame({columna_efecto: np.empty(0), columna_se: np.empty(0),
+                                   'imputado': np.empty(0, dtype=bool)})
+        return resultados, df_relleno
+
+    if lado is None:
+        intercepto = prueba_egger(pd.DataFrame({'e': efectos, 's': se}), 'e', 's')['intercepto']
+        lado = 'derecha' if intercepto < 0 else 'izquierda'
+    # El algoritmo supone que faltan estudios a la izquierda: se refleja si no
+    signo = 1.0 if lado == 'izquierda' else -1.0
+    y = signo * efectos
+
+    orden = np.argsort(y, kind='stable')
+    y_ordenados, v_ordenadas = y[orden], varianzas[orden]
+    sumas = _SumasOrdenadas(y_ordenados, v_ordenadas)
+
+    mu_original, tau2_original = sumas.combinar(k, modelo)
+    k0 = 0
+    iteraciones = 0
+    for iteraciones in range(1, max_iter + 1):
+        centro, _ = sumas.combinar(k - k0, modelo)
+        nuevo_k0 = min(_k0(y - centro, estimador), k - 1)
+        if nuevo_k0 == k0:
+            break
+        k0 = nuevo_k0
+    centro, _ = sumas.combinar(k - k0, modelo)
+
+    # Relleno: simétricos de los k0 mayores respecto al centro recortado
+    y_relleno = 2 * centro - y_ordenados[k - k0:]
+    v_relleno = v_ordenadas[k - k0:]
+    y_total = np.r_[y, y_relleno]
+    v_total = np.r_[varianzas, v_relleno]
+    w = 1 / v_total
+    mu_fijo = np.dot(w, y_total) / w.sum()
+    tau2 = 0.0
+    if modelo == 'aleatorio' and len(y_total) > 1:
+        Q = np.dot(w, (y_total - mu_fijo)**2)
+        tau2 = max(0.0, (Q - (len(y_total) - 1)) / (w.sum() - (w**2).sum() / w.sum()))
+    w = 1 / (v_total + tau2)
+    mu = np.dot(w, y_total) / w.sum()
+    se_mu = np.sqrt(1 / w.sum())
+
+    efecto = signo * mu
+    se_original = np.sqrt(1 / (1 / (varianzas + tau2_original)).sum())
+    resultados = {
+        'estimador': estimador,
+        'lado': lado,
+        'k0': k0,
+        'iteraciones': iteraciones,
+        'efecto_original': signo * mu_original,
+        'IC_original_inf': signo * mu_original - z * se_original,
+        'IC_original_sup': signo * mu_original + z * se_original,
+        'efecto_combinado': efecto,
+        'se_combinado': se_mu,
+        'IC_95_combinado_inf': efecto - z * se_mu,
+        'IC_95_combinado_sup': efecto + z * se_mu,
+        'tau2': tau2,
+        'num_estudios': k + k0
+    }
+    df_relleno = pd.DataFrame({
+        columna_efecto: signo * y_relleno,
+        columna_se: np.sqrt(v_relleno),
+        'imputado': True
+    })
+    return resultados, df_relleno
+
+
+def figura_embudo(df_estudios, columna_efecto='g_hedges', columna_se='se_g_hedges', df_relleno=None,
+                  centro=None, niveles=(0.10, 0.05, 0.01), titulo="Gráfico de embudo", etiqueta_x="g de Hedges"):
+    """
+    Gráfico de embudo con contornos de significación: las bandas sombreadas
+    marcan dónde un estudio tendría p < 0.10, 0.05 y 0.01 (alrededor de 0),
+    y las líneas discontinuas el embudo del IC 95% alrededor del efecto
+    combinado. Los estudios imputados por trim-and-fill se dibujan huecos.
+
+    Retorna:
+    matplotlib.figure.Figure
+    """
+    from matplotlib.figure import Figure
+
+    efectos, se = _efectos_y_se(df_estudios, columna_efecto, columna_se)
+    if centro is None:
+        pesos = 1 / se**2
+        centro = np.dot(pesos, efectos) / pesos.sum()
+
+    todos_efectos, todos_se = efectos, se
+    if df_relleno is not None and len(df_relleno):
+        todos_efectos = np.r_[efectos, df_relleno[columna_efecto]]
+        todos_se = np.r_[se, df_relleno[columna_se]]
+    se_max = todos_se.max() * 1.1
+    eje_se = np.array([0.0, se_max])
+
+    niveles = sorted(niveles)
+    criticos = [NormalDist().inv_cdf(1 - nivel / 2) for nivel in niveles]
+    x_max = max(np.abs(todos_efectos).max(), abs(centro) + Z_95 * se_max, criticos[0] * se_max) * 1.05
+
+    figura = Figure(figsize=(7, 6))
+    ax = figura.add_subplot(111)
+
+    # Contornos: de fuera (más significativo) hacia dentro, cada banda tapa a la anterior
+    grises = np.linspace(0.55, 0.85, len(niveles))
+    ax.fill_betweenx(eje_se, -x_max, x_max, color=str(grises[0]), lw=0, zorder=0,
+                     label=f"p < {niveles[0]:g}")
+    bandas = list(zip(criticos, niveles)) + [(None, None)]
+    for (critico, nivel), (_, nivel_siguiente), gris in zip(bandas, bandas[1:], list(grises[1:]) + ['white']):
+        etiqueta = f"{nivel:g} < p < {nivel_siguiente:g}" if nivel_siguiente else f"p > {nivel:g}"
+        ax.fill_betweenx(eje_se, -critico * eje_se, critico * eje_se, color=str(gris), lw=0, zorder=0,
+                         label=etiqueta)
+
+    ax.plot(centro - Z_95 * eje_se, eje_se, 'k--', lw=1, zorder=2)
+    ax.plot(centro + Z_95 * eje_se, eje_se, 'k--', lw=1, zorder=2)
+    ax.axvline(centro, color='red', lw=1, zorder=2)
+
+    ax.scatter(efectos, se, s=30, color='tab:blue', edgecolor='black', zorder=4, label='Estudios')
+    if df_relleno is not None and len(df_relleno):
+        ax.scatter(df_relleno[columna_efecto], df_relleno[columna_se], s=30, facecolor='white',
+                   edgecolor='black', zorder=4, label='Imputados (trim-and-fill)')
+
+    ax.set_xlim(-x_max, x_max)
+    ax.set_ylim(se_max, 0)
+    ax.set_xlabel(etiqueta_x)
+    ax.set_ylabel('Error estándar')
+    ax.set_title(titulo, fontweight='bold')
+    ax.legend(fontsize=8, loc='lower right')
+    return figura
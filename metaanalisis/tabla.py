@@ -0,0 +1,221 @@
+import numpy as np
+
+from metaanalisis.efecto import CLAVES_ESTUDIO
+from metaanalisis.lectura import leer_resultado
+
+# Tipos de cada columna numérica de la tabla
+TIPOS_COLUMNAS = {
+    'n_control': np.int32,
+    'n_intervencion': np.int32,
+    'media_control': np.float64,
+    'media_intervencion': np.float64,
+    'de_control': np.float64,
+    'de_intervencion': np.float64,
+}
+
+# Equivalencias entre el esquema de obj3/objetivo3 y el esquema canónico
+COLUMNAS_OBJ3 = {
+    'Study': 'nombre',
+    'Control_N': 'n_control',
+    'Intervention_N': 'n_intervencion',
+    'Control_Mean': 'media_control',
+    'Intervention_Mean': 'media_intervencion',
+    'Control_SD': 'de_control',
+    'Intervention_SD': 'de_intervencion',
+}
+
+
+class TablaEstudios:
+    """
+    Tabla de estudios respaldada por arrays contiguos de NumPy (StudyTable).
+
+    Sustituye a las listas de diccionarios (`homa_estudios`, `imc_estudios`, ...):
+    cada columna es un array tipado (int32 para tamaños de muestra, float64
+    para medias y desviaciones) y la categoría se guarda como un código int16
+    que indexa `categorias`. Un estudio ocupa unos 50 bytes más su nombre,
+    frente a más de un kilobyte como diccionario.
+
+    Atributos:
+    nombres: Array de cadenas con el nombre de cada estudio
+    codigos: Array int16 con el código de categoría de cada estudio
+    categorias: Tupla con la etiqueta de cada código de categoría
+    n_control, n_intervencion, media_control, media_intervencion,
+    de_control, de_intervencion: Arrays con las estadísticas resumidas
+    """
+
+    __slots__ = ('nombres', 'codigos', 'categorias') + CLAVES_ESTUDIO
+
+    def __init__(self, nombres, columnas, codigos=None, categorias=("",)):
+        """
+        Parámetros:
+        nombres: Secuencia con el nombre de cada estudio
+        columnas: Diccionario con un array por cada clave de CLAVES_ESTUDIO
+        codigos: Código de categoría por estudio (0 para todos si se omite)
+        categorias: Etiquetas de las categorías, indexadas por código
+        """
+        self.nombres = np.asarray(nombres, dtype=str)
+        for clave, tipo in TIPOS_COLUMNAS.items():
+            setattr(self, clave, np.ascontiguousarray(columnas[clave], dtype=tipo))
+        if codigos is None:
+            codigos = np.zeros(len(self.nombres))
+        self.codigos = np.ascontiguousarray(codigos, dtype=np.int16)
+        self.categorias = tuple(categorias)
+
+        longitudes = {len(self.nombres), len(self.codigos)}
+        longitudes.update(len(getattr(self, clave)) for clave in CLAVES_ESTUDIO)
+        if len(longitudes) != 1:
+            raise ValueError("Todas las columnas de la tabla deben tener la misma longitud")
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def __repr__(self):
+        return f"TablaEstudios({len(self)} estudios, {len(self.categorias)} categorías)"
+
+    @property
+    def n_total(self):
+        return self.n_control + self.n_intervencion
+
+    @property
+    def categoria(self):
+        """Etiqueta de categoría de cada estudio"""
+        return np.asarray(self.categorias, dtype=str)[self.codigos]
+
+    @property
+    def nbytes(self):
+        """Memoria ocupada por los arrays de la tabla"""
+        return sum(getattr(self, clave).nbytes for clave in ('nombres', 'codigos') + CLAVES_ESTUDIO)
+
+    def columnas(self):
+        """Devuelve las columnas numéricas listas para `columnas_hedges(**tabla.columnas())`"""
+        return {clave: getattr(self, clave) for clave in CLAVES_ESTUDIO}
+
+    def filtrar(self, mascara):
+        """Devuelve una nueva tabla con las filas seleccionadas por `mascara`"""
+        return TablaEstudios(self.nombres[mascara],
+                             {clave: getattr(self, clave)[mascara] for clave in CLAVES_ESTUDIO},
+                             self.codigos[mascara], self.categorias)
+
+    def seleccionar_categoria(self, categoria):
+        """Devuelve la subtabla de una categoría, conservando la etiqueta"""
+        codigo = self.categorias.index(categoria)
+        subtabla = self.filtrar(self.codigos == codigo)
+        subtabla.codigos[:] = 0
+        subtabla.categorias = (categoria,)
+        return subtabla
+
+    def por_categoria(self):
+        """Itera sobre (categoria, subtabla) en el orden de `categorias`"""
+        for categoria in self.categorias:
+            yield categoria, self.seleccionar_categoria(categoria)
+
+    # Constructores
+
+    @classmethod
+    def desde_diccionarios(cls, estudios, categoria=""):
+        """
+        Construye la tabla a partir de una lista de diccionarios de estudio
+        como `homa_estudios`.
+        """
+        nombres = [estudio.get('nombre', f"Estudio {i + 1}") for i, estudio in enumerate(estudios)]
+        columnas = {clave: [estudio[clave] for estudio in estudios] for clave in CLAVES_ESTUDIO}
+        return cls(nombres, columnas, categorias=(categoria,))
+
+    @classmethod
+    def desde_categorias(cls, estudios_por_categoria):
+        """
+        Construye una tabla con varias categorías a partir de un diccionario
+        {categoria: lista de estudios}.
+        """
+        return cls.concatenar([cls.desde_diccionarios(estudios, categoria)
+                               for categoria, estudios in estudios_por_categoria.items()])
+
+    @classmethod
+    def desde_dataframe(cls, df, categoria=""):
+        """
+        Construye la tabla a partir de un DataFrame con el esquema de
+        obj2/objetivo2 (nombre, n_control, ...) o de obj3/objetivo3
+        (Study, Control_N, ...).
+        """
+        df = df.rename(columns=COLUMNAS_OBJ3)
+        faltantes = [clave for clave in CLAVES_ESTUDIO if clave not in df.columns]
+        if faltantes:
+            raise ValueError(f"Faltan columnas de medias y desviaciones: {', '.join(faltantes)}")
+        if 'nombre' in df.columns:
+            nombres = df['nombre'].to_numpy(dtype=str)
+        else:
+            nombres = [f"Estudio {i + 1}" for i in range(len(df))]
+        columnas = {clave: df[clave].to_numpy() for clave in CLAVES_ESTUDIO}
+        return cls(nombres, columnas, categorias=(categoria,))
+
+    @classmethod
+    def desde_csv(cls, ruta, categoria=None):
+        """
+        Lee un CSV de obj2/objetivo2 u obj3/objetivo3 con `leer_resultado`.
+        Si no se indica la categoría se usa el nombre del archivo sin extensión.
+        """
+        if categoria is None:
+            categoria = str(ruta).replace('\\', '/').rsplit('/', 1)[-1].rsplit('.', 1)[0]
+        df, _, _ = leer_resultado(ruta)
+        return cls.desde_dataframe(df, categoria)
+
+    @classmethod
+    def desde_estructurado(cls, arreglo, categoria=""):
+        """
+        Construye la tabla a partir de un array estructurado de NumPy con los
+        campos de CLAVES_ESTUDIO y, opcionalmente, 'nombre' y 'categoria'.
+        """
+        campos = arreglo.dtype.names or ()
+        if 'nombre' in campos:
+            nombres = arreglo['nombre']
+        else:
+            nombres = [f"Estudio {i + 1}" for i in range(len(arreglo))]
+        columnas = {clave: arreglo[clave] for clave in CLAVES_ESTUDIO}
+        if 'categoria' in campos:
+            # Categorías en orden de primera aparición, como en la tabla original
+            etiquetas, primeras, codigos = np.unique(arreglo['categoria'].astype(str), return_index=True,
+                                                     return_inverse=True)
+            orden = np.argsort(primeras, kind='stable')
+            recodificar = np.empty(len(orden), dtype=np.int16)
+            recodificar[orden] = np.arange(len(orden))
+            return cls(nombres, columnas, recodificar[codigos.reshape(-1)], etiquetas[orden].tolist())
+        return cls(nombres, columnas, categorias=(categoria,))
+
+    @classmethod
+    def concatenar(cls, tablas):
+        """Une varias tablas, fusionando sus categorías por etiqueta"""
+        categorias = []
+        codigos = []
+        for tabla in tablas:
+            mapa = []
+            for categoria in tabla.categorias:
+                if categoria not in categorias:
+                    categorias.append(categoria)
+                mapa.append(categorias.index(categoria))
+            codigos.append(np.asarray(mapa, dtype=np.int16)[tabla.codigos])
+        if not tablas:
+            return cls([], {clave: [] for clave in CLAVES_ESTUDIO})
+        return cls(np.concatenate([tabla.nombres for tabla in tablas]),
+                   {clave: np.concatenate([getattr(tabla, clave) for tabla in tablas])
+                    for clave in CLAVES_ESTUDIO},
+                   np.concatenate(codigos), categorias)
+
+    # Exportación
+
+    def a_estructurado(self):
+        """Devuelve la tabla como array estructurado de NumPy, con la etiqueta de categoría de cada fila"""
+        etiquetas = np.asarray(self.categorias, dtype=str)
+        tipo = [('nombre', self.nombres.dtype), ('categoria', etiquetas.dtype)]
+        tipo += [(clave, TIPOS_COLUMNAS[clave]) for clave in CLAVES_ESTUDIO]
+        arreglo = np.empty(len(self), dtype=tipo)
+        arreglo['nombre'] = self.nombres
+        arreglo['categoria'] = etiquetas[self.codigos]
+        for clave in CLAVES_ESTUDIO:
+            arreglo[clave] = getattr(self, clave)
+        return arreglo
+
+    def a_diccionarios(self):
+        """Devuelve la tabla como lista de diccionarios de estudio"""
+        return [{'nombre': str(self.nombres[i]),
+                 **{clave: getattr(self, clave)[i].item() for clave in CLAVES_ESTUDIO}}
+                for i in range(len(self))]
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from metaanalisis.acumulador import AcumuladorEfectoFijo
+
+
+def test_un_estudio_sin_heterogeneidad():
+    rng = np.random.default_rng(0)
+    for efecto, peso in zip(rng.normal(size=500), rng.uniform(1, 50, size=500)):
+        resultados = AcumuladorEfectoFijo().agregar(efecto, peso).resultados()
+        assert resultados['I_cuadrado'] == 0
+
+
+def _directo(efectos, pesos):
+    media = np.dot(pesos, efectos) / pesos.sum()
+    return media, np.dot(pesos, (efectos - media)**2), pesos.sum()
+
+
+def test_agregar_lote_y_fusionar_coinciden_con_el_calculo_directo():
+    rng = np.random.default_rng(1)
+    efectos = rng.normal(0.3, 0.5, size=101)
+    pesos = rng.uniform(1, 40, size=101)
+    media, Q, suma_pesos = _directo(efectos, pesos)
+
+    uno_a_uno = AcumuladorEfectoFijo()
+    for efecto, peso in zip(efectos, pesos):
+        uno_a_uno.agregar(efecto, peso)
+    en_lote = AcumuladorEfectoFijo().agregar_lote(efectos, pesos)
+    partes = [AcumuladorEfectoFijo().agregar_lote(efectos[i:i + 17], pesos[i:i + 17]) for i in range(0, 101, 17)]
+    fusionado = AcumuladorEfectoFijo()
+    for parte in partes:
+        fusionado.fusionar(parte)
+    sumado = partes[0] + partes[1] + AcumuladorEfectoFijo().agregar_lote(efectos[34:], pesos[34:])
+
+    for acumulador in (uno_a_uno, en_lote, fusionado, sumado):
+        resultados = acumulador.resultados()
+        assert resultados['num_estudios'] == 101
+        assert resultados['efecto_combinado'] == pytest.approx(media, rel=1e-12)
+        assert resultados['Q'] == pytest.approx(Q, rel=1e-10)
+        assert resultados['se_combinado'] == pytest.approx(np.sqrt(1 / suma_pesos), rel=1e-12)
+
+
+def test_fusionar_vacio_no_cambia_nada():
+    acumulador = AcumuladorEfectoFijo().agregar_lote([0.2, 0.5], [10.0, 20.0])
+    antes = acumulador.resultados()
+    assert acumulador.fusionar(AcumuladorEfectoFijo()).resultados() == antes
+    assert AcumuladorEfectoFijo().resultados()['num_estudios'] == 0
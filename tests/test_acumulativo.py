@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from metaanalisis.acumulativo import meta_analisis_acumulativo
+from metaanalisis.aleatorios import combinar_efectos_aleatorios
+from metaanalisis.perezoso import pandas as pd
+
+
+def _estudios(k=8, semilla=3):
+    rng = np.random.default_rng(semilla)
+    se = rng.uniform(0.1, 0.4, size=k)
+    return pd.DataFrame({'nombre': [f"Autor {2000 + i}" for i in range(k)], 'g_hedges': rng.normal(0.4, 0.3, size=k),
+                         'se_g_hedges': se, 'peso': 1 / se**2})
+
+
+def test_fijo_coincide_con_cada_prefijo():
+    df = _estudios()
+    acumulado = meta_analisis_acumulativo(df, orden='anio', modelo='fijo')
+    assert list(acumulado['agregado']) == list(df['nombre'])
+    for j in range(len(df)):
+        w = df['peso'].to_numpy()[:j + 1]
+        y = df['g_hedges'].to_numpy()[:j + 1]
+        media = np.dot(w, y) / w.sum()
+        fila = acumulado.iloc[j]
+        assert fila['num_estudios'] == j + 1
+        assert fila['efecto_combinado'] == pytest.approx(media)
+        assert fila['se_combinado'] == pytest.approx(np.sqrt(1 / w.sum()))
+        assert fila['Q'] == pytest.approx(np.dot(w, (y - media)**2), abs=1e-12)
+
+
+@pytest.mark.parametrize('metodo', ['DL', 'REML'])
+def test_aleatorio_coincide_con_cada_prefijo(metodo):
+    df = _estudios()
+    acumulado = meta_analisis_acumulativo(df, orden='anio', modelo='aleatorio', metodo=metodo)
+    for j in range(len(df)):
+        ajuste = combinar_efectos_aleatorios(df['g_hedges'].to_numpy()[:j + 1],
+                                             df['se_g_hedges'].to_numpy()[:j + 1]**2, metodo)
+        fila = acumulado.iloc[j]
+        assert fila['efecto_combinado'] == pytest.approx(ajuste['efecto_combinado'], abs=1e-8)
+        assert fila['tau2'] == pytest.approx(ajuste['tau2'], abs=1e-8)
+        assert fila['I_cuadrado'] == pytest.approx(ajuste['I_cuadrado'], abs=1e-8)
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from metaanalisis.aleatorios import combinar_efectos_aleatorios
+
+
+@pytest.mark.parametrize('efecto, varianza', [(0.49, 0.1), (0.3, 0.07)])
+@pytest.mark.parametrize('metodo', ['DL', 'PM', 'REML'])
+def test_un_estudio_sin_heterogeneidad(efecto, varianza, metodo):
+    resultado = combinar_efectos_aleatorios([efecto], [varianza], metodo)
+    assert resultado['num_estudios'] == 1
+    assert resultado['I_cuadrado'] == 0.0
+    assert resultado['tau2'] == 0.0
+    assert resultado['efecto_combinado'] == pytest.approx(efecto)
+
+
+def test_un_estudio_en_lote():
+    efectos = np.array([[0.49, np.nan], [0.2, 0.6]])
+    varianzas = np.array([[0.1, np.nan], [0.05, 0.04]])
+    resultado = combinar_efectos_aleatorios(efectos, varianzas, 'DL')
+    assert resultado['I_cuadrado'][0] == 0.0
+    assert np.isfinite(resultado['I_cuadrado'][1])
+
+
+def test_acumulado_primer_paso_sin_heterogeneidad():
+    from metaanalisis.acumulativo import _acumulado_fijo
+
+    efectos = np.array([0.49, -0.2, 0.8])
+    pesos = 1 / np.array([0.1, 0.05, 0.2])
+    resultado = _acumulado_fijo(efectos, pesos, 1.96)
+    assert resultado['I_cuadrado'][0] == 0.0
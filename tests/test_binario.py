@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from metaanalisis.binario import combinar_mantel_haenszel, combinar_peto, efectos_binarios, efectos_peto
+
+# Eventos y totales (intervención, control) de tres estudios
+A = np.array([12, 5, 30])
+N1 = np.array([50, 40, 100])
+C = np.array([20, 9, 41])
+N2 = np.array([52, 38, 98])
+
+
+@pytest.mark.parametrize('medida', ['RR', 'OR'])
+def test_mh_de_un_estudio_es_su_efecto_y_varianza(medida):
+    efecto, varianza = combinar_mantel_haenszel(A[:1], N1[:1], C[:1], N2[:1], medida)
+    por_estudio, varianzas = efectos_binarios(A[:1], N1[:1], C[:1], N2[:1], medida)
+    assert efecto == pytest.approx(por_estudio[0])
+    assert varianza == pytest.approx(varianzas[0])
+
+
+def test_efectos_por_estudio():
+    a, b, c, d = A, N1 - A, C, N2 - C
+    log_rr, var_rr = efectos_binarios(A, N1, C, N2, 'RR')
+    np.testing.assert_allclose(log_rr, np.log((a / N1) / (c / N2)))
+    np.testing.assert_allclose(var_rr, 1 / a - 1 / N1 + 1 / c - 1 / N2)
+    log_or, var_or = efectos_binarios(A, N1, C, N2, 'OR')
+    np.testing.assert_allclose(log_or, np.log(a * d / (b * c)))
+    np.testing.assert_allclose(var_or, 1 / a + 1 / b + 1 / c + 1 / d)
+    rd, var_rd = efectos_binarios(A, N1, C, N2, 'RD')
+    p1, p2 = a / N1, c / N2
+    np.testing.assert_allclose(rd, p1 - p2)
+    np.testing.assert_allclose(var_rd, p1 * (1 - p1) / N1 + p2 * (1 - p2) / N2)
+
+
+def test_correccion_de_continuidad():
+    # Celda en cero: se suma 0.5 a las cuatro celdas del estudio
+    log_or, var_or = efectos_binarios([0, 5], [20, 40], [3, 9], [20, 38], 'OR')
+    assert log_or[0] == pytest.approx(np.log(0.5 * 17.5 / (20.5 * 3.5)))
+    assert var_or[0] == pytest.approx(1 / 0.5 + 1 / 20.5 + 1 / 3.5 + 1 / 17.5)
+    # Sin eventos en ningún grupo: no informa sobre OR/RR
+    log_rr, _ = efectos_binarios([0, 5], [20, 40], [0, 9], [20, 38], 'RR')
+    assert np.isnan(log_rr[0]) and np.isfinite(log_rr[1])
+
+
+def test_mh_con_sumas_explicitas():
+    a, b, c, d = A, N1 - A, C, N2 - C
+    N = N1 + N2
+    log_rr, _ = combinar_mantel_haenszel(A, N1, C, N2, 'RR')
+    assert log_rr == pytest.approx(np.log(np.sum(a * N2 / N) / np.sum(c * N1 / N)))
+    log_or, _ = combinar_mantel_haenszel(A, N1, C, N2, 'OR')
+    assert log_or == pytest.approx(np.log(np.sum(a * d / N) / np.sum(b * c / N)))
+    rd, var_rd = combinar_mantel_haenszel(A, N1, C, N2, 'RD')
+    pesos = N1 * N2 / N
+    assert rd == pytest.approx(np.sum(pesos * (a / N1 - c / N2)) / pesos.sum())
+    assert var_rd == pytest.approx(np.sum((a * b * N2**3 + c * d * N1**3) / (N1 * N2 * N**2)) / pesos.sum()**2)
+
+
+def test_mh_en_lote_igual_que_por_separado():
+    eventos = np.array([A, A[::-1]])
+    totales = np.array([N1, N1[::-1]])
+    efectos, varianzas = combinar_mantel_haenszel(eventos, totales, np.array([C, C]), np.array([N2, N2]), 'OR')
+    for fila in range(2):
+        efecto, varianza = combinar_mantel_haenszel(eventos[fila], totales[fila], C, N2, 'OR')
+        assert efectos[fila] == pytest.approx(efecto)
+        assert varianzas[fila] == pytest.approx(varianza)
+
+
+def test_peto():
+    N = N1 + N2
+    O_menos_E = A - N1 * (A + C) / N
+    V = N1 * N2 * (A + C) * (N - A - C) / (N**2 * (N - 1))
+    efectos, varianzas, _, _ = efectos_peto(A, N1, C, N2)
+    np.testing.assert_allclose(efectos, O_menos_E / V)
+    np.testing.assert_allclose(varianzas, 1 / V)
+    efecto, varianza = combinar_peto(A, N1, C, N2)
+    assert efecto == pytest.approx(O_menos_E.sum() / V.sum())
+    assert varianza == pytest.approx(1 / V.sum())
@@ -0,0 +1,14 @@
+from metaanalisis.cache import clave_cache, huella_codigo
+
+
+def test_huella_codigo_cambia_con_el_codigo(tmp_path):
+    fuente = tmp_path / 'grafico.py'
+    fuente.write_text("DPI = 300\n")
+    antes = clave_cache([], dpi=300, codigo=huella_codigo(str(fuente)))
+    assert clave_cache([], dpi=300, codigo=huella_codigo(str(fuente))) == antes
+    fuente.write_text("DPI = 150\n")
+    assert clave_cache([], dpi=300, codigo=huella_codigo(str(fuente))) != antes
+
+
+def test_huella_codigo_de_modulos():
+    assert huella_codigo('metaanalisis.efecto') != huella_codigo('metaanalisis.graficos')
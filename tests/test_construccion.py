@@ -0,0 +1,18 @@
+from metaanalisis import construccion
+from metaanalisis.resumen import heterogeneidad
+
+
+def _firma(directorio):
+    grafo = construccion.GrafoConstruccion(str(directorio))
+    grafo.nodo('nivel', heterogeneidad, args=(0.3,))
+    return grafo.firma('nivel', {})
+
+
+def test_firma_cambia_con_el_codigo(tmp_path, monkeypatch):
+    modulo = tmp_path / 'calculo.py'
+    modulo.write_text("FACTOR = 1\n")
+    monkeypatch.setattr(construccion, 'MODULOS_CALCULO', construccion.MODULOS_CALCULO + (str(modulo),))
+    antes = _firma(tmp_path)
+    assert _firma(tmp_path) == antes
+    modulo.write_text("FACTOR = 2\n")
+    assert _firma(tmp_path) != antes
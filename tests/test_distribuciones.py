@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from metaanalisis.distribuciones import DF_TABLA_T, cuantil_t, cuantiles_t, valor_p_t
+
+
+def test_cuantiles_t_escalar_en_tabla():
+    assert cuantiles_t(0.975, 4) == pytest.approx(2.776445, abs=1e-5)
+
+
+def test_cuantiles_t_escalar_fuera_de_tabla():
+    valor = cuantiles_t(0.975, DF_TABLA_T + 50)
+    assert isinstance(valor, float)
+    assert valor == pytest.approx(cuantil_t(0.975, DF_TABLA_T + 50))
+    assert valor == pytest.approx(1.975905, abs=1e-5)
+
+
+def test_cuantiles_t_array_conserva_forma():
+    df = np.array([[0, 1, 4], [100, 150, 150]])
+    resultado = cuantiles_t(0.975, df)
+    assert resultado.shape == df.shape
+    assert np.isnan(resultado[0, 0])
+    np.testing.assert_allclose(resultado[0, 1:], [12.706205, 2.776445], atol=1e-5)
+    np.testing.assert_allclose(resultado[1], [1.983972, 1.975905, 1.975905], atol=1e-5)
+
+
+def test_valor_p_t_array_de_df():
+    p = valor_p_t(np.array([2.776445, 2.776445]), np.array([4, 0]))
+    assert p[0] == pytest.approx(0.05, abs=1e-5)
+    assert np.isnan(p[1])
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from metaanalisis.aleatorios import combinar_efectos_aleatorios
+from metaanalisis.metarregresion import metarregresion
+from metaanalisis.perezoso import pandas as pd
+
+RNG = np.random.default_rng(4)
+K = 9
+DOSIS = np.array([1.0, 2.0, 2.0, 4.0, 4.0, 4.0, 2.0, 1.0, 4.0])
+MESES = np.array([3.0, 6.0, 3.0, 6.0, 12.0, 3.0, 12.0, 6.0, 3.0])
+VARIANZAS = RNG.uniform(0.01, 0.06, size=K)
+EFECTOS = 0.1 + 0.08 * DOSIS + RNG.normal(0, 0.15, size=K)
+MODERADORES = pd.DataFrame({'dosis_mg': DOSIS, 'meses': MESES})
+
+
+def _wls(y, v, X):
+    """Mínimos cuadrados ponderados directos: (X'WX)⁻¹ X'Wy"""
+    W = np.diag(1 / v)
+    covarianza = np.linalg.inv(X.T @ W @ X)
+    beta = covarianza @ X.T @ W @ y
+    return beta, covarianza, (y - X @ beta) @ W @ (y - X @ beta)
+
+
+def _coeficientes(coeficientes, conjunto):
+    return coeficientes[coeficientes['conjunto'] == conjunto]
+
+
+def test_fijo_coincide_con_wls():
+    comparacion, coeficientes = metarregresion(EFECTOS, VARIANZAS, MODERADORES, [['dosis_mg'], ['dosis_mg', 'meses']],
+                                               modelo='fijo')
+    for fila, columnas in enumerate([['dosis_mg'], ['dosis_mg', 'meses']]):
+        X = np.column_stack([np.ones(K)] + [MODERADORES[columna] for columna in columnas])
+        beta, covarianza, Q_E = _wls(EFECTOS, VARIANZAS, X)
+        filas = _coeficientes(coeficientes, " + ".join(columnas))
+        np.testing.assert_allclose(filas['estimacion'], beta, rtol=1e-9)
+        np.testing.assert_allclose(filas['se'], np.sqrt(np.diag(covarianza)), rtol=1e-9)
+        assert comparacion.loc[fila, 'Q_E'] == pytest.approx(Q_E)
+        assert comparacion.loc[fila, 'df_E'] == K - X.shape[1]
+
+
+def test_mixto_dl_coincide_con_wls_con_tau2():
+    comparacion, coeficientes = metarregresion(EFECTOS, VARIANZAS, MODERADORES, [['dosis_mg']], metodo='DL')
+    X = np.column_stack([np.ones(K), DOSIS])
+    _, _, Q_E = _wls(EFECTOS, VARIANZAS, X)
+    W = np.diag(1 / VARIANZAS)
+    P = W - W @ X @ np.linalg.inv(X.T @ W @ X) @ X.T @ W
+    tau2 = max(0.0, (Q_E - (K - 2)) / np.trace(P))
+    beta, covarianza, _ = _wls(EFECTOS, VARIANZAS + tau2, X)
+    assert comparacion.loc[0, 'tau2'] == pytest.approx(tau2)
+    np.testing.assert_allclose(coeficientes['estimacion'], beta, rtol=1e-9)
+    np.testing.assert_allclose(coeficientes['se'], np.sqrt(np.diag(covarianza)), rtol=1e-9)
+
+
+def test_solo_intercepto_reml_coincide_con_efectos_aleatorios():
+    # Sin moderadores la meta-regresión mixta es el modelo de efectos aleatorios
+    efectos = EFECTOS + np.array([0.3, -0.3, 0.2, -0.2, 0.4, -0.4, 0.1, -0.1, 0.0])
+    comparacion, coeficientes = metarregresion(efectos, VARIANZAS, MODERADORES.iloc[:, :0], [[]], metodo='REML')
+    ajuste = combinar_efectos_aleatorios(efectos, VARIANZAS, 'REML')
+    assert ajuste['tau2'] > 0
+    assert comparacion.loc[0, 'tau2'] == pytest.approx(ajuste['tau2'], rel=1e-5)
+    assert coeficientes.loc[0, 'estimacion'] == pytest.approx(ajuste['efecto_combinado'], rel=1e-6)
+
+
+def test_estudios_sin_covariable_se_excluyen_del_modelo():
+    moderadores = MODERADORES.assign(meses=np.where(np.arange(K) == 2, np.nan, MESES))
+    comparacion, coeficientes = metarregresion(EFECTOS, VARIANZAS, moderadores, [['meses']], modelo='fijo')
+    mantener = np.arange(K) != 2
+    X = np.column_stack([np.ones(mantener.sum()), MESES[mantener]])
+    beta, _, _ = _wls(EFECTOS[mantener], VARIANZAS[mantener], X)
+    assert comparacion.loc[0, 'num_estudios'] == K - 1
+    np.testing.assert_allclose(coeficientes['estimacion'], beta, rtol=1e-9)
+
+
+@pytest.mark.parametrize('modelo', ['fijo', 'mixto'])
+def test_permutacion_exacta_coincide_con_fuerza_bruta(modelo):
+    import itertools
+
+    from metaanalisis.metarregresion import prueba_permutacion
+
+    k = 6
+    efectos, varianzas, moderadores = EFECTOS[:k], VARIANZAS[:k], MODERADORES.iloc[:k]
+    resumen, _ = prueba_permutacion(efectos, varianzas, moderadores, 'dosis_mg', num_permutaciones=1000,
+                                    modelo=modelo, metodo='DL')
+    assert resumen['exacta'] and resumen['num_permutaciones'] == 720
+
+    def Q_M(dosis):
+        comparacion, _ = metarregresion(efectos, varianzas, pd.DataFrame({'dosis_mg': dosis}), modelo=modelo,
+                                        metodo='DL')
+        return comparacion.loc[0, 'Q_M']
+    observado = Q_M(moderadores['dosis_mg'].to_numpy())
+    permutados = np.array([Q_M(moderadores['dosis_mg'].to_numpy()[list(orden)])
+                           for orden in itertools.permutations(range(k))])
+    assert resumen['Q_M'] == pytest.approx(observado)
+    esperado = np.mean(permutados >= observado - 1e-8 * max(1.0, observado))
+    assert resumen['valor_p_M_permutacion'] == pytest.approx(esperado)
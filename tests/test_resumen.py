@@ -0,0 +1,20 @@
+import os
+
+import pytest
+
+from metaanalisis.resumen import comparar_resumen, resumen_obj3
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CSV_R = os.path.join(RAIZ, 'obj3', 'meta_analisis_resumen.csv')
+
+
+@pytest.mark.skipif(not os.path.exists(CSV_R), reason="Falta obj3/meta_analisis_resumen.csv")
+def test_resumen_obj3_coincide_con_r():
+    comparacion = comparar_resumen(resumen_obj3(raiz=RAIZ), CSV_R, tolerancia=1e-4)
+    assert comparacion['coincide'].any()
+    distintas = comparacion[~comparacion['coincide']]
+    # Toda diferencia con el CSV de R debe ser una divergencia conocida
+    assert distintas['conocida'].notna().all(), distintas[distintas['conocida'].isna()].to_string()
+    # Las filas de diferencia de medias (REML + HKSJ) coinciden por completo
+    medias = comparacion[comparacion['Outcome'].isin(["IMC", "HOMA-IR", "Glucosa Ayunas", "Insulina Ayunas"])]
+    assert medias['coincide'].all(), medias[~medias['coincide']].to_string()
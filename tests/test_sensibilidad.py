@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from metaanalisis.perezoso import pandas as pd
+from metaanalisis.sensibilidad import dejar_uno_fuera
+
+
+def test_fijo_un_estudio_sin_heterogeneidad():
+    rng = np.random.default_rng(0)
+    for efecto, se in zip(rng.normal(size=200), rng.uniform(0.1, 0.5, size=200)):
+        df = pd.DataFrame({'nombre': ["A"], 'g_hedges': [efecto], 'se_g_hedges': [se], 'peso': [1 / se**2]})
+        completo, _ = dejar_uno_fuera(df, modelo='fijo')
+        assert completo['I_cuadrado'] == 0
+
+
+def _estudios(k=7, semilla=2):
+    rng = np.random.default_rng(semilla)
+    se = rng.uniform(0.1, 0.4, size=k)
+    return pd.DataFrame({'nombre': [f"Estudio {i}" for i in range(k)], 'g_hedges': rng.normal(0.4, 0.3, size=k),
+                         'se_g_hedges': se, 'peso': 1 / se**2})
+
+
+def test_fijo_coincide_con_reajuste_por_fuerza_bruta():
+    df = _estudios()
+    _, sensibilidad = dejar_uno_fuera(df, modelo='fijo')
+    for i in range(len(df)):
+        resto = df.drop(index=i)
+        w = resto['peso'].to_numpy()
+        y = resto['g_hedges'].to_numpy()
+        media = np.dot(w, y) / w.sum()
+        Q = np.dot(w, (y - media)**2)
+        fila = sensibilidad.iloc[i]
+        assert fila['efecto_combinado'] == pytest.approx(media)
+        assert fila['se_combinado'] == pytest.approx(np.sqrt(1 / w.sum()))
+        assert fila['Q'] == pytest.approx(Q)
+        assert fila['I_cuadrado'] == pytest.approx(max(0, (Q - (len(y) - 1)) / Q * 100))
+
+
+@pytest.mark.parametrize('metodo', ['DL', 'REML'])
+def test_aleatorio_coincide_con_reajuste_por_fuerza_bruta(metodo):
+    from metaanalisis.aleatorios import combinar_efectos_aleatorios
+
+    df = _estudios()
+    _, sensibilidad = dejar_uno_fuera(df, modelo='aleatorio', metodo=metodo)
+    for i in range(len(df)):
+        resto = df.drop(index=i)
+        ajuste = combinar_efectos_aleatorios(resto['g_hedges'].to_numpy(), resto['se_g_hedges'].to_numpy()**2, metodo)
+        fila = sensibilidad.iloc[i]
+        assert fila['efecto_combinado'] == pytest.approx(ajuste['efecto_combinado'], abs=1e-8)
+        assert fila['tau2'] == pytest.approx(ajuste['tau2'], abs=1e-8)
@@ -0,0 +1,113 @@
+import pytest
+
+from metaanalisis.servicio import combinar_lote, validar_solicitud
+
+
+def _estudio(nombre, media_intervencion):
+    return {'nombre': nombre, 'n_control': 20, 'n_intervencion': 22, 'media_control': 1.0,
+            'media_intervencion': media_intervencion, 'de_control': 1.0, 'de_intervencion': 1.1}
+
+
+@pytest.mark.parametrize('modelo', ['fijo', 'aleatorio'])
+@pytest.mark.parametrize('media', [1.49, 1.3, 2.77])
+def test_un_estudio_sin_heterogeneidad(modelo, media):
+    solicitud = validar_solicitud({'estudios': [_estudio("A", media)], 'modelo': modelo, 'medida': 'diferencia'})
+    resultado = combinar_lote([solicitud])[0]
+    assert resultado['num_estudios'] == 1
+    assert resultado['I_cuadrado'] == 0.0
+
+
+def _con_servicio(corrutina):
+    import asyncio
+
+    from metaanalisis.servicio import ServicioMetaanalisis
+
+    async def principal():
+        async with ServicioMetaanalisis(procesos=1) as servicio:
+            puerto = await servicio.iniciar(puerto=0)
+            return await corrutina(puerto)
+    return asyncio.run(principal())
+
+
+def test_json_estricto_sin_nan():
+    import json
+
+    from metaanalisis.servicio import solicitar
+
+    datos = {'estudios': [_estudio("A", 1.3)], 'modelo': 'aleatorio', 'intervalo': 't'}
+    estado, _, cuerpo = _con_servicio(lambda puerto: solicitar("127.0.0.1", puerto, 'POST', '/combinar', datos))
+    assert estado == 200
+
+    def rechazar(constante):
+        raise ValueError(constante)
+    resultado = json.loads(cuerpo, parse_constant=rechazar)
+    assert resultado['IC_95_combinado_inf'] is None
+    assert resultado['valor_p'] is None
+    assert resultado['efecto_combinado'] is not None
+
+
+def test_content_length_no_numerico():
+    import asyncio
+
+    async def enviar(puerto):
+        reader, writer = await asyncio.open_connection("127.0.0.1", puerto)
+        writer.write(b"POST /combinar HTTP/1.1\r\nHost: x\r\nContent-Length: abc\r\n\r\n")
+        await writer.drain()
+        respuesta = await reader.read()
+        writer.close()
+        return respuesta
+    respuesta = _con_servicio(enviar)
+    assert respuesta.startswith(b"HTTP/1.1 400")
+    assert "Content-Length inválido".encode('utf-8') in respuesta
+
+
+@pytest.mark.parametrize('cambios', [
+    {'z': "abc"}, {'z': -1}, {'dpi': "x"}, {'dpi': 100000}, {'excluir': [{}]}, {'excluir': "A"},
+    {'estudios': [{**_estudio("A", 1.3), 'n_control': 20.5}]},
+    {'estudios': [{**_estudio("A", 1.3), 'n_control': "20.5"}]},
+    {'estudios': [{**_estudio("A", 1.3), 'media_control': "x"}]},
+    {'estudios': [{**_estudio("A", 1.3), 'de_control': float('inf')}]},
+])
+def test_entrada_invalida_es_error_de_solicitud(cambios):
+    from metaanalisis.servicio import ErrorSolicitud
+
+    with pytest.raises(ErrorSolicitud):
+        validar_solicitud({'estudios': [_estudio("A", 1.3), _estudio("B", 1.5)], **cambios})
+
+
+def test_tamanos_como_texto_se_convierten():
+    solicitud = validar_solicitud({'estudios': [{**_estudio("A", 1.3), 'n_control': "20"}]})
+    assert solicitud['estudios'][0]['n_control'] == 20
+
+
+def test_lote_mixto_no_arrastra_a_las_validas(monkeypatch):
+    import asyncio
+
+    from metaanalisis import servicio
+
+    original = servicio.combinar_lote
+
+    def combinar_lote(solicitudes):
+        if any(solicitud['categoria'] == "mala" for solicitud in solicitudes):
+            raise RuntimeError("lote roto")
+        return original(solicitudes)
+    monkeypatch.setattr(servicio, 'combinar_lote', combinar_lote)
+
+    buena = validar_solicitud({'estudios': [_estudio("A", 1.3), _estudio("B", 1.5)]})
+    mala = {**buena, 'categoria': "mala"}
+
+    async def principal():
+        agrupador = servicio._Agrupador(ventana=0.01, tamano_maximo=10)
+        futuros = [agrupador.enviar(buena), agrupador.enviar(mala), agrupador.enviar(buena)]
+        return await asyncio.gather(*futuros, return_exceptions=True)
+    resultados = asyncio.run(principal())
+    assert isinstance(resultados[1], RuntimeError)
+    assert resultados[0]['num_estudios'] == 2 and resultados[2]['num_estudios'] == 2
+
+
+def test_solicitud_malformada_responde_400():
+    from metaanalisis.servicio import solicitar
+
+    datos = {'estudios': [_estudio("A", 1.3)], 'dpi': "x"}
+    estado, _, _ = _con_servicio(lambda puerto: solicitar("127.0.0.1", puerto, 'POST', '/combinar', datos))
+    assert estado == 400
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from metaanalisis.perezoso import pandas as pd
+from metaanalisis.sesgo import prueba_begg, prueba_egger, trim_and_fill
+
+
+def _estudios(efectos, se):
+    return pd.DataFrame({'g_hedges': np.asarray(efectos, dtype=float), 'se_g_hedges': np.asarray(se, dtype=float)})
+
+
+# Embudo asimétrico: los estudios pequeños (SE grande) tienen efectos mayores
+ASIMETRICO = _estudios([0.10, 0.15, 0.20, 0.35, 0.50, 0.70, 0.90], [0.05, 0.08, 0.10, 0.15, 0.20, 0.25, 0.30])
+
+
+def test_egger_coincide_con_regresion_lineal():
+    efectos, se = ASIMETRICO['g_hedges'].to_numpy(), ASIMETRICO['se_g_hedges'].to_numpy()
+    pendiente, intercepto = np.polyfit(1 / se, efectos / se, 1)
+    resultado = prueba_egger(ASIMETRICO)
+    assert resultado['intercepto'] == pytest.approx(intercepto)
+    assert resultado['pendiente'] == pytest.approx(pendiente)
+    assert resultado['df'] == len(efectos) - 2
+    assert resultado['intercepto'] > 0
+
+
+def test_begg_coincide_con_tau_de_kendall_por_pares():
+    efectos, se = ASIMETRICO['g_hedges'].to_numpy(), ASIMETRICO['se_g_hedges'].to_numpy()
+    v = se**2
+    w = 1 / v
+    fijo = np.dot(w, efectos) / w.sum()
+    t = (efectos - fijo) / np.sqrt(v - 1 / w.sum())
+    k = len(efectos)
+    S = sum(np.sign(t[i] - t[j]) * np.sign(v[i] - v[j]) for i in range(k) for j in range(i + 1, k))
+    assert prueba_begg(ASIMETRICO)['tau_kendall'] == pytest.approx(S / (k * (k - 1) / 2))
+
+
+def test_trim_and_fill_rellena_el_lado_que_falta():
+    resultados, relleno = trim_and_fill(ASIMETRICO, modelo='fijo')
+    assert resultados['lado'] == 'izquierda'
+    assert resultados['k0'] == len(relleno) > 0
+    assert resultados['efecto_combinado'] < resultados['efecto_original']
+    assert resultados['num_estudios'] == len(ASIMETRICO) + resultados['k0']
+
+
+def test_trim_and_fill_reflejado_da_el_efecto_reflejado():
+    reflejado = ASIMETRICO.assign(g_hedges=-ASIMETRICO['g_hedges'])
+    original, _ = trim_and_fill(ASIMETRICO)
+    resultados, relleno = trim_and_fill(reflejado)
+    assert resultados['lado'] == 'derecha'
+    assert resultados['k0'] == original['k0'] == len(relleno)
+    assert resultados['efecto_combinado'] == pytest.approx(-original['efecto_combinado'])
+
+
+@pytest.mark.parametrize('k', [0, 1, 2])
+def test_menos_de_tres_estudios_da_nan(k):
+    estudios = ASIMETRICO.iloc[:k]
+    assert np.isnan(prueba_egger(estudios)['intercepto'])
+    assert np.isnan(prueba_begg(estudios)['valor_p'])
+    resultados, relleno = trim_and_fill(estudios)
+    assert resultados['k0'] == 0 and len(relleno) == 0
+    assert np.isnan(resultados['efecto_combinado'])
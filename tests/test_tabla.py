@@ -0,0 +1,26 @@
+import numpy as np
+
+from metaanalisis.efecto import CLAVES_ESTUDIO
+from metaanalisis.tabla import TablaEstudios
+
+
+def _tabla():
+    estudios = {
+        'IMC': [{'nombre': "A", 'n_control': 20, 'n_intervencion': 22, 'media_control': 30.0,
+                 'media_intervencion': 29.0, 'de_control': 2.0, 'de_intervencion': 2.5}],
+        'HOMA': [{'nombre': "B", 'n_control': 15, 'n_intervencion': 16, 'media_control': 3.0,
+                  'media_intervencion': 2.4, 'de_control': 0.8, 'de_intervencion': 0.9},
+                 {'nombre': "C", 'n_control': 30, 'n_intervencion': 28, 'media_control': 2.8,
+                  'media_intervencion': 2.5, 'de_control': 0.7, 'de_intervencion': 0.6}]
+    }
+    return TablaEstudios.desde_categorias(estudios)
+
+
+def test_estructurado_conserva_categorias():
+    tabla = _tabla()
+    copia = TablaEstudios.desde_estructurado(tabla.a_estructurado())
+    assert copia.categorias == tabla.categorias
+    np.testing.assert_array_equal(copia.codigos, tabla.codigos)
+    np.testing.assert_array_equal(copia.nombres, tabla.nombres)
+    for clave in CLAVES_ESTUDIO:
+        np.testing.assert_array_equal(getattr(copia, clave), getattr(tabla, clave))
@@ -1,6 +1,7 @@
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
+
+# pandas y pyplot se importan al primer uso: el cálculo solo necesita numpy
+from metaanalisis.perezoso import pandas as pd, pyplot as plt
 
 def calcular_diferencia_grupos_estadisticas(estudios):
     """